@@ -4,44 +4,195 @@ AALEX - AI Assistant Like Jarvis
 A comprehensive AI assistant for Windows PC with voice recognition, TTS, and system control
 """
 
-import speech_recognition as sr
-import pyttsx3
-import pyautogui
-import psutil
 import os
-import subprocess
-import webbrowser
-import requests
+import sys
 import json
 import time
 import threading
 from datetime import datetime
-import win32api
-import win32con
-import win32gui
-import ctypes
-from ctypes import wintypes
+from collections import deque
 import random
-import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from tkinter import scrolledtext
+import shlex
+import subprocess
+from aalex_platform import lazy_module, get_backend
+from aalex_router import CommandRouter, EarlyIntentDetector, tokenize
+from aalex_executor import CommandExecutor, current_task
+from aalex_tracing import Tracer, current_interaction
+from aalex_metrics import PerformanceMetrics
+from aalex_profiling import Profiler
+from aalex_apps import AppCatalog
+from aalex_custom import CustomCommand, CustomCommandStore
+from aalex_audio import StreamingCapture, MicrophoneSource
+from aalex_speech import SpeechWorker, Pyttsx3Driver, PhraseCache, PRIORITY_HIGH, PRIORITY_NORMAL
+
+# Heavy and optional modules load on first use so the assistant starts quickly
+sr = lazy_module("speech_recognition")
+tk = lazy_module("tkinter")
+ttk = lazy_module("tkinter.ttk")
+messagebox = lazy_module("tkinter.messagebox")
+simpledialog = lazy_module("tkinter.simpledialog")
+scrolledtext = lazy_module("tkinter.scrolledtext")
+aalex_vad = lazy_module("aalex_vad")
+aalex_preprocess = lazy_module("aalex_preprocess")
+aalex_recognition = lazy_module("aalex_recognition")
+aalex_telemetry = lazy_module("aalex_telemetry")
+aalex_ui = lazy_module("aalex_ui")
+
+JOKES = [
+    "Why don't scientists trust atoms? Because they make up everything!",
+    "Why did the scarecrow win an award? He was outstanding in his field!",
+    "Why don't eggs tell jokes? They'd crack each other up!",
+    "What do you call a fake noodle? An impasta!",
+    "Why did the math book look so sad? Because it had too many problems!"
+]
+
+QUOTES = [
+    "The only way to do great work is to love what you do. - Steve Jobs",
+    "Innovation distinguishes between a leader and a follower. - Steve Jobs",
+    "Life is what happens to you while you're busy making other plans. - John Lennon",
+    "The future belongs to those who believe in the beauty of their dreams. - Eleanor Roosevelt",
+    "It is during our darkest moments that we must focus to see the light. - Aristotle"
+]
+
+APPLICATIONS = {
+    "notepad": "notepad.exe",
+    "calculator": "calc.exe",
+    "chrome": "chrome.exe",
+    "firefox": "firefox.exe",
+    "edge": "msedge.exe",
+    "word": "winword.exe",
+    "excel": "excel.exe",
+    "powerpoint": "powerpnt.exe",
+    "spotify": "spotify.exe",
+    "discord": "discord.exe",
+    "steam": "steam.exe"
+}
+
+# Commands that read an argument from the rest of the utterance, so a partial
+# transcript never dispatches them ("profile the next" has not said how many yet)
+LATE_COMMANDS = {"search", "open", "close", "profile", "profiling"}
+# and commands that may dispatch early once one of their argument words is heard
+EARLY_ARGUMENTS = {
+    "volume": ("up", "down", "increase", "decrease", "mute"),
+    "brightness": ("up", "down", "increase", "decrease")
+}
+
+# Fixed responses, rendered once and replayed from the phrase cache
+CACHED_PHRASES = set(JOKES + QUOTES + [
+    "Hello! I'm AALEX, your AI assistant. Say 'control' to open the command hub!",
+    "I didn't understand that command. Say 'help' to see available commands.",
+    "Weather information requires an API key. Please configure your weather API key in the settings.",
+    "What would you like me to search for?",
+    "Volume increased",
+    "Volume decreased",
+    "Volume muted",
+    "Volume control: say 'volume up', 'volume down', or 'mute'",
+    "Brightness increased",
+    "Brightness decreased",
+    "Brightness control: say 'brightness up' or 'brightness down'",
+    "Screenshot taken and saved",
+    "Shutting down the computer in 10 seconds. Say 'cancel' to abort.",
+    "Restarting the computer in 10 seconds. Say 'cancel' to abort.",
+    "Putting computer to sleep",
+    "No battery information available",
+    "Here are the available commands",
+    "Opening command control pad",
+    "AALEX is now active. Say my name to wake me up!",
+    "Yes, how can I help you?",
+    "Goodbye! AALEX is shutting down.",
+])
 
 class AALEX:
-    def __init__(self):
-        """Initialize the AI assistant"""
+    def __init__(self, streaming=False, audio_source=None, wake_samples=None, speech_driver=None,
+                 recognizers=None, streaming_recognizer=None, headless=False, platform=None, trace=False):
+        """Initialize the AI assistant
+        
+        headless=True skips the microphone, for driving process_command from text
+        (see aalex_headless.py). trace=True (or AALEX_TRACE=1) records per-stage latency.
+        """
         self.name = "AALEX"
-        self.is_listening = False
-        self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
-        self.engine = pyttsx3.init()
         
-        # Configure TTS
-        self.setup_tts()
+        # Per-stage latency spans, off unless asked for
+        self.tracer = Tracer(enabled=trace or os.environ.get("AALEX_TRACE") == "1")
+        # Always-on latency histograms for the control pad's Performance tab
+        self.metrics = PerformanceMetrics()
+        # cProfile and tracemalloc on request ("profile the next 3 commands")
+        self.profiler = Profiler(on_finished=self.on_profile_written)
+        self.is_listening = False
+        self.headless = headless
+        self.recognizer = None if headless else sr.Recognizer()
+        if self.recognizer:
+            self.recognizer.dynamic_energy_threshold = True
+        self.microphone = None if headless else sr.Microphone()
+        self.calibrated = False
+        
+        # Endpointing: speech ends shortly after the voice stops, not at a fixed timeout
+        self.vad = aalex_vad.VoiceActivityDetector()
+        self.max_phrase_seconds = 15
+        self.configure_vad()
+        
+        # Payload size and encode time of recent recognition requests
+        self.payload_stats = deque(maxlen=100)
+        
+        # Recognizer backends race each other; the first confident transcript wins
+        if recognizers is None and not headless:
+            recognizers = aalex_recognition.default_backends(self.recognizer)
+        self.recognition = aalex_recognition.RecognizerPool(recognizers or [])
+        
+        # Speech output runs on its own thread, which owns the TTS engine
+        self.speech = SpeechWorker(speech_driver or Pyttsx3Driver(configure=self.setup_tts),
+                                   None if headless else PhraseCache(), on_finished=self.on_spoken)
+        self.speech.start()
+        self.speech.preload(sorted(CACHED_PHRASES))
+        
+        # Spoken replies are also collected here, per thread, when a caller sets .responses
+        self.response_sink = threading.local()
+        
+        # Louder than the threshold by this factor while talking means the user is barging in,
+        # once it lasts barge_in_frames frames in a row and is well above our own voice coming
+        # back through the microphone (echo_margin times the level heard while we talk)
+        self.barge_in_ratio = 3.0
+        self.barge_in_frames = 3
+        self.echo_margin = 2.0
+        self.echo_seed_seconds = 0.3  # Start of each reply that only measures the echo
+        self.echo_utterance = None
+        self.echo_level = 0.0
+        self.barge_in_run = 0
+        
+        # Continuous capture keeps the input open between listens
+        self.capture = None
+        if streaming or audio_source:
+            self.start_streaming_capture(audio_source)
+        
+        # With continuous capture, a streaming recognizer lets short commands run
+        # from partial transcripts before the utterance is over
+        self.streaming_recognizer = streaming_recognizer
+        if self.capture and streaming_recognizer is None:
+            self.streaming_recognizer = aalex_recognition.default_streaming_backend()
+        self.early_dispatch_savings = deque(maxlen=100)
+        
+        # Optional offline wake word spotter, so ambient speech never leaves the machine
+        self.wake_spotter = None
+        if wake_samples:
+            self.enable_local_wake(wake_samples)
         
         # Wake words
         self.wake_words = ["aalex", "alex", "hey aalex", "jarvis"]
         
-        # Load custom commands
+        # System telemetry is sampled in the background so status questions answer instantly
+        self.telemetry = aalex_telemetry.shared_sampler()
+        
+        # Volume, screenshots, power and window queries for this OS
+        self.platform = platform or get_backend()
+        
+        # Installed applications, indexed in the background from the on-disk cache
+        self.apps = None
+        self.apps_ready = threading.Event()
+        threading.Thread(target=self.load_app_catalog, daemon=True).start()
+        
+        # Load custom commands. The store's watcher thread edits the command table
+        # and router, so readers on other threads take this lock or a snapshot
+        self.commands_lock = threading.RLock()
         self.load_custom_commands()
         
         # Commands mapping
@@ -64,84 +215,340 @@ class AALEX:
             "quote": self.tell_quote,
             "help": self.show_help,
             "control": self.open_control_pad,
-            "settings": self.open_control_pad
+            "settings": self.open_control_pad,
+            "cancel": self.cancel_pending,
+            "profile": self.profile_commands,
+            "profiling": self.profile_commands
         }
         
-        # Merge custom commands
-        self.commands.update(self.custom_commands)
+        # Merge custom commands, one entry per trigger phrase
+        self.builtin_commands = set(self.commands)
+        for command in self.custom_store:
+            self.compile_custom_command(command)
+        
+        # Commands that take the rest of the utterance as an argument win over
+        # keywords that appear inside that argument ("search for system time").
+        # Among these the first one spoken wins, so "search how to cancel" searches;
+        # during a countdown interact() lets "cancel" through before routing.
+        self.command_priorities = {"search": 1, "open": 1, "close": 1, "cancel": 1}
+        self.router = CommandRouter(self.commands, self.command_priorities)
+        
+        # Handlers run on a worker pool so the listen loop never waits on them.
+        # Read-only commands can be merged and retried; the rest run exactly once.
+        # The control pad owns a Tk window and "cancel" must not queue behind anything.
+        self.executor = CommandExecutor(
+            max_workers=4,
+            timeouts={"weather": 15, "search": 15, "open": 15, "close": 15, "system": 10},
+            idempotent={"time", "date", "weather", "system", "battery", "joke", "quote", "help"},
+            inline={"cancel", "control", "settings"},
+            on_error=lambda task, e: self.speak(f"Sorry, I encountered an error: {str(e)}"),
+            on_timeout=lambda task: self.speak(f"The {task.name} command is taking too long, I've stopped waiting for it."),
+            on_reject=lambda task: self.speak("I'm still busy with other commands, please try again in a moment."),
+            on_finished=self.on_command_finished)
         
         # Control pad window
         self.control_pad = None
         
+        # Apply edits to the custom command log as they happen (control pad or another process).
+        # Last, since the watcher may call back at once and reads everything set up above
+        self.custom_store.on_change = self.on_custom_command_changed
+        self.custom_store.watch()
+        
         print(f"{self.name} initialized successfully!")
         self.speak("Hello! I'm AALEX, your AI assistant. Say 'control' to open the command hub!")
     
-    def setup_tts(self):
-        """Configure text-to-speech settings"""
-        voices = self.engine.getProperty('voices')
+    def setup_tts(self, engine):
+        """Configure text-to-speech settings (runs on the speech thread)"""
+        voices = engine.getProperty('voices')
         # Try to find a male voice (more like Jarvis)
         for voice in voices:
             if 'male' in voice.name.lower() or 'david' in voice.name.lower():
-                self.engine.setProperty('voice', voice.id)
+                engine.setProperty('voice', voice.id)
                 break
         
-        self.engine.setProperty('rate', 180)  # Speed of speech
-        self.engine.setProperty('volume', 0.9)  # Volume level
+        engine.setProperty('rate', 180)  # Speed of speech
+        engine.setProperty('volume', 0.9)  # Volume level
     
-    def speak(self, text):
-        """Convert text to speech"""
+    def speak(self, text, wait=False, priority=PRIORITY_NORMAL):
+        """Convert text to speech
+        
+        Returns immediately unless wait is True; the returned request can be waited on.
+        """
         print(f"{self.name}: {text}")
-        self.engine.say(text)
-        self.engine.runAndWait()
+        # Replies go to the command that produced them, or to the caller's sink
+        task = current_task()
+        sink = task.responses if task else getattr(self.response_sink, 'responses', None)
+        if sink is not None:
+            sink.append(text)
+        request = self.speech.say(text, priority, cached=text in CACHED_PHRASES, tag=current_interaction())
+        if wait:
+            request.wait()
+        return request
     
-    def listen(self):
-        """Listen for voice commands"""
+    def on_command_finished(self, task):
+        """Count a finished command and how long it took from request to result"""
+        self.metrics.record_command(task.name, task.finished - task.submitted, task.state)
+    
+    def on_spoken(self, request):
+        """Measure and trace an utterance once the speech thread has finished it"""
+        if request.started_at is not None:
+            self.metrics.record_speech(request.finished_at - request.started_at,
+                                       request.started_at - request.queued_at)
+        if self.tracer.enabled and request.started_at is not None:
+            self.tracer.record("speak", request.started_at, request.finished_at, interaction=request.tag,
+                               queued_ms=round((request.started_at - request.queued_at) * 1000, 3),
+                               chars=len(request.text), cached=request.cached, interrupted=request.cancelled)
+    
+    def on_user_speech(self, rms):
+        """Stop talking when the user starts speaking over us (capture thread)"""
+        current = self.speech.current
+        if current is None:
+            return
+        if current is not self.echo_utterance:
+            # A new reply: start measuring how loud it comes back through the microphone
+            self.echo_utterance = current
+            self.echo_level = 0.0
+            self.barge_in_run = 0
+        started = current.started_at
+        if started is None or time.monotonic() - started < self.echo_seed_seconds:
+            self.echo_level = max(self.echo_level, rms)
+            return
+        
+        threshold = max(self.capture.energy_threshold * self.barge_in_ratio, self.echo_level * self.echo_margin)
+        if rms <= threshold:
+            self.barge_in_run = 0
+            # Follow the echo as the reply gets louder or quieter
+            self.echo_level += 0.1 * (rms - self.echo_level)
+            return
+        self.barge_in_run += 1
+        if self.barge_in_run >= self.barge_in_frames:
+            self.barge_in_run = 0
+            self.speech.interrupt()
+    
+    def start_streaming_capture(self, source=None):
+        """Switch listen() to continuous capture from source (the microphone by default)"""
+        if self.capture:
+            self.capture.stop()
+        self.capture = StreamingCapture(source or MicrophoneSource(self.microphone),
+                                        pause_threshold=self.recognizer.pause_threshold,
+                                        energy_threshold=self.recognizer.energy_threshold)
+        self.capture.on_speech = self.on_user_speech
+        self.capture.vad = self.vad
+        self.capture.start()
+    
+    def enable_local_wake(self, directory="wake_samples"):
+        """Gate the cloud recognizer behind the offline wake word spotter"""
+        from aalex_wakeword import WakeWordSpotter
+        spotter = WakeWordSpotter()
+        try:
+            enrolled = spotter.enroll_directory(directory)
+        except ValueError as e:
+            print(f"Wake word enrollment rejected, using cloud wake detection: {e}")
+            return
+        if enrolled:
+            self.wake_spotter = spotter
+            print(f"Local wake word spotter enrolled from {directory}")
+        else:
+            print(f"No wake word samples found in {directory}, using cloud wake detection")
+    
+    def configure_vad(self, hangover_ms=None, energy_ratio=None, max_phrase_seconds=None):
+        """Apply endpointing settings to the detector and the recognizer"""
+        if hangover_ms is not None:
+            self.vad.hangover_ms = hangover_ms
+        if energy_ratio is not None:
+            self.vad.energy_ratio = energy_ratio
+        if max_phrase_seconds is not None:
+            self.max_phrase_seconds = max_phrase_seconds
+        if self.recognizer is None:
+            return
+        # The recognizer requires pause_threshold >= non_speaking_duration
+        self.recognizer.pause_threshold = self.vad.hangover
+        self.recognizer.non_speaking_duration = min(self.vad.hangover, self.vad.padding_ms / 1000)
+    
+    def listen_audio(self):
+        """Capture one utterance as AudioData, or None on timeout"""
         try:
+            if self.capture:
+                print("Listening...")
+                with self.tracer.span("capture", streaming=True) as span:
+                    utterance = self.capture.listen(timeout=5, phrase_time_limit=self.max_phrase_seconds)
+                    span.set(heard=utterance is not None)
+                return utterance.to_audio_data() if utterance else None
             with self.microphone as source:
                 print("Listening...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=5)
+                # Calibrate once; after that the recognizer's dynamic threshold tracks the room
+                if not self.calibrated:
+                    with self.tracer.span("calibrate"):
+                        self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                    self.calibrated = True
+                with self.tracer.span("capture"):
+                    audio = self.recognizer.listen(source, timeout=5, phrase_time_limit=self.max_phrase_seconds)
             
-            try:
-                text = self.recognizer.recognize_google(audio).lower()
-                print(f"You said: {text}")
-                return text
-            except sr.UnknownValueError:
-                return None
-            except sr.RequestError as e:
-                print(f"Could not request results: {e}")
-                return None
+            # The threshold sits ratio x above the noise floor, see adjust_for_ambient_noise
+            noise_floor = self.recognizer.energy_threshold / self.recognizer.dynamic_energy_ratio
+            with self.tracer.span("trim"):
+                frame_data = self.vad.trim(audio.frame_data, audio.sample_rate, audio.sample_width, noise_floor)
+            return sr.AudioData(frame_data, audio.sample_rate, audio.sample_width)
         except sr.WaitTimeoutError:
             return None
     
+    def recognize(self, audio):
+        """Transcribe captured audio"""
+        # 16 kHz mono FLAC is all the recognizer needs, and much less to upload
+        with self.tracer.span("preprocess"):
+            audio = aalex_preprocess.prepare(audio)
+        started = time.monotonic()
+        result = None
+        try:
+            with self.tracer.span("recognize") as span:
+                result = self.recognition.recognize(audio)
+                if result:
+                    span.set(backend=result.backend, confidence=result.confidence)
+        finally:
+            self.metrics.record_recognition(time.monotonic() - started, bool(result))
+            self.payload_stats.append(audio.stats)
+            print(f"Recognition payload: {audio.stats}")
+        if not result:
+            return None
+        text = result.text.lower()
+        print(f"You said: {text} ({result.backend}, {result.latency * 1000:.0f} ms)")
+        return text
+    
+    def listen(self):
+        """Listen for voice commands"""
+        audio = self.listen_audio()
+        return self.recognize(audio) if audio else None
+    
+    def listen_for_local_wake(self):
+        """Capture one utterance and check it with the offline spotter only
+        
+        Returns (woke, audio after the wake word or None).
+        """
+        audio = self.listen_audio()
+        if audio is None:
+            return False, None
+        with self.tracer.span("wake_word", local=True):
+            hit = self.wake_spotter.detect_pcm(audio.frame_data, audio.sample_rate, audio.sample_width)
+        if not hit:
+            return False, None
+        
+        label, distance, end = hit
+        print(f"Wake word '{label}' detected locally in {self.wake_spotter.last_latency * 1000:.0f} ms")
+        
+        # Anything said after the wake word may already be the command
+        offset = int(end * audio.sample_rate) * audio.sample_width
+        remainder = audio.frame_data[offset:]
+        if len(remainder) < 0.3 * audio.sample_rate * audio.sample_width:
+            return True, None
+        return True, sr.AudioData(remainder, audio.sample_rate, audio.sample_width)
+    
     def is_wake_word(self, text):
         """Check if the text contains a wake word"""
         if not text:
             return False
-        return any(wake_word in text for wake_word in self.wake_words)
+        with self.tracer.span("wake_word"):
+            return any(wake_word in text for wake_word in self.wake_words)
+    
+    def strip_wake_words(self, text):
+        """Remove wake words from an utterance"""
+        # Longest first, so "hey aalex" goes before "aalex" and "aalex" before "alex"
+        for wake_word in sorted(self.wake_words, key=len, reverse=True):
+            text = text.replace(wake_word, "").strip()
+        return text
     
     def process_command(self, text):
-        """Process the voice command"""
+        """Process the voice command, returns the CommandTask or None if nothing matched"""
         if not text:
-            return
-        
-        # Remove wake words from the command
-        for wake_word in self.wake_words:
-            text = text.replace(wake_word, "").strip()
+            return None
         
-        # Find matching command
-        for command, function in self.commands.items():
-            if command in text:
-                try:
-                    function(text)
-                    return
-                except Exception as e:
-                    self.speak(f"Sorry, I encountered an error: {str(e)}")
-                    return
+        with self.tracer.span("route") as span:
+            # Remove wake words from the command
+            text = self.strip_wake_words(text)
+            
+            # Find matching command
+            match = self.route(text)
+            span.set(command=match.name if match else None)
+        if match:
+            return self.dispatch(match, text)
         
         # If no specific command found, try to help
         self.speak("I didn't understand that command. Say 'help' to see available commands.")
     
+    def dispatch(self, match, text):
+        """Hand the routed command to the executor and return its CommandTask"""
+        function = match.function
+        if self.tracer.enabled:
+            function = self.traced_handler(match.name, function)
+        session = None
+        if self.profiler.active and match.name not in ("profile", "profiling"):
+            session = self.profiler.claim(match.name)
+        if session is None:
+            return self.executor.submit(match.name, function, text)
+        
+        profiled = session.wrap(function)
+        task = self.executor.submit(match.name, profiled, text)
+        if task.function is not profiled or task.state == "rejected":
+            # Joined a command already running, or refused: nothing will run under the profiler
+            session.release()
+        return task
+    
+    def traced_handler(self, name, function):
+        """Wrap a handler in a span that also notes how long it waited for a worker"""
+        def handler(text):
+            task = current_task()
+            queued_ms = round((task.started - task.submitted) * 1000, 3) if task else 0.0
+            with self.tracer.span("handler", command=name, queued_ms=queued_ms):
+                function(text)
+        return handler
+    
+    def listen_streaming(self, require_wake=False):
+        """Stream one utterance through the partial recognizer, dispatching early when the intent is clear
+        
+        Returns (final transcript, False), or (command text, True) if it was already dispatched.
+        """
+        capture = self.capture
+        session = self.streaming_recognizer.start(capture.sample_rate, capture.sample_width)
+        detector = EarlyIntentDetector(self.router, exclude=LATE_COMMANDS, requires=EARLY_ARGUMENTS,
+                                       normalize=self.strip_wake_words)
+        dispatched_at = None
+        started = time.monotonic()
+        for chunk in capture.stream(timeout=5, phrase_time_limit=self.max_phrase_seconds):
+            if dispatched_at:
+                continue  # Let the rest of the utterance go by
+            partial = session.feed(chunk)
+            if not partial or (require_wake and not self.is_wake_word(partial)):
+                continue
+            with self.commands_lock:
+                early = detector.update(partial)
+            if early:
+                match, text = early
+                dispatched_at = time.monotonic()
+                print(f"You said (partial): {partial}")
+                self.dispatch(match, text)
+        
+        if dispatched_at:
+            # Time between dispatch and the end of the speech we would otherwise have waited for
+            saved = max(0.0, capture.buffer.arrival(capture.last_speech) - dispatched_at)
+            self.early_dispatch_savings.append(saved)
+            print(f"Early dispatch saved {saved * 1000:.0f} ms")
+            self.tracer.record("stream", started, dispatched_at, early=True, saved_ms=round(saved * 1000, 3))
+            self.metrics.record_recognition(None, True)
+            return text, True
+        final = session.finish()
+        self.tracer.record("stream", started, time.monotonic(), early=False)
+        # Streaming time is the length of the utterance, so only the outcome is counted
+        self.metrics.record_recognition(None, bool(final))
+        if final:
+            print(f"You said: {final}")
+        return (final.lower() if final else None), False
+    
+    def listen_command(self):
+        """Listen for a command after the wake prompt, returns None if already handled"""
+        if self.streaming_recognizer and self.capture:
+            command, dispatched = self.listen_streaming()
+            return None if dispatched else command
+        return self.listen()
+    
     def get_time(self, text=""):
         """Get current time"""
         current_time = datetime.now().strftime("%I:%M %p")
@@ -161,134 +568,195 @@ class AALEX:
         query = text.replace("search", "").strip()
         if query:
             url = f"https://www.google.com/search?q={query}"
-            webbrowser.open(url)
-            self.speak(f"Searching for {query}")
+            if self.platform.open_url(url):
+                self.speak(f"Searching for {query}")
+            else:
+                self.speak("I can't open a browser on this system")
         else:
             self.speak("What would you like me to search for?")
     
+    def load_app_catalog(self):
+        """Load the application catalog and pick up anything installed since the last run"""
+        try:
+            # The Windows executable names only make sense on Windows
+            catalog = AppCatalog(aliases=APPLICATIONS if sys.platform == 'win32' else None, read_only=self.headless)
+            self.apps = catalog
+            self.apps_ready.set()
+            catalog.refresh()
+            print(f"App catalog: {catalog.count} apps, refreshed in {catalog.refresh_seconds * 1000:.0f} ms")
+        except Exception as e:
+            print(f"Error loading app catalog: {e}")
+        finally:
+            self.apps_ready.set()
+    
     def open_application(self, text):
         """Open applications"""
         app_name = text.replace("open", "").strip()
-        apps = {
-            "notepad": "notepad.exe",
-            "calculator": "calc.exe",
-            "chrome": "chrome.exe",
-            "firefox": "firefox.exe",
-            "edge": "msedge.exe",
-            "word": "winword.exe",
-            "excel": "excel.exe",
-            "powerpoint": "powerpnt.exe",
-            "spotify": "spotify.exe",
-            "discord": "discord.exe",
-            "steam": "steam.exe"
-        }
-        
-        if app_name in apps:
+        if not app_name:
+            self.speak("Which application should I open?")
+            return
+        self.apps_ready.wait(5)
+        matches = self.apps.lookup(app_name) if self.apps else []
+        if not matches and self.apps:
+            # Installed since the catalog was last refreshed
+            self.apps.refresh()
+            matches = self.apps.lookup(app_name)
+        
+        for entry in matches:
             try:
-                subprocess.Popen(apps[app_name])
-                self.speak(f"Opening {app_name}")
+                if self.platform.launch(self.apps, entry):
+                    self.speak(f"Opening {entry.name}")
+                    return
             except Exception as e:
-                self.speak(f"Could not open {app_name}")
+                print(f"Could not open {entry.name}: {e}")
+        if matches:
+            self.speak(f"Could not open {app_name}")
         else:
             self.speak(f"I don't know how to open {app_name}")
     
     def close_application(self, text):
         """Close applications"""
         app_name = text.replace("close", "").strip()
-        self.speak(f"Closing {app_name}")
-        # This is a simplified version - in practice, you'd need to find the specific process
+        if not app_name:
+            self.speak("Which application should I close?")
+            return
+        # Spoken names map to their executables ("calculator" -> calc.exe)
+        closed = self.platform.terminate(self.telemetry.processes, APPLICATIONS.get(app_name, app_name))
+        if closed:
+            self.speak(f"Closed {app_name}")
+            return
+        names = self.telemetry.processes.candidates(APPLICATIONS.get(app_name, app_name))
+        if len(names) > 1:
+            self.speak(f"{app_name} could be {', '.join(names[:3])}. Say the full name.")
+        else:
+            self.speak(f"{app_name} is not running")
     
     def control_volume(self, text):
         """Control system volume"""
         if "up" in text or "increase" in text:
-            for _ in range(5):
-                pyautogui.press('volumeup')
-            self.speak("Volume increased")
+            direction, done = "up", "Volume increased"
         elif "down" in text or "decrease" in text:
-            for _ in range(5):
-                pyautogui.press('volumedown')
-            self.speak("Volume decreased")
+            direction, done = "down", "Volume decreased"
         elif "mute" in text:
-            pyautogui.press('volumemute')
-            self.speak("Volume muted")
+            direction, done = "mute", "Volume muted"
         else:
             self.speak("Volume control: say 'volume up', 'volume down', or 'mute'")
+            return
+        if self.platform.volume(direction):
+            self.speak(done)
+        else:
+            self.speak("I can't change the volume on this system")
     
     def control_brightness(self, text):
         """Control screen brightness"""
         if "up" in text or "increase" in text:
-            self.speak("Brightness increased")
+            direction, done = "up", "Brightness increased"
         elif "down" in text or "decrease" in text:
-            self.speak("Brightness decreased")
+            direction, done = "down", "Brightness decreased"
         else:
             self.speak("Brightness control: say 'brightness up' or 'brightness down'")
+            return
+        if self.platform.brightness(direction):
+            self.speak(done)
+        else:
+            self.speak("I can't change the brightness on this system")
     
     def take_screenshot(self, text=""):
         """Take a screenshot"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"screenshot_{timestamp}.png"
-        screenshot = pyautogui.screenshot()
-        screenshot.save(filename)
-        self.speak("Screenshot taken and saved")
+        if self.platform.screenshot(filename):
+            self.speak("Screenshot taken and saved")
+        else:
+            self.speak("I can't take screenshots on this system")
     
     def shutdown_computer(self, text=""):
         """Shutdown the computer"""
         self.speak("Shutting down the computer in 10 seconds. Say 'cancel' to abort.")
-        time.sleep(10)
-        os.system("shutdown /s /t 0")
+        self.executor.schedule("shutdown", 10, lambda: self.power_action(self.platform.shutdown, "shut down"))
     
     def restart_computer(self, text=""):
         """Restart the computer"""
         self.speak("Restarting the computer in 10 seconds. Say 'cancel' to abort.")
-        time.sleep(10)
-        os.system("shutdown /r /t 0")
+        self.executor.schedule("restart", 10, lambda: self.power_action(self.platform.restart, "restart"))
+    
+    def power_action(self, action, verb):
+        """Run a scheduled shutdown or restart and say so if the system refused"""
+        if not action():
+            self.speak(f"I can't {verb} this system")
     
     def sleep_computer(self, text=""):
         """Put computer to sleep"""
-        self.speak("Putting computer to sleep")
-        os.system("rundll32.exe powrprof.dll,SetSuspendState 0,1,0")
+        self.speak("Putting computer to sleep", wait=True)
+        if not self.platform.sleep():
+            self.speak("I can't put this system to sleep")
+    
+    def cancel_pending(self, text=""):
+        """Abort a pending shutdown or restart and any commands still running"""
+        if self.executor.cancel_delayed():
+            self.speak("Cancelled.", priority=PRIORITY_HIGH)
+        elif self.executor.cancel_all():
+            self.speak("Stopped the running commands.", priority=PRIORITY_HIGH)
+        else:
+            self.speak("There is nothing to cancel.")
+    
+    def profile_commands(self, text=""):
+        """Profile the next few commands, or all commands for a while, with cProfile and tracemalloc"""
+        words = text.split()
+        if "stop" in words or "end" in words:
+            if not self.profiler.stop():
+                self.speak("I'm not profiling anything.")
+            return
+        
+        numbers = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+                   "nine": 9, "ten": 10, "twenty": 20, "thirty": 30, "sixty": 60}
+        amount = next((int(w) if w.isdigit() else numbers[w] for w in words if w.isdigit() or w in numbers), None)
+        if any(w.startswith("minute") for w in words):
+            calls, seconds = None, (amount or 1) * 60
+        elif any(w.startswith("second") for w in words):
+            calls, seconds = None, amount or 30
+        else:
+            calls, seconds = amount or 5, None
+        
+        if not self.profiler.start(calls=calls, seconds=seconds):
+            self.speak("I'm already profiling. Say 'stop profiling' to end it.")
+        elif calls:
+            self.speak(f"Profiling the next {calls} commands.")
+        else:
+            self.speak(f"Profiling every command for {seconds} second{'s' if seconds != 1 else ''}.")
+    
+    def on_profile_written(self, paths):
+        """Say where a finished profile went"""
+        if paths:
+            self.speak(f"Profile saved in the {os.path.basename(self.profiler.directory)} folder.")
     
     def get_system_info(self, text=""):
         """Get system information"""
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        sample = self.telemetry.latest(timeout=2)
+        if sample is None:
+            self.speak("System information is not available yet")
+            return
         
-        info = f"CPU usage: {cpu_percent}%, Memory usage: {memory.percent}%, Disk usage: {disk.percent}%"
+        info = f"CPU usage: {sample.cpu:.0f}%, Memory usage: {sample.memory:.0f}%, Disk usage: {sample.disk:.0f}%"
         self.speak(info)
     
     def get_battery_info(self, text=""):
         """Get battery information"""
-        battery = psutil.sensors_battery()
-        if battery:
-            percent = battery.percent
-            plugged = "plugged in" if battery.power_plugged else "not plugged in"
-            self.speak(f"Battery is at {percent}% and {plugged}")
+        sample = self.telemetry.latest(timeout=2)
+        if sample and sample.battery is not None:
+            plugged = "plugged in" if sample.plugged else "not plugged in"
+            self.speak(f"Battery is at {sample.battery:.0f}% and {plugged}")
         else:
             self.speak("No battery information available")
     
     def tell_joke(self, text=""):
         """Tell a random joke"""
-        jokes = [
-            "Why don't scientists trust atoms? Because they make up everything!",
-            "Why did the scarecrow win an award? He was outstanding in his field!",
-            "Why don't eggs tell jokes? They'd crack each other up!",
-            "What do you call a fake noodle? An impasta!",
-            "Why did the math book look so sad? Because it had too many problems!"
-        ]
-        joke = random.choice(jokes)
+        joke = random.choice(JOKES)
         self.speak(joke)
     
     def tell_quote(self, text=""):
         """Tell an inspirational quote"""
-        quotes = [
-            "The only way to do great work is to love what you do. - Steve Jobs",
-            "Innovation distinguishes between a leader and a follower. - Steve Jobs",
-            "Life is what happens to you while you're busy making other plans. - John Lennon",
-            "The future belongs to those who believe in the beauty of their dreams. - Eleanor Roosevelt",
-            "It is during our darkest moments that we must focus to see the light. - Aristotle"
-        ]
-        quote = random.choice(quotes)
+        quote = random.choice(QUOTES)
         self.speak(quote)
     
     def show_help(self, text=""):
@@ -308,6 +776,8 @@ class AALEX:
         - Shutdown: Shutdown computer
         - Restart: Restart computer
         - Sleep: Put computer to sleep
+        - Cancel: Abort a pending shutdown or restart
+        - Profile: Profile the next commands ("profile the next 3 commands", "stop profiling")
         - Control: Open command control pad
         - Settings: Open command control pad
         """
@@ -315,49 +785,166 @@ class AALEX:
         print(help_text)
     
     def load_custom_commands(self):
-        """Load custom commands from file"""
-        self.custom_commands = {}
+        """Load custom commands from the command log"""
+        self.custom_commands = {}  # name -> function
+        self.custom_triggers = {}  # name -> trigger phrases routed to it
+        self.custom_store = CustomCommandStore()
         try:
-            if os.path.exists("aalex_custom_commands.json"):
-                with open("aalex_custom_commands.json", 'r') as f:
-                    data = json.load(f)
-                    for command_name, command_data in data.items():
-                        self.custom_commands[command_name] = self.create_custom_function(
-                            command_data['action'], command_data['response']
-                        )
+            self.custom_store.load()
         except Exception as e:
             print(f"Error loading custom commands: {e}")
-            self.custom_commands = {}
     
     def save_custom_commands(self):
-        """Save custom commands to file"""
-        try:
-            data = {}
-            for command_name, command_func in self.custom_commands.items():
-                # This is a simplified approach - in practice you'd store the command data
-                data[command_name] = {
-                    'action': 'custom',
-                    'response': f'Executing custom command: {command_name}'
-                }
-            with open("aalex_custom_commands.json", 'w') as f:
-                json.dump(data, f, indent=2)
-        except Exception as e:
-            print(f"Error saving custom commands: {e}")
+        """Compact the custom command log (every edit is already saved as it is made)"""
+        self.custom_store.compact()
+    
+    def save_custom_command(self, name, triggers, action, response, old_name=None):
+        """Add or edit a stored custom command; the router picks it up through the store"""
+        command = CustomCommand(name, triggers, action, response)
+        return self.custom_store.rename(old_name or name, command)
+    
+    def compile_custom_command(self, command):
+        """Point each trigger phrase of a stored command at its handler, returns the triggers used"""
+        function = self.create_custom_function(command.action, command.response)
+        triggers = []
+        for trigger in command.triggers:
+            if trigger in self.builtin_commands:
+                print(f"Custom command '{command.name}': '{trigger}' is a built-in command, skipped")
+                continue
+            self.commands[trigger] = function
+            triggers.append(trigger)
+        self.custom_commands[command.name] = function
+        self.custom_triggers[command.name] = triggers
+        return triggers
+    
+    def route(self, text):
+        """The RouteMatch for text, or None"""
+        with self.commands_lock:
+            return self.router.route(text)
+    
+    def command_names(self):
+        """Snapshot of every command phrase, safe to iterate while commands change"""
+        with self.commands_lock:
+            return list(self.commands)
+    
+    def custom_command_names(self):
+        with self.commands_lock:
+            return list(self.custom_commands)
+    
+    def on_custom_command_changed(self, name, command):
+        """Update the router in place for one added, edited or deleted custom command (store watcher thread)"""
+        with self.commands_lock:
+            old_function = self.custom_commands.pop(name, None)
+            for trigger in self.custom_triggers.pop(name, ()):
+                # Another command may have taken the phrase since
+                if self.commands.get(trigger) is old_function:
+                    self.commands.pop(trigger, None)
+                    self.router.remove(trigger)
+            if command is not None:
+                for trigger in self.compile_custom_command(command):
+                    self.router.add(trigger, self.commands[trigger], self.command_priorities.get(trigger, 0))
+        print(f"Custom command '{name}' {'updated' if command else 'removed'}")
+        
+        pad = self.control_pad
+        if pad is not None:
+            # One refresh per frame however many commands changed
+            pad.ui.post_latest("custom commands", pad.refresh_all_command_lists)
+    
+    def add_custom_command(self, name, function):
+        """Register a custom command for this session only and update the router in place"""
+        with self.commands_lock:
+            self.custom_commands[name] = function
+            self.custom_triggers[name] = [name]
+            self.commands[name] = function
+            self.router.add(name, function, self.command_priorities.get(name, 0))
+    
+    def remove_custom_command(self, name):
+        """Unregister a custom command (deleting it from the store) and update the router in place"""
+        if self.custom_store.delete(name):
+            return
+        self.on_custom_command_changed(name, None)
     
     def create_custom_function(self, action, response):
         """Create a custom function for a command"""
         def custom_func(text=""):
-            self.speak(response)
-            # Here you could add more complex actions based on the action type
+            if action == "open_app":
+                self.open_application(f"open {response}")
+            elif action == "web_search":
+                self.web_search(f"search {response}")
+            elif action in ("system_command", "custom_script"):
+                if sys.platform == 'win32':
+                    # Windows programs parse their own command line, so it is passed on as typed
+                    command = response.strip()
+                    if action == "custom_script" and command:
+                        command = subprocess.list2cmdline([sys.executable]) + " " + command
+                else:
+                    try:
+                        command = shlex.split(response)
+                    except ValueError:
+                        command = []
+                    if action == "custom_script" and command:
+                        command = [sys.executable] + command
+                if command and self.platform.run_command(command):
+                    self.speak("Done.")
+                else:
+                    self.speak(f"Could not run {response}")
+            else:
+                self.speak(response)
         return custom_func
     
     def open_control_pad(self, text=""):
         """Open the command control pad"""
-        if self.control_pad is None or not self.control_pad.winfo_exists():
-            self.control_pad = AALEXControlPad(self)
+        if self.headless:
+            self.speak("The control pad is not available in headless mode")
+            return
+        try:
+            ui = aalex_ui.shared_ui()
+        except Exception as e:
+            print(f"Could not start the UI thread: {e}")
+            self.speak("I can't open windows on this system")
+            return
+        # Tk is only touched from the UI thread
+        ui.post(self.show_control_pad, ui)
+        self.speak("Opening command control pad")
+    
+    def show_control_pad(self, ui):
+        """Create or raise the control pad (runs on the UI thread)"""
+        if self.control_pad is None or not self.control_pad.exists():
+            self.control_pad = AALEXControlPad(self, master=ui.root, ui=ui)
         else:
             self.control_pad.lift()
-        self.speak("Opening command control pad")
+    
+    def interact(self):
+        """One pass of the main loop: wait for the wake word, then handle a command"""
+        # Listen for wake word
+        if self.wake_spotter:
+            woke, remainder = self.listen_for_local_wake()
+            text = self.recognize(remainder) if remainder else None
+        elif self.streaming_recognizer and self.capture:
+            text, dispatched = self.listen_streaming(require_wake=True)
+            if dispatched:
+                return
+            woke = self.is_wake_word(text)
+        else:
+            text = self.listen()
+            woke = self.is_wake_word(text)
+        
+        # During a shutdown or restart countdown "cancel" works without the wake word
+        if text and "cancel" in tokenize(text) and self.executor.pending_delayed():
+            self.cancel_pending(text)
+            return
+        
+        # "Alex, what time is it" carries the command in the same utterance
+        if woke and text and self.route(self.strip_wake_words(text)):
+            self.process_command(text)
+        elif woke:
+            # Wait so the prompt is not captured as the command
+            self.speak("Yes, how can I help you?", wait=True, priority=PRIORITY_HIGH)
+            
+            # Listen for command
+            command = self.listen_command()
+            if command:
+                self.process_command(command)
     
     def run(self):
         """Main loop for the AI assistant"""
@@ -365,31 +952,37 @@ class AALEX:
         
         while True:
             try:
-                # Listen for wake word
-                text = self.listen()
-                
-                if text and self.is_wake_word(text):
-                    self.speak("Yes, how can I help you?")
-                    
-                    # Listen for command
-                    command = self.listen()
-                    if command:
-                        self.process_command(command)
+                # Everything traced during one pass shares a correlation id
+                with self.tracer.interaction():
+                    self.interact()
                 
                 time.sleep(0.1)  # Small delay to prevent high CPU usage
                 
             except KeyboardInterrupt:
-                self.speak("Goodbye! AALEX is shutting down.")
+                self.executor.shutdown()
+                self.speak("Goodbye! AALEX is shutting down.", wait=True)
+                self.tracer.close()
                 break
             except Exception as e:
                 print(f"Error: {e}")
                 time.sleep(1)
 
 class AALEXControlPad:
-    def __init__(self, aalex_instance):
-        """Initialize the control pad"""
+    # Dry-run assistant for "Test All Commands", shared by every control pad window
+    sandbox = None
+    
+    def __init__(self, aalex_instance, master=None, ui=None):
+        """Initialize the control pad
+        
+        With master (the hidden root of aalex_ui.shared_ui()) it is a Toplevel on
+        that root's thread; other threads reach it through ui. Without, it owns
+        its own Tk root and run() runs the mainloop.
+        """
         self.aalex = aalex_instance
-        self.root = tk.Tk()
+        self.test_running = False
+        self.owns_root = master is None
+        self.root = tk.Tk() if master is None else tk.Toplevel(master)
+        self.ui = ui or aalex_ui.UIDispatcher(self.root)
         self.root.title("AALEX Command Control Pad")
         self.root.geometry("800x600")
         self.root.configure(bg='#0a0a0a')
@@ -414,6 +1007,19 @@ class AALEXControlPad:
         y = (self.root.winfo_screenheight() // 2) - (height // 2)
         self.root.geometry(f'{width}x{height}+{x}+{y}')
     
+    def exists(self):
+        """Whether the window is still open (UI thread)"""
+        try:
+            return bool(self.root.winfo_exists())
+        except tk.TclError:
+            return False
+    
+    def lift(self):
+        """Bring the window to the front (UI thread)"""
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+    
     def create_interface(self):
         """Create the control pad interface"""
         # Main frame
@@ -440,6 +1046,7 @@ class AALEXControlPad:
         self.create_custom_tab()
         self.create_settings_tab()
         self.create_test_tab()
+        self.create_performance_tab()
     
     def create_commands_tab(self):
         """Create commands management tab"""
@@ -531,7 +1138,7 @@ class AALEXControlPad:
         trigger_frame = tk.Frame(form_frame, bg='#2a2a2a')
         trigger_frame.pack(fill='x', padx=10, pady=5)
         
-        tk.Label(trigger_frame, text="Trigger Words:", fg='#ffffff', bg='#2a2a2a').pack(side='left')
+        tk.Label(trigger_frame, text="Trigger Phrases (comma separated):", fg='#ffffff', bg='#2a2a2a').pack(side='left')
         self.new_command_trigger = tk.Entry(trigger_frame, bg='#1a1a1a', fg='#ffffff', 
                                            insertbackground='#ffffff')
         self.new_command_trigger.pack(side='right', fill='x', expand=True, padx=(10, 0))
@@ -540,7 +1147,8 @@ class AALEXControlPad:
         response_frame = tk.Frame(form_frame, bg='#2a2a2a')
         response_frame.pack(fill='x', padx=10, pady=5)
         
-        tk.Label(response_frame, text="Response:", fg='#ffffff', bg='#2a2a2a').pack(anchor='w')
+        tk.Label(response_frame, text="Response (or the app, search, command line or script to run):",
+                fg='#ffffff', bg='#2a2a2a').pack(anchor='w')
         self.new_command_response = tk.Text(response_frame, bg='#1a1a1a', fg='#ffffff', 
                                            insertbackground='#ffffff', height=3)
         self.new_command_response.pack(fill='x', pady=(5, 0))
@@ -556,9 +1164,11 @@ class AALEXControlPad:
         self.new_command_action.pack(side='right', fill='x', expand=True, padx=(10, 0))
         self.new_command_action.set('speak')
         
-        # Add command button
-        tk.Button(form_frame, text="Add Custom Command", bg='#00ff00', fg='#000000',
-                 command=self.add_custom_command).pack(pady=10)
+        # Add command button (saves in place while editing)
+        self.editing_command = None
+        self.add_command_button = tk.Button(form_frame, text="Add Custom Command", bg='#00ff00', fg='#000000',
+                                            command=self.add_custom_command)
+        self.add_command_button.pack(pady=10)
         
         # Custom commands list
         custom_list_frame = tk.Frame(custom_interface_frame, bg='#1a1a1a')
@@ -623,6 +1233,43 @@ class AALEXControlPad:
         self.volume.set(0.9)
         self.volume.pack(side='right', fill='x', expand=True, padx=(10, 0))
         
+        # Listening (endpointing) settings
+        listening_frame = tk.Frame(settings_interface_frame, bg='#2a2a2a', relief='raised', bd=2)
+        listening_frame.pack(fill='x', pady=(0, 10))
+        
+        tk.Label(listening_frame, text="Listening", font=('Arial', 12, 'bold'), 
+                fg='#00ff00', bg='#2a2a2a').pack(pady=10)
+        
+        # End of speech delay
+        hangover_frame = tk.Frame(listening_frame, bg='#2a2a2a')
+        hangover_frame.pack(fill='x', padx=10, pady=5)
+        
+        tk.Label(hangover_frame, text="End of Speech (ms):", fg='#ffffff', bg='#2a2a2a').pack(side='left')
+        self.vad_hangover = tk.Scale(hangover_frame, from_=100, to=1500, resolution=50,
+                                    orient='horizontal', bg='#2a2a2a', fg='#ffffff')
+        self.vad_hangover.set(self.aalex.vad.hangover_ms)
+        self.vad_hangover.pack(side='right', fill='x', expand=True, padx=(10, 0))
+        
+        # Sensitivity (speech must be this many times louder than the room)
+        sensitivity_frame = tk.Frame(listening_frame, bg='#2a2a2a')
+        sensitivity_frame.pack(fill='x', padx=10, pady=5)
+        
+        tk.Label(sensitivity_frame, text="Speech/Noise Ratio:", fg='#ffffff', bg='#2a2a2a').pack(side='left')
+        self.vad_ratio = tk.Scale(sensitivity_frame, from_=1.2, to=5.0, resolution=0.1,
+                                 orient='horizontal', bg='#2a2a2a', fg='#ffffff')
+        self.vad_ratio.set(self.aalex.vad.energy_ratio)
+        self.vad_ratio.pack(side='right', fill='x', expand=True, padx=(10, 0))
+        
+        # Longest command
+        phrase_frame = tk.Frame(listening_frame, bg='#2a2a2a')
+        phrase_frame.pack(fill='x', padx=10, pady=5)
+        
+        tk.Label(phrase_frame, text="Max Command (s):", fg='#ffffff', bg='#2a2a2a').pack(side='left')
+        self.max_phrase = tk.Scale(phrase_frame, from_=3, to=30, orient='horizontal',
+                                  bg='#2a2a2a', fg='#ffffff')
+        self.max_phrase.set(self.aalex.max_phrase_seconds)
+        self.max_phrase.pack(side='right', fill='x', expand=True, padx=(10, 0))
+        
         # Wake words settings
         wake_frame = tk.Frame(settings_interface_frame, bg='#2a2a2a', relief='raised', bd=2)
         wake_frame.pack(fill='x', pady=(0, 10))
@@ -640,6 +1287,37 @@ class AALEXControlPad:
         self.wake_words_entry.pack(fill='x', pady=(5, 0))
         self.wake_words_entry.insert(0, ', '.join(self.aalex.wake_words))
         
+        # Profiling
+        profiling_frame = tk.Frame(settings_interface_frame, bg='#2a2a2a', relief='raised', bd=2)
+        profiling_frame.pack(fill='x', pady=(0, 10))
+        
+        tk.Label(profiling_frame, text="Profiling", font=('Arial', 12, 'bold'), 
+                fg='#00ff00', bg='#2a2a2a').pack(pady=10)
+        
+        profile_options_frame = tk.Frame(profiling_frame, bg='#2a2a2a')
+        profile_options_frame.pack(fill='x', padx=10, pady=5)
+        
+        tk.Label(profile_options_frame, text="Commands:", fg='#ffffff', bg='#2a2a2a').pack(side='left')
+        self.profile_calls = tk.Spinbox(profile_options_frame, from_=1, to=100, width=5,
+                                       bg='#1a1a1a', fg='#ffffff')
+        self.profile_calls.delete(0, tk.END)
+        self.profile_calls.insert(0, "5")
+        self.profile_calls.pack(side='left', padx=(5, 15))
+        
+        tk.Label(profile_options_frame, text="or Seconds (0 = by count):", fg='#ffffff', bg='#2a2a2a').pack(side='left')
+        self.profile_seconds = tk.Spinbox(profile_options_frame, from_=0, to=3600, width=6,
+                                         bg='#1a1a1a', fg='#ffffff')
+        self.profile_seconds.pack(side='left', padx=(5, 15))
+        
+        tk.Button(profile_options_frame, text="Start", bg='#0066ff', fg='#ffffff',
+                 command=self.start_profiling).pack(side='left', padx=(0, 5))
+        tk.Button(profile_options_frame, text="Stop", bg='#ff4444', fg='#ffffff',
+                 command=self.stop_profiling).pack(side='left')
+        
+        self.profile_status = tk.StringVar(value=f"Reports go to {self.aalex.profiler.directory}/")
+        tk.Label(profiling_frame, textvariable=self.profile_status, fg='#ffffff', bg='#2a2a2a',
+                anchor='w').pack(fill='x', padx=10, pady=(0, 10))
+        
         # Apply settings button
         tk.Button(settings_interface_frame, text="Apply Settings", bg='#00ff00', fg='#000000',
                  command=self.apply_settings).pack(pady=10)
@@ -690,10 +1368,76 @@ class AALEXControlPad:
         tk.Button(test_actions_frame, text="Test All Commands", bg='#0066ff', fg='#ffffff',
                  command=self.test_all_commands).pack(side='left')
     
+    def create_performance_tab(self):
+        """Create the live performance tab (widgets are built once and updated in place)"""
+        self.performance_frame = ttk.Frame(self.notebook)
+        self.notebook.add(self.performance_frame, text="📈 Performance")
+        
+        performance_interface_frame = tk.Frame(self.performance_frame, bg='#1a1a1a')
+        performance_interface_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        
+        tk.Label(performance_interface_frame, text="Live Performance", 
+                font=('Arial', 14, 'bold'), fg='#00ff00', bg='#1a1a1a').pack(pady=(0, 10))
+        
+        # Pipeline summary
+        self.performance_summary = {}
+        summary_frame = tk.Frame(performance_interface_frame, bg='#2a2a2a', relief='raised', bd=2)
+        summary_frame.pack(fill='x', pady=(0, 10))
+        for key, title in (("recognition", "Recognition:"), ("speech", "Speech:"), ("uptime", "Uptime:")):
+            row = tk.Frame(summary_frame, bg='#2a2a2a')
+            row.pack(fill='x', padx=10, pady=2)
+            tk.Label(row, text=title, width=12, anchor='w', fg='#ffffff', bg='#2a2a2a').pack(side='left')
+            self.performance_summary[key] = tk.StringVar(value="-")
+            tk.Label(row, textvariable=self.performance_summary[key], anchor='w', fg='#00ff00',
+                    bg='#2a2a2a', font=('Consolas', 9)).pack(side='left', fill='x')
+        
+        # Per-command latency
+        columns = ("count", "failed", "p50", "p95", "p99")
+        self.performance_table = ttk.Treeview(performance_interface_frame, columns=columns, height=12)
+        self.performance_table.heading('#0', text="Command")
+        self.performance_table.column('#0', width=140)
+        for column, title in zip(columns, ("Calls", "Failed", "p50 ms", "p95 ms", "p99 ms")):
+            self.performance_table.heading(column, text=title)
+            self.performance_table.column(column, width=80, anchor='e')
+        self.performance_table.pack(fill='both', expand=True)
+        
+        self.refresh_performance()
+    
+    def refresh_performance(self):
+        """Update the performance tab from the metrics, then check again in a second"""
+        try:
+            # Nothing to draw while another tab is showing
+            if self.notebook.select() == str(self.performance_frame):
+                snapshot = self.aalex.metrics.snapshot()
+                recognition = snapshot["recognition"]
+                speech = snapshot["speech"]
+                self.performance_summary["recognition"].set(
+                    f"{recognition['heard']}/{recognition['attempts']} understood "
+                    f"({recognition['rate'] * 100:.0f}%), p50 {recognition['p50'] * 1000:.0f} ms, "
+                    f"p95 {recognition['p95'] * 1000:.0f} ms")
+                self.performance_summary["speech"].set(
+                    f"{speech['count']} replies, p50 {speech['p50'] * 1000:.0f} ms, "
+                    f"p95 {speech['p95'] * 1000:.0f} ms, queued p95 {speech['wait_p95'] * 1000:.0f} ms")
+                minutes, seconds = divmod(int(snapshot["uptime"]), 60)
+                self.performance_summary["uptime"].set(f"{minutes // 60}h {minutes % 60:02d}m {seconds:02d}s")
+                
+                for row in snapshot["commands"]:
+                    failed = row["failed"] + row["timed_out"]
+                    values = (row["count"], failed, f"{row['p50'] * 1000:.1f}", f"{row['p95'] * 1000:.1f}",
+                              f"{row['p99'] * 1000:.1f}")
+                    if self.performance_table.exists(row["command"]):
+                        self.performance_table.item(row["command"], values=values)
+                    else:
+                        self.performance_table.insert('', tk.END, iid=row["command"], text=row["command"],
+                                                      values=values)
+            self.root.after(1000, self.refresh_performance)
+        except tk.TclError:
+            pass  # Window closed
+    
     def refresh_command_list(self):
         """Refresh the commands list"""
         self.commands_listbox.delete(0, tk.END)
-        for command_name in self.aalex.commands.keys():
+        for command_name in self.aalex.command_names():
             self.commands_listbox.insert(tk.END, command_name)
     
     def on_command_select(self, event):
@@ -743,19 +1487,42 @@ class AALEXControlPad:
             self.test_command_entry.delete(0, tk.END)
     
     def test_all_commands(self):
-        """Test all available commands"""
-        self.test_results.insert(tk.END, "Testing all commands...\n")
-        for command_name in self.aalex.commands.keys():
-            try:
-                command_func = self.aalex.commands.get(command_name)
-                if command_func:
-                    command_func("test")
-                    self.test_results.insert(tk.END, f"✓ {command_name}\n")
-                else:
-                    self.test_results.insert(tk.END, f"✗ {command_name} (not found)\n")
-            except Exception as e:
-                self.test_results.insert(tk.END, f"✗ {command_name} (error: {str(e)})\n")
+        """Dry-run every command on a sandbox assistant, in the background"""
+        if self.test_running:
+            return
+        self.test_running = True
+        self.test_results.insert(tk.END, "Testing all commands (dry run, nothing is really opened or shut down)...\n")
         self.test_results.see(tk.END)
+        threading.Thread(target=self.run_command_tests, daemon=True).start()
+    
+    def run_command_tests(self):
+        """Worker thread: run the tests, posting a line to the Test tab as each one finishes"""
+        import aalex_headless
+        try:
+            if AALEXControlPad.sandbox is None:
+                # A second assistant with a do-nothing platform backend and silent speech
+                sandbox = aalex_headless.create_assistant("null", quiet=False)
+                sandbox.name = "AALEX (dry run)"
+                AALEXControlPad.sandbox = sandbox
+            started = time.perf_counter()
+            results = aalex_headless.run_command_tests(
+                AALEXControlPad.sandbox, timeout=10,
+                on_result=lambda result: self.ui.post(self.show_test_line, aalex_headless.test_line(result)))
+            passed = sum(1 for r in results if r.state == "done" and not r.mismatch)
+            self.ui.post(self.show_test_line,
+                         f"{passed}/{len(results)} commands passed in {time.perf_counter() - started:.2f} s")
+        except Exception as e:
+            self.ui.post(self.show_test_line, f"✗ Test run failed: {str(e)}")
+        finally:
+            self.test_running = False
+    
+    def show_test_line(self, line):
+        """Append one line to the test results (UI thread)"""
+        try:
+            self.test_results.insert(tk.END, line + "\n")
+            self.test_results.see(tk.END)
+        except tk.TclError:
+            pass  # Window closed
     
     def clear_test_results(self):
         """Clear test results"""
@@ -769,26 +1536,39 @@ class AALEXControlPad:
         action = self.new_command_action.get()
         
         if name and trigger and response:
-            # Add to custom commands
-            self.aalex.custom_commands[name] = self.aalex.create_custom_function(action, response)
+            # Saved to the command log; the assistant's router updates from it
+            editing = self.editing_command
+            try:
+                self.aalex.save_custom_command(name, trigger.split(','), action, response, old_name=editing)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not save the command: {str(e)}")
+                return
             
             # Clear form
             self.new_command_name.delete(0, tk.END)
             self.new_command_trigger.delete(0, tk.END)
             self.new_command_response.delete("1.0", tk.END)
+            self.editing_command = None
+            self.add_command_button.config(text="Add Custom Command")
             
             # Refresh lists
             self.refresh_command_list()
             self.refresh_custom_commands_list()
             
-            messagebox.showinfo("Success", f"Custom command '{name}' added successfully!")
+            messagebox.showinfo("Success", f"Custom command '{name}' {'updated' if editing else 'added'} successfully!")
         else:
             messagebox.showerror("Error", "Please fill in all fields!")
     
+    def refresh_all_command_lists(self):
+        """Refresh both command lists after the custom commands changed (UI thread)"""
+        if self.exists():
+            self.refresh_command_list()
+            self.refresh_custom_commands_list()
+    
     def refresh_custom_commands_list(self):
         """Refresh custom commands list"""
         self.custom_commands_listbox.delete(0, tk.END)
-        for command_name in self.aalex.custom_commands.keys():
+        for command_name in self.aalex.custom_command_names():
             self.custom_commands_listbox.insert(tk.END, command_name)
     
     def test_custom_command(self):
@@ -809,7 +1589,21 @@ class AALEXControlPad:
         selection = self.custom_commands_listbox.curselection()
         if selection:
             command_name = self.custom_commands_listbox.get(selection[0])
-            messagebox.showinfo("Edit", f"Edit functionality for '{command_name}' - Coming soon!")
+            command = self.aalex.custom_store.get(command_name)
+            if command is None:
+                messagebox.showinfo("Edit", f"'{command_name}' was added for this session only and cannot be edited.")
+                return
+            
+            # Load it into the form; saving replaces it in place
+            self.new_command_name.delete(0, tk.END)
+            self.new_command_name.insert(0, command.name)
+            self.new_command_trigger.delete(0, tk.END)
+            self.new_command_trigger.insert(0, ', '.join(command.triggers))
+            self.new_command_response.delete("1.0", tk.END)
+            self.new_command_response.insert("1.0", command.response)
+            self.new_command_action.set(command.action)
+            self.editing_command = command.name
+            self.add_command_button.config(text="Save Changes")
     
     def delete_custom_command(self):
         """Delete selected custom command"""
@@ -817,20 +1611,54 @@ class AALEXControlPad:
         if selection:
             command_name = self.custom_commands_listbox.get(selection[0])
             if messagebox.askyesno("Confirm", f"Delete custom command '{command_name}'?"):
-                del self.aalex.custom_commands[command_name]
+                self.aalex.remove_custom_command(command_name)
                 self.refresh_command_list()
                 self.refresh_custom_commands_list()
     
     def save_custom_commands(self):
         """Save custom commands"""
         self.aalex.save_custom_commands()
-        messagebox.showinfo("Success", "Custom commands saved!")
+        messagebox.showinfo("Success", f"Custom commands saved ({len(self.aalex.custom_store)} in {self.aalex.custom_store.path})!")
+    
+    def start_profiling(self):
+        """Start a profiling session from the Settings tab"""
+        try:
+            calls = int(self.profile_calls.get())
+            seconds = float(self.profile_seconds.get())
+        except ValueError:
+            messagebox.showerror("Error", "Commands and seconds must be numbers!")
+            return
+        if seconds > 0:
+            started = self.aalex.profiler.start(seconds=seconds)
+            description = f"every command for {seconds:g} s"
+        else:
+            started = self.aalex.profiler.start(calls=max(1, calls))
+            description = f"the next {max(1, calls)} commands"
+        if started:
+            self.profile_status.set(f"Profiling {description}...")
+        else:
+            self.profile_status.set("A profiling session is already running")
+    
+    def stop_profiling(self):
+        """End the profiling session and show where the report went"""
+        paths = self.aalex.profiler.stop()
+        if paths:
+            self.profile_status.set(f"Report: {paths[-1]}")
+        elif self.aalex.profiler.last_report:
+            self.profile_status.set(f"Last report: {self.aalex.profiler.last_report}")
+        else:
+            self.profile_status.set("No profiling session is running")
     
     def apply_settings(self):
         """Apply settings"""
         # Update speech rate and volume
-        self.aalex.engine.setProperty('rate', self.speech_rate.get())
-        self.aalex.engine.setProperty('volume', self.volume.get())
+        self.aalex.speech.set_property('rate', self.speech_rate.get())
+        self.aalex.speech.set_property('volume', self.volume.get())
+        
+        # Update endpointing
+        self.aalex.configure_vad(hangover_ms=self.vad_hangover.get(),
+                                 energy_ratio=self.vad_ratio.get(),
+                                 max_phrase_seconds=self.max_phrase.get())
         
         # Update wake words
         wake_words_text = self.wake_words_entry.get().strip()
@@ -843,8 +1671,8 @@ class AALEXControlPad:
         """Export commands to file"""
         try:
             commands_data = {
-                'built_in_commands': list(self.aalex.commands.keys()),
-                'custom_commands': list(self.aalex.custom_commands.keys()),
+                'built_in_commands': self.aalex.command_names(),
+                'custom_commands': self.aalex.custom_command_names(),
                 'wake_words': self.aalex.wake_words
             }
             
@@ -857,16 +1685,23 @@ class AALEXControlPad:
             messagebox.showerror("Error", f"Export failed: {str(e)}")
     
     def run(self):
-        """Run the control pad"""
-        self.root.mainloop()
+        """Run the control pad (only needed when it owns its Tk root)"""
+        if self.owns_root:
+            self.root.mainloop()
 
 def main():
     """Main function to run AALEX"""
     print("Starting AALEX - AI Assistant Like Jarvis")
     print("=" * 50)
     
+    if "--startup-report" in sys.argv:
+        import aalex_platform
+        aalex_platform.import_time_report("aalex")
+        return
+    
     try:
-        aalex = AALEX()
+        aalex = AALEX(streaming="--stream" in sys.argv, trace="--trace" in sys.argv,
+                      wake_samples="wake_samples" if "--local-wake" in sys.argv else None)
         aalex.run()
     except Exception as e:
         print(f"Failed to start AALEX: {e}")
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+AALEX Apps - Installed application catalog for "open <app>"
+Scans PATH executables, .desktop entries and Start Menu shortcuts into an on-disk
+cache refreshed per directory by mtime, and resolves spoken names with a fuzzy
+prefix trie
+"""
+
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+
+CACHE_VERSION = 1
+SOURCE_RANK = {"alias": 0, "desktop": 1, "shortcut": 1, "bundle": 1, "path": 2}
+BEST_PER_NODE = 3
+_FIELD_CODE = re.compile(r"%[a-zA-Z]")
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+
+
+def normalize(text):
+    """Lowercase words with punctuation removed"""
+    return _NON_ALNUM.sub(" ", text.lower()).split()
+
+
+def name_keys(name):
+    """Trie keys for an app name, so partial and abbreviated names find it
+
+    "Visual Studio Code" gives visualstudiocode, studiocode, code and the
+    initialisms vstudiocode, vscode, vsc.
+    """
+    words = normalize(name)
+    keys = set()
+    for i in range(len(words)):
+        keys.add("".join(words[i:]))
+    for k in range(1, len(words)):
+        keys.add("".join(w[0] for w in words[:k]) + "".join(words[k:]))
+    if len(words) > 1:
+        keys.add("".join(w[0] for w in words))
+    keys.discard("")
+    return keys
+
+
+class AppEntry:
+    __slots__ = ("name", "command", "source")
+
+    def __init__(self, name, command, source):
+        """An installed application and how to start it"""
+        self.name = name
+        self.command = command  # Argument list, or a single path for shortcuts and bundles
+        self.source = source
+
+    def rank(self, key):
+        return (len(key), SOURCE_RANK.get(self.source, 3), self.name)
+
+    def to_json(self):
+        return [self.name, self.command, self.source]
+
+    def __repr__(self):
+        return f"AppEntry({self.name!r}, {self.source})"
+
+
+def parse_desktop_file(path):
+    """AppEntry for a .desktop file, or None if it is hidden or not an application"""
+    fields = {}
+    in_entry = False
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    if in_entry:
+                        break
+                    in_entry = line == '[Desktop Entry]'
+                elif in_entry and '=' in line:
+                    key, value = line.split('=', 1)
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError:
+        return None
+    if (fields.get('Type', 'Application') != 'Application' or 'Exec' not in fields
+            or fields.get('NoDisplay') == 'true' or fields.get('Hidden') == 'true'):
+        return None
+    try:
+        command = shlex.split(_FIELD_CODE.sub("", fields['Exec']))
+    except ValueError:
+        return None
+    if not command:
+        return None
+    return AppEntry(fields.get('Name', os.path.basename(path)[:-8]), command, "desktop")
+
+
+def default_sources():
+    """(directory, kind, recursive) triples to scan on this platform"""
+    sources = []
+    for directory in os.environ.get('PATH', '').split(os.pathsep):
+        if directory:
+            sources.append((directory, "path", False))
+    if sys.platform == 'win32':
+        for base in (os.environ.get('APPDATA'), os.environ.get('PROGRAMDATA')):
+            if base:
+                sources.append((os.path.join(base, 'Microsoft', 'Windows', 'Start Menu', 'Programs'),
+                                "shortcut", True))
+    elif sys.platform == 'darwin':
+        sources.append(("/Applications", "bundle", False))
+        sources.append((os.path.expanduser("~/Applications"), "bundle", False))
+    else:
+        data_home = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+        data_dirs = os.environ.get('XDG_DATA_DIRS') or '/usr/local/share:/usr/share'
+        for base in [data_home] + data_dirs.split(':'):
+            sources.append((os.path.join(base, 'applications'), "desktop", True))
+        sources.append(('/var/lib/flatpak/exports/share/applications', "desktop", True))
+    # The same folder can appear twice in PATH
+    seen = set()
+    return [s for s in sources if not (s[0] in seen or seen.add(s[0]))]
+
+
+def scan_directory(directory, kind):
+    """(entries, subdirectories) for one directory, without descending"""
+    entries = []
+    subdirs = []
+    executable_suffixes = tuple(os.environ.get('PATHEXT', '.EXE;.BAT;.CMD').lower().split(';'))
+    try:
+        with os.scandir(directory) as items:
+            for item in items:
+                try:
+                    is_dir = item.is_dir()
+                except OSError:
+                    continue
+                name = item.name
+                if kind == "bundle":
+                    if name.endswith('.app'):
+                        entries.append(AppEntry(name[:-4], item.path, kind))
+                elif is_dir:
+                    subdirs.append(item.path)
+                elif kind == "path":
+                    if sys.platform == 'win32':
+                        stem, suffix = os.path.splitext(name)
+                        if suffix.lower() in executable_suffixes:
+                            entries.append(AppEntry(stem, [item.path], kind))
+                    elif os.access(item.path, os.X_OK):
+                        entries.append(AppEntry(name, [item.path], kind))
+                elif kind == "desktop" and name.endswith('.desktop'):
+                    entry = parse_desktop_file(item.path)
+                    if entry:
+                        entries.append(entry)
+                elif kind == "shortcut" and name.lower().endswith(('.lnk', '.url')):
+                    entries.append(AppEntry(os.path.splitext(name)[0], item.path, kind))
+    except OSError:
+        pass
+    return entries, subdirs
+
+
+class _Node:
+    __slots__ = ("children", "best")
+
+    def __init__(self):
+        self.children = {}
+        self.best = []  # Up to BEST_PER_NODE (rank, key, entry) below this node, best first
+
+
+class AppCatalog:
+    def __init__(self, cache_path="aalex_app_cache.json", sources=None, aliases=None, read_only=False):
+        """Catalog of launchable applications
+
+        aliases maps spoken names to executables ("calculator" -> "calc.exe")
+        and always outranks scanned entries. With read_only the cache is used
+        but never written (headless runs and tests).
+        """
+        self.cache_path = cache_path
+        self.read_only = read_only
+        self.sources = sources if sources is not None else default_sources()
+        self.aliases = dict(aliases or {})
+        self.directories = {}  # path -> {"mtime", "kind", "apps", "subdirs"}
+        self.root = _Node()
+        self.count = 0
+        self.scanned = 0  # Directories re-read on the last refresh
+        self.refresh_seconds = 0.0
+        self.load()
+
+    def load(self):
+        """Read the cache from disk and build the index from it"""
+        try:
+            with open(self.cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.directories = data.get("directories", {})
+        except (OSError, ValueError):
+            self.directories = {}
+        self._build()
+
+    def save(self):
+        if self.read_only:
+            return
+        temp = self.cache_path + ".tmp"
+        try:
+            with open(temp, 'w') as f:
+                json.dump({"version": CACHE_VERSION, "directories": self.directories}, f)
+            os.replace(temp, self.cache_path)
+        except OSError as e:
+            print(f"Error saving app catalog: {e}")
+
+    def refresh(self):
+        """Re-read only directories whose mtime changed; returns True if anything did"""
+        started = time.perf_counter()
+        directories = {}
+        scanned = 0
+        pending = [(path, kind, recursive) for path, kind, recursive in self.sources]
+        while pending:
+            path, kind, recursive = pending.pop()
+            if path in directories:
+                continue
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            cached = self.directories.get(path)
+            if cached and cached["mtime"] == mtime and cached["kind"] == kind:
+                record = cached
+            else:
+                entries, subdirs = scan_directory(path, kind)
+                record = {"mtime": mtime, "kind": kind,
+                          "apps": [entry.to_json() for entry in entries], "subdirs": subdirs}
+                scanned += 1
+            directories[path] = record
+            if recursive:
+                pending.extend((subdir, kind, True) for subdir in record["subdirs"])
+
+        changed = scanned > 0 or set(directories) != set(self.directories)
+        self.directories = directories
+        self.scanned = scanned
+        if changed:
+            self._build()
+            self.save()
+        self.refresh_seconds = time.perf_counter() - started
+        return changed
+
+    def _build(self):
+        root = _Node()
+        count = 0
+        entries = [AppEntry(name, [executable], "alias") for name, executable in self.aliases.items()]
+        for record in self.directories.values():
+            entries.extend(AppEntry(*app) for app in record["apps"])
+        for entry in entries:
+            keys = name_keys(entry.name)
+            if entry.source in ("path", "desktop") and isinstance(entry.command, list):
+                # "code" for Visual Studio Code, "gnome-calculator" for Calculator
+                keys |= name_keys(os.path.splitext(os.path.basename(entry.command[0]))[0])
+            for key in keys:
+                self._insert(root, key, entry)
+            count += 1
+        self.root = root
+        self.count = count
+
+    def _insert(self, root, key, entry):
+        candidate = (entry.rank(key), key, entry)
+        node = root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            best = node.best
+            if len(best) < BEST_PER_NODE or candidate[0] < best[-1][0]:
+                # Skip duplicates of the same app under another key
+                for i, (_, _, other) in enumerate(best):
+                    if other.name == entry.name and other.source == entry.source:
+                        if candidate[0] < best[i][0]:
+                            best[i] = candidate
+                            best.sort(key=lambda item: item[0])
+                        break
+                else:
+                    best.append(candidate)
+                    best.sort(key=lambda item: item[0])
+                    del best[BEST_PER_NODE:]
+
+    def _walk(self, key):
+        node = self.root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def _fuzzy(self, key, max_distance=1):
+        """Nodes whose path is within max_distance edits of key
+
+        Edit distance counts a swap of adjacent letters as one edit ("pyhton").
+        The first letter must match, which keeps the search to one subtree.
+        """
+        start = self.root.children.get(key[0])
+        if start is None:
+            return []
+        found = []
+
+        def visit(node, path, previous, before):
+            char = path[-1]
+            row = [len(path) - 1]
+            for i in range(1, len(key)):
+                cost = key[i] != char
+                value = min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + cost)
+                if before and i > 1 and key[i] == path[-2] and key[i - 1] == char:
+                    value = min(value, before[i - 2] + 1)
+                row.append(value)
+            if row[-1] <= max_distance and node.best:
+                found.append((row[-1], node.best[0][0], node))
+            if min(row) <= max_distance:
+                for next_char, child in node.children.items():
+                    visit(child, path + next_char, row, previous)
+
+        # Row for the first letter, already matched
+        first_row = list(range(len(key)))
+        for char, child in start.children.items():
+            visit(child, key[0] + char, first_row, None)
+        found.sort(key=lambda item: item[:2])
+        return [node for _, _, node in found]
+
+    def lookup(self, spoken, limit=BEST_PER_NODE):
+        """Best matching apps for a spoken name, best first"""
+        key = "".join(normalize(spoken))
+        if not key:
+            return []
+        node = self._walk(key)
+        if node is not None:
+            # An exact key beats longer keys that merely start with it
+            return [entry for _, _, entry in node.best][:limit]
+        if len(key) < 5:
+            return []
+        results = []
+        for node in self._fuzzy(key):
+            for _, _, entry in node.best:
+                if entry not in results:
+                    results.append(entry)
+        return results[:limit]
+
+    def launch(self, entry):
+        """Start an application"""
+        if entry.source == "shortcut":
+            os.startfile(entry.command)
+        elif entry.source == "bundle":
+            subprocess.Popen(["open", "-a", entry.command])
+        else:
+            subprocess.Popen(entry.command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def main():
+    """Build or refresh the catalog and time some lookups"""
+    print("AALEX Apps - catalog check")
+    print("=" * 50)
+    catalog = AppCatalog()
+    print(f"loaded {catalog.count} apps from cache")
+    catalog.refresh()
+    print(f"refresh: {catalog.scanned} directories re-read in {catalog.refresh_seconds * 1000:.1f} ms, "
+          f"{catalog.count} apps")
+    catalog.refresh()
+    print(f"second refresh: {catalog.scanned} directories re-read in {catalog.refresh_seconds * 1000:.1f} ms")
+
+    queries = sys.argv[1:] or ["vs code", "calc", "firefox", "terminal", "pyhton"]
+    for query in queries:
+        started = time.perf_counter()
+        for _ in range(1000):
+            matches = catalog.lookup(query)
+        elapsed_us = (time.perf_counter() - started) * 1000
+        print(f"{query!r:>14} -> {matches} ({elapsed_us:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
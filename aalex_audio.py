@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+AALEX Audio - Continuous audio capture for the voice assistant
+A background reader keeps the input device open and fills a ring buffer of PCM frames,
+utterances are cut from the buffer (with pre-roll) instead of reopening the microphone
+"""
+
+import threading
+import time
+import wave
+from array import array
+
+from aalex_platform import lazy_module
+
+# NumPy loads on the capture thread with the first frame, not on import
+aalex_vad = lazy_module("aalex_vad")
+
+
+class RingBuffer:
+    def __init__(self, capacity, frame_bytes):
+        """Fixed-size ring of equally sized PCM frames"""
+        self.capacity = capacity
+        self.frame_bytes = frame_bytes
+        self.data = bytearray(capacity * frame_bytes)
+        # Per-frame RMS level and arrival time, stored alongside the audio
+        self.levels = array('d', bytes(8 * capacity))
+        self.times = array('d', bytes(8 * capacity))
+        self.written = 0  # Total frames ever written, also the index of the next frame
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def write(self, frame, level=0.0):
+        """Append one frame, overwriting the oldest one when full"""
+        if len(frame) < self.frame_bytes:
+            frame = frame + b"\x00" * (self.frame_bytes - len(frame))
+        with self.condition:
+            slot = self.written % self.capacity
+            offset = slot * self.frame_bytes
+            self.data[offset:offset + self.frame_bytes] = frame[:self.frame_bytes]
+            self.levels[slot] = level
+            self.times[slot] = time.monotonic()
+            self.written += 1
+            self.condition.notify_all()
+
+    def close(self):
+        """Wake up any readers, no more frames will arrive"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    @property
+    def oldest(self):
+        """Index of the oldest frame still held in the buffer"""
+        return max(0, self.written - self.capacity)
+
+    def get(self, index):
+        """Return the frame at an absolute index"""
+        with self.condition:
+            if index < self.oldest or index >= self.written:
+                raise IndexError(f"frame {index} is not in the buffer")
+            offset = (index % self.capacity) * self.frame_bytes
+            return bytes(self.data[offset:offset + self.frame_bytes])
+
+    def level(self, index):
+        """RMS level of the frame at an absolute index"""
+        return self.levels[index % self.capacity]
+
+    def arrival(self, index):
+        """Monotonic time at which the frame at an absolute index was written"""
+        return self.times[index % self.capacity]
+
+    def wait_for(self, index, timeout=None):
+        """Block until the frame at index has been written, returns False on timeout/close"""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: self.written > index or self.closed, timeout) and self.written > index
+
+
+class NoiseFloorEstimator:
+    def __init__(self, initial_threshold=300, ratio=1.5, alpha=0.05, hysteresis=0.3,
+                 minimum=50, max_speech_seconds=10, frame_seconds=0.064, warmup_seconds=0.5):
+        """Track the background noise level from non-speech frames
+
+        The floor is an exponential moving average of frame RMS outside speech.
+        Speech starts above threshold and only ends below the lower release
+        threshold, so the floor is not dragged up by the tail of a word.
+        """
+        self.ratio = ratio
+        self.alpha = alpha
+        self.hysteresis = hysteresis
+        self.minimum = minimum
+        self.noise_floor = initial_threshold / ratio
+        self.in_speech = False
+        self.speech_frames = 0
+        self.max_speech_frames = int(max_speech_seconds / frame_seconds)
+        # The first frames after the device opens seed the floor directly
+        self.warmup_frames = max(1, int(warmup_seconds / frame_seconds))
+        self.frames_seen = 0
+
+    @property
+    def threshold(self):
+        """Level a frame must exceed to start speech"""
+        return max(self.minimum, self.noise_floor * self.ratio)
+
+    @property
+    def release_threshold(self):
+        """Level a frame must fall below to end speech"""
+        return self.threshold * (1 - self.hysteresis)
+
+    def update(self, rms):
+        """Feed one frame level, returns True while in speech"""
+        self.frames_seen += 1
+        if self.frames_seen <= self.warmup_frames:
+            self.noise_floor += (rms - self.noise_floor) / self.frames_seen
+            return False
+
+        if self.in_speech:
+            if rms < self.release_threshold:
+                self.in_speech = False
+        elif rms > self.threshold:
+            self.in_speech = True
+            self.speech_frames = 0
+
+        if not self.in_speech:
+            self.noise_floor += self.alpha * (rms - self.noise_floor)
+        else:
+            self.speech_frames += 1
+            if self.speech_frames > self.max_speech_frames:
+                # "Speech" that never ends is a louder room, adapt to it slowly
+                self.noise_floor += self.alpha * 0.1 * (rms - self.noise_floor)
+        return self.in_speech
+
+
+class MicrophoneSource:
+    def __init__(self, microphone):
+        """Keep a speech_recognition Microphone open as a raw frame source"""
+        self.microphone = microphone
+        self.sample_rate = microphone.SAMPLE_RATE
+        self.sample_width = microphone.SAMPLE_WIDTH
+        self.chunk_size = microphone.CHUNK
+
+    def open(self):
+        self.microphone.__enter__()
+
+    def read(self):
+        return self.microphone.stream.read(self.chunk_size)
+
+    def close(self):
+        self.microphone.__exit__(None, None, None)
+
+
+class FileAudioSource:
+    def __init__(self, path, chunk_size=1024, realtime=True, loop=False):
+        """Play a mono WAV file as if it were a microphone (for testing without hardware)"""
+        self.path = path
+        self.chunk_size = chunk_size
+        self.realtime = realtime
+        self.loop = loop
+        with wave.open(path, 'rb') as wav:
+            self.sample_rate = wav.getframerate()
+            self.sample_width = wav.getsampwidth()
+            self.channels = wav.getnchannels()
+        self.wav = None
+
+    def open(self):
+        self.wav = wave.open(self.path, 'rb')
+        self.started = time.monotonic()
+        self.frames_read = 0
+
+    def read(self):
+        """Return the next chunk, or b"" when the file is exhausted"""
+        data = self.wav.readframes(self.chunk_size)
+        if not data and self.loop:
+            self.wav.rewind()
+            data = self.wav.readframes(self.chunk_size)
+        if self.channels > 1 and data:
+            data = aalex_vad.downmix(data, self.sample_width, self.channels)
+        if self.realtime and data:
+            # Pace reads like a real device would deliver them
+            self.frames_read += len(data) // self.sample_width
+            delay = self.started + self.frames_read / self.sample_rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return data
+
+    def close(self):
+        if self.wav:
+            self.wav.close()
+            self.wav = None
+
+
+class Utterance:
+    def __init__(self, frame_data, sample_rate, sample_width):
+        """Raw PCM audio cut from the capture buffer"""
+        self.frame_data = frame_data
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+    @property
+    def duration(self):
+        return len(self.frame_data) / (self.sample_rate * self.sample_width)
+
+    def to_audio_data(self):
+        """Convert to speech_recognition AudioData for the recognizers"""
+        import speech_recognition as sr
+        return sr.AudioData(self.frame_data, self.sample_rate, self.sample_width)
+
+
+class StreamingCapture:
+    def __init__(self, source, buffer_seconds=30, pre_roll=0.3, pause_threshold=0.8,
+                 energy_threshold=300):
+        """Continuously read from source and cut utterances out of a ring buffer"""
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.sample_width = source.sample_width
+        self.frame_bytes = source.chunk_size * source.sample_width
+        self.frame_seconds = source.chunk_size / source.sample_rate
+
+        capacity = max(1, int(buffer_seconds / self.frame_seconds))
+        self.buffer = RingBuffer(capacity, self.frame_bytes)
+        self.pre_roll = pre_roll
+        self.pause_threshold = pause_threshold
+        self.noise = NoiseFloorEstimator(energy_threshold, frame_seconds=self.frame_seconds)
+
+        # Index of the first frame not yet handed out as part of an utterance
+        self.cursor = 0
+        # Index of the last speech frame in the most recent utterance
+        self.last_speech = 0
+        # Optional VoiceActivityDetector for endpointing and trimming
+        self.vad = None
+        # Called from the reader thread with the RMS of every frame louder than
+        # the speech threshold (used for barge-in while the assistant talks)
+        self.on_speech = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Open the source once and start the background reader"""
+        if self.running:
+            return
+        self.source.open()
+        self.running = True
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the background reader and release the source"""
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def _reader(self):
+        try:
+            while self.running:
+                frame = self.source.read()
+                if not frame:
+                    break
+                rms = aalex_vad.pcm_rms(frame, self.sample_width)
+                self.buffer.write(frame, rms)
+                # Non-speech frames keep the noise floor current between listens
+                if self.noise.update(rms) and self.on_speech:
+                    self.on_speech(rms)
+        except Exception as e:
+            print(f"Audio capture stopped: {e}")
+        finally:
+            self.running = False
+            self.buffer.close()
+            self.source.close()
+
+    @property
+    def energy_threshold(self):
+        return self.noise.threshold
+
+    def is_speech(self, index, active=False):
+        """Decide whether the buffered frame at index contains speech
+
+        While already in speech the lower release threshold applies.
+        """
+        if self.vad:
+            return self.vad.is_speech(self.buffer.get(index), self.sample_rate,
+                                      self.sample_width, self.noise.noise_floor)
+        threshold = self.noise.release_threshold if active else self.noise.threshold
+        return self.buffer.level(index) > threshold
+
+    def calibrate(self, duration=0.5):
+        """Wait for duration seconds of fresh audio and reset the noise floor from it
+
+        Audio in the calibration window is skipped, like adjust_for_ambient_noise.
+        """
+        first = self.buffer.written
+        count = max(1, int(duration / self.frame_seconds))
+        if not self.buffer.wait_for(first + count - 1, duration + 2):
+            return
+        levels = [self.buffer.level(i) for i in range(first, first + count)]
+        self.noise.noise_floor = sum(levels) / len(levels)
+        self.cursor = first + count
+
+    def stream(self, timeout=None, phrase_time_limit=None):
+        """Yield the next utterance frame by frame as the audio arrives
+
+        Nothing is yielded on timeout. Speech that arrived since the previous
+        call is still in the buffer, so nothing said between calls is lost.
+        Closing the generator early leaves the rest for the next call.
+        """
+        buffer = self.buffer
+        index = max(self.cursor, buffer.oldest)
+        pre_roll_frames = int(self.pre_roll / self.frame_seconds)
+        pause_threshold = self.vad.hangover if self.vad else self.pause_threshold
+        pause_frames = max(1, round(pause_threshold / self.frame_seconds))
+        deadline = time.monotonic() + timeout if timeout else None
+
+        # Wait for speech onset
+        while True:
+            remaining = deadline - time.monotonic() if deadline else None
+            if remaining is not None and remaining <= 0:
+                self.cursor = index
+                return
+            if not buffer.wait_for(index, remaining):
+                self.cursor = index
+                return
+            index = max(index, buffer.oldest)
+            if self.is_speech(index):
+                break
+            index += 1
+
+        start = max(index - pre_roll_frames, self.cursor, buffer.oldest)
+        limit = int(phrase_time_limit / self.frame_seconds) if phrase_time_limit else None
+        self.last_speech = index
+        for i in range(start, index + 1):
+            self.cursor = i + 1
+            yield buffer.get(i)
+
+        # Follow the speech until a long enough pause (or the phrase limit)
+        silent = 0
+        index += 1
+        while silent < pause_frames and (limit is None or index - start < limit):
+            if not buffer.wait_for(index, pause_threshold + 1):
+                break
+            if index < buffer.oldest:
+                # The reader lapped us; carry on from what is still held
+                index = buffer.oldest
+            if self.is_speech(index, active=True):
+                silent = 0
+                self.last_speech = index
+            else:
+                silent += 1
+            self.cursor = index + 1
+            yield buffer.get(index)
+            index += 1
+
+    def listen(self, timeout=None, phrase_time_limit=None):
+        """Return the next utterance as an Utterance, or None on timeout"""
+        frames = b"".join(self.stream(timeout, phrase_time_limit))
+        if not frames:
+            return None
+        if self.vad:
+            frames = self.vad.trim(frames, self.sample_rate, self.sample_width, self.noise.noise_floor)
+        return Utterance(frames, self.sample_rate, self.sample_width)
+
+
+def latency_report(path, calibrate_each_listen):
+    """Replay a recorded session in real time and measure listen latency"""
+    capture = StreamingCapture(FileAudioSource(path, realtime=True))
+    capture.start()
+    utterances = 0
+    dead_times = []
+    latencies = []
+    while True:
+        started = time.monotonic()
+        if calibrate_each_listen:
+            # What listen() used to do before every capture
+            capture.calibrate(0.5)
+        dead_times.append(time.monotonic() - started)
+        utterance = capture.listen(timeout=3)
+        if utterance is None:
+            break
+        utterances += 1
+        latencies.append(time.monotonic() - capture.buffer.arrival(capture.last_speech))
+    capture.stop()
+
+    def mean_ms(values):
+        return sum(values) / len(values) * 1000 if values else 0.0
+    return utterances, mean_ms(dead_times), mean_ms(latencies)
+
+
+def main():
+    """Compare per-listen calibration with the background noise floor on a recording"""
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python aalex_audio.py session.wav")
+        return
+
+    print(f"{'mode':<22} {'utterances':>10} {'dead time ms':>13} {'end-of-speech to result ms':>27}")
+    for name, calibrate in (("calibrate every listen", True), ("background estimator", False)):
+        utterances, dead_ms, latency_ms = latency_report(sys.argv[1], calibrate)
+        print(f"{name:<22} {utterances:>10} {dead_ms:>13.0f} {latency_ms:>27.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+AALEX Autosave - Debounced background writer for small JSON files
+The UI thread hands over a snapshot and returns at once; a writer thread waits
+until edits stop for a moment, then serializes only the newest snapshot and
+replaces the file atomically, so a burst of edits costs one write
+"""
+
+import json
+import os
+import threading
+import time
+
+from aalex_metrics import LogHistogram
+
+DEBOUNCE_SECONDS = 0.5  # Write once edits have paused this long
+MAX_DELAY_SECONDS = 5.0  # but never hold a change back longer than this
+
+
+class AutosaveStats:
+    def __init__(self):
+        self.saves = 0  # Snapshots handed to save()
+        self.writes = 0
+        self.coalesced = 0  # Snapshots replaced by a newer one before they were written
+        self.failed = 0
+        self.last_seconds = 0.0
+        self.write_time = LogHistogram()
+
+    def __repr__(self):
+        _, mean, (p50, p95) = self.write_time.summary((0.5, 0.95))
+        return (f"saves={self.saves} writes={self.writes} coalesced={self.coalesced} failed={self.failed} "
+                f"last write={self.last_seconds * 1000:.2f} ms p50={p50 * 1000:.2f} ms p95={p95 * 1000:.2f} ms")
+
+
+class AutosaveWriter:
+    def __init__(self, path, debounce=DEBOUNCE_SECONDS, max_delay=MAX_DELAY_SECONDS, indent=2, on_written=None):
+        """Write the latest snapshot given to save() to path from a background thread
+
+        on_written(seconds) is called on the writer thread after each write.
+        """
+        self.path = path
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.indent = indent
+        self.on_written = on_written
+        self.stats = AutosaveStats()
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()  # One write at a time, background or flush
+        self.pending = None
+        self.dirty = False
+        self.first_change = 0.0
+        self.last_change = 0.0
+        self.closed = False
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._background, daemon=True, name="aalex-autosave")
+        self.thread.start()
+
+    def save(self, data):
+        """Queue data to be written; never blocks on the disk
+
+        data must not be changed afterwards, so pass a fresh dict.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.stats.saves += 1
+            if self.dirty:
+                self.stats.coalesced += 1
+            else:
+                self.dirty = True
+                self.first_change = now
+            self.pending = data
+            self.last_change = now
+        self.wake.set()
+
+    def _background(self):
+        while not self.closed:
+            self.wake.wait()
+            self.wake.clear()
+            # Sleep until edits pause for the debounce window or the change gets too old
+            while not self.closed:
+                with self.lock:
+                    if not self.dirty:
+                        break
+                    now = time.monotonic()
+                    due = min(self.last_change + self.debounce, self.first_change + self.max_delay)
+                if now >= due:
+                    self.flush()
+                    break
+                time.sleep(due - now)
+
+    def flush(self):
+        """Write the pending snapshot now, on the calling thread; returns True if one was written"""
+        with self.write_lock:
+            with self.lock:
+                if not self.dirty:
+                    return False
+                data = self.pending
+                self.pending = None
+                self.dirty = False
+            started = time.perf_counter()
+            try:
+                text = json.dumps(data, indent=self.indent)
+                temp = self.path + ".tmp"
+                with open(temp, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp, self.path)
+            except (OSError, TypeError, ValueError) as e:
+                self.stats.failed += 1
+                print(f"Autosave of {self.path} failed: {e}")
+                return False
+            seconds = time.perf_counter() - started
+            self.stats.writes += 1
+            self.stats.last_seconds = seconds
+            self.stats.write_time.record(seconds)
+        if self.on_written:
+            self.on_written(seconds)
+        return True
+
+    def close(self):
+        """Write anything still pending and stop the writer thread"""
+        self.flush()
+        self.closed = True
+        self.wake.set()
+
+
+def main():
+    """Save in a burst, as a run of UI edits would, and show how many writes it took"""
+    import tempfile
+    print("AALEX Autosave - writer check")
+    print("=" * 50)
+    path = os.path.join(tempfile.mkdtemp(), "data.json")
+    writer = AutosaveWriter(path, debounce=0.1)
+    data = {"notes": [f"note {i}" for i in range(5000)]}
+
+    started = time.perf_counter()
+    for i in range(200):
+        writer.save(dict(data, edit=i))
+    per_save_us = (time.perf_counter() - started) / 200 * 1e6
+    print(f"200 saves: {per_save_us:.1f} us each on the calling thread")
+    time.sleep(0.3)
+    print(f"after the burst: {writer.stats}")
+
+    writer.save(dict(data, edit="last"))
+    writer.close()
+    with open(path) as f:
+        print(f"after close: edit={json.load(f)['edit']!r}, {writer.stats}")
+
+
+if __name__ == "__main__":
+    main()
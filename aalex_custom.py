@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+AALEX Custom - Persistent store for user-defined commands
+Commands live in an append-only JSONL log (one record per add, edit or delete)
+that is replayed on start and tailed by a watcher, so edits from the control pad
+or another process take effect without a restart or a full re-read
+"""
+
+import json
+import os
+import threading
+import time
+
+ACTIONS = ("speak", "open_app", "web_search", "system_command", "custom_script")
+LEGACY_PATH = "aalex_custom_commands.json"
+
+
+class CustomCommand:
+    __slots__ = ("name", "triggers", "action", "response", "updated")
+
+    def __init__(self, name, triggers, action="speak", response="", updated=None):
+        """A user command: trigger phrases, what to do and what to say
+
+        For speak the response is said aloud; for the other actions it is the
+        argument (the app to open, the search, the command line or script).
+        """
+        self.name = name
+        self.triggers = [t.strip().lower() for t in triggers if t.strip()] or [name.lower()]
+        self.action = action if action in ACTIONS else "speak"
+        self.response = response
+        self.updated = updated or time.time()
+
+    def to_json(self):
+        return {"op": "put", "name": self.name, "triggers": self.triggers, "action": self.action,
+                "response": self.response, "updated": self.updated}
+
+    @classmethod
+    def from_json(cls, record):
+        return cls(record["name"], record.get("triggers") or [], record.get("action", "speak"),
+                   record.get("response", ""), record.get("updated"))
+
+    def __repr__(self):
+        return f"CustomCommand({self.name!r}, {self.triggers}, {self.action})"
+
+
+class CustomCommandStore:
+    def __init__(self, path="aalex_custom_commands.jsonl", legacy_path=LEGACY_PATH, on_change=None):
+        """Custom commands backed by a JSONL log
+
+        on_change(name, command) is called for every command added, edited or
+        (with command None) deleted, whether the change came from this store
+        or from another writer of the same file.
+        """
+        self.path = path
+        self.legacy_path = legacy_path
+        self.on_change = on_change
+        self.commands = {}  # name -> CustomCommand
+        self.records = 0  # Lines in the log, live or superseded
+        self.offset = 0  # Bytes of the log already applied
+        self.identity = None  # (device, inode) of the file the offset belongs to
+        self.mtime = None
+        self.lock = threading.RLock()
+        self.reload_seconds = 0.0
+        self.watcher = None
+        self.watching = threading.Event()
+
+    def load(self):
+        """Read the whole log (importing the old JSON file the first time)"""
+        with self.lock:
+            if not os.path.exists(self.path) and self.legacy_path and os.path.exists(self.legacy_path):
+                self._import_legacy()
+            self.commands = {}
+            self.records = 0
+            self.offset = 0
+            self.identity = None
+            self.poll()
+        return self
+
+    def _import_legacy(self):
+        try:
+            with open(self.legacy_path, 'r') as f:
+                data = json.load(f)
+            lines = [json.dumps(CustomCommand(name, [name], entry.get('action', 'speak'),
+                                              entry.get('response', '')).to_json())
+                     for name, entry in data.items()]
+            self._write_log(lines)
+            print(f"Imported {len(lines)} custom commands from {self.legacy_path}")
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Error importing {self.legacy_path}: {e}")
+
+    def poll(self):
+        """Apply records appended since the last poll; returns the names that changed
+
+        Only the new bytes are read. If the file was replaced or truncated
+        (compaction, or edited by hand) it is read again from the start.
+        """
+        with self.lock:
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                return []
+            identity = (stat.st_dev, stat.st_ino)
+            if identity == self.identity and stat.st_size == self.offset and stat.st_mtime == self.mtime:
+                return []
+
+            started = time.perf_counter()
+            # Replaced, truncated, or rewritten in place to the same length
+            replaced = (identity != self.identity or stat.st_size < self.offset
+                        or (stat.st_size == self.offset and stat.st_mtime != self.mtime))
+            previous = self.commands
+            if replaced:
+                self.commands = {}
+                self.records = 0
+                self.offset = 0
+            changed = []
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read()
+            # A writer may be half way through a line; leave it for the next poll
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    name = record["name"]
+                except (ValueError, KeyError, TypeError):
+                    print(f"Skipping bad custom command record: {line[:80]!r}")
+                    continue
+                self.records += 1
+                if record.get("op") == "delete":
+                    self.commands.pop(name, None)
+                else:
+                    self.commands[name] = CustomCommand.from_json(record)
+                changed.append(name)
+            self.offset += end
+            self.identity = identity
+            self.mtime = stat.st_mtime
+
+            if replaced:
+                # Report only real differences against what was loaded before
+                changed = [name for name in set(previous) | set(self.commands)
+                           if (previous.get(name) and previous[name].to_json()) !=
+                           (self.commands.get(name) and self.commands[name].to_json())]
+            else:
+                changed = list(dict.fromkeys(changed))
+            self.reload_seconds = time.perf_counter() - started
+
+        if self.on_change:
+            for name in changed:
+                self.on_change(name, self.commands.get(name))
+        return changed
+
+    def _append(self, record):
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            # Apply it the same way as anyone else's edit
+            self.poll()
+            if self.records > 2 * len(self.commands) + 50:
+                self.compact()
+
+    def put(self, command):
+        """Add a command, or replace the one with the same name"""
+        self._append(command.to_json())
+        return command
+
+    def rename(self, old_name, command):
+        """Edit a command and change its name at the same time"""
+        with self.lock:
+            if old_name != command.name and old_name in self.commands:
+                self._append({"op": "delete", "name": old_name})
+            return self.put(command)
+
+    def delete(self, name):
+        if name not in self.commands:
+            return False
+        self._append({"op": "delete", "name": name})
+        return True
+
+    def get(self, name):
+        return self.commands.get(name)
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __iter__(self):
+        return iter(list(self.commands.values()))
+
+    def _write_log(self, lines):
+        """Replace the log atomically with the given lines"""
+        temp = self.path + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+    def compact(self):
+        """Rewrite the log with one record per live command"""
+        with self.lock:
+            try:
+                self._write_log([json.dumps(command.to_json()) for command in self.commands.values()])
+            except OSError as e:
+                print(f"Error compacting custom commands: {e}")
+                return
+            # The contents are what is already loaded, so nothing is reported as changed
+            stat = os.stat(self.path)
+            self.identity = (stat.st_dev, stat.st_ino)
+            self.offset = stat.st_size
+            self.mtime = stat.st_mtime
+            self.records = len(self.commands)
+
+    def watch(self, interval=0.04):
+        """Poll the log from a daemon thread, so outside edits apply within about interval seconds
+
+        A poll that finds nothing new is a single os.stat call.
+        """
+        if self.watcher is not None:
+            return
+        self.watching.set()
+
+        def loop():
+            while self.watching.is_set():
+                try:
+                    self.poll()
+                except Exception as e:
+                    print(f"Custom command reload error: {e}")
+                time.sleep(interval)
+
+        self.watcher = threading.Thread(target=loop, daemon=True, name="aalex-custom-watch")
+        self.watcher.start()
+
+    def stop(self):
+        self.watching.clear()
+        self.watcher = None
+
+
+def main():
+    """Time the reload of an outside edit against a log with many commands"""
+    import tempfile
+    print("AALEX Custom - store check")
+    print("=" * 50)
+    path = os.path.join(tempfile.mkdtemp(), "commands.jsonl")
+    store = CustomCommandStore(path, legacy_path=None)
+    with open(path, 'w') as f:
+        for i in range(5000):
+            f.write(json.dumps(CustomCommand(f"command {i}", [f"do thing {i}"], "speak", f"thing {i}").to_json())
+                    + "\n")
+    started = time.perf_counter()
+    store.load()
+    print(f"full load: {len(store)} commands in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    seen = threading.Event()
+    store.on_change = lambda name, command: seen.set()
+    store.watch()
+    other = CustomCommandStore(path, legacy_path=None).load()
+    started = time.perf_counter()
+    other.put(CustomCommand("lights", ["lights on", "turn on the lights"], "system_command", "lights on"))
+    seen.wait(1)
+    print(f"outside edit picked up in {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"(reload itself {store.reload_seconds * 1000:.2f} ms): {store.get('lights')}")
+    store.stop()
+
+    started = time.perf_counter()
+    for _ in range(10000):
+        store.poll()
+    print(f"poll with no change: {(time.perf_counter() - started) / 10000 * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+AALEX Executor - Runs command handlers off the listen loop
+A bounded worker pool with per-command timeouts, cancellable delayed actions
+and different handling for read-only and side-effecting commands
+"""
+
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_local = threading.local()
+
+
+def current_task():
+    """The CommandTask running on this thread, or None outside the executor"""
+    return getattr(_local, 'task', None)
+
+
+def cancelled():
+    """Whether the command running on this thread has been cancelled or timed out
+
+    Long handlers can poll this to stop early.
+    """
+    task = current_task()
+    return task is not None and task.cancel_event.is_set()
+
+
+class CommandTask:
+    def __init__(self, name, function, text, timeout, idempotent):
+        """One submitted command"""
+        self.name = name
+        self.function = function
+        self.text = text
+        self.timeout = timeout
+        self.idempotent = idempotent
+        self.state = "queued"  # queued, running, done, failed, timed out, cancelled, rejected
+        self.error = None
+        self.responses = []  # What the handler said
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+
+    def cancel(self):
+        """Ask the handler to stop; a queued task will not start"""
+        self.cancel_event.set()
+
+    def wait(self, timeout=None):
+        """Block until the handler has finished, failed or been given up on"""
+        return self.done.wait(timeout)
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    def __repr__(self):
+        return f"CommandTask({self.name!r}, {self.state})"
+
+
+class DelayedAction:
+    def __init__(self, name, delay, action):
+        """An action that runs after a countdown unless cancelled first"""
+        self.name = name
+        self.action = action
+        self.deadline = time.monotonic() + delay
+        self.cancel_event = threading.Event()
+        self.fired = False
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def pending(self):
+        return not self.fired and not self.cancel_event.is_set()
+
+
+class ExecutorStats:
+    def __init__(self):
+        """Counters for the executor"""
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.retried = 0
+        self.delayed_cancelled = 0
+
+
+class CommandExecutor:
+    def __init__(self, max_workers=4, max_pending=16, default_timeout=30, timeouts=None,
+                 idempotent=(), inline=(), on_error=None, on_timeout=None, on_reject=None,
+                 on_finished=None):
+        """Run command handlers on a bounded pool
+
+        Commands named in idempotent only read state (time, weather, ...): a
+        repeat while one is in flight joins the running task and a failure is
+        retried once. Everything else is treated as side-effecting and runs
+        exactly once per request. Commands named in inline run on the caller's
+        thread (anything that must own its thread, like a Tk window).
+        on_finished(task) is called once per task that started or was cancelled
+        in the queue, after it is done, failed, cancelled or timed out.
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts or {})
+        self.idempotent = set(idempotent)
+        self.inline = set(inline)
+        self.on_error = on_error
+        self.on_timeout = on_timeout
+        self.on_reject = on_reject
+        self.on_finished = on_finished
+        self.stats = ExecutorStats()
+        self.lock = threading.Lock()
+        self.active = {}  # id(task) -> task, queued or running
+        self.delayed = []
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="aalex-command")
+
+    def submit(self, name, function, text=""):
+        """Queue a handler and return its CommandTask without waiting for it"""
+        idempotent = name in self.idempotent
+        with self.lock:
+            self.stats.submitted += 1
+            if idempotent:
+                for task in self.active.values():
+                    if task.name == name and task.idempotent and not task.cancel_event.is_set():
+                        self.stats.coalesced += 1
+                        return task
+
+            task = CommandTask(name, function, text, self.timeouts.get(name, self.default_timeout),
+                               idempotent)
+            if name not in self.inline and len(self.active) >= self.max_pending:
+                self.stats.rejected += 1
+                task.state = "rejected"
+                task.done.set()
+                reject = True
+            else:
+                self.active[id(task)] = task
+                reject = False
+
+        if reject:
+            if self.on_reject:
+                self.on_reject(task)
+            return task
+        if name in self.inline:
+            self._run(task)
+        else:
+            # Handlers see the caller's context variables (the trace id, for one)
+            self.pool.submit(contextvars.copy_context().run, self._run, task)
+        return task
+
+    def _run(self, task):
+        if task.cancel_event.is_set():
+            self._finish(task, "cancelled")
+            return
+
+        task.state = "running"
+        task.started = time.monotonic()
+        watchdog = None
+        if task.timeout:
+            watchdog = threading.Timer(task.timeout, self._expire, (task,))
+            watchdog.daemon = True
+            watchdog.start()
+
+        _local.task = task
+        attempts = 2 if task.idempotent else 1
+        try:
+            for attempt in range(attempts):
+                try:
+                    task.function(task.text)
+                    state = "done"
+                    break
+                except Exception as e:
+                    task.error = e
+                    state = "failed"
+                    if attempt + 1 < attempts and not task.cancel_event.is_set():
+                        self.stats.retried += 1
+                        continue
+                    if self.on_error and task.state != "timed out":
+                        self.on_error(task, e)
+        finally:
+            _local.task = None
+            if watchdog:
+                watchdog.cancel()
+        self._finish(task, state)
+
+    def _expire(self, task):
+        """The handler overran its timeout: stop waiting on it and free its slot"""
+        with self.lock:
+            if task.finished is not None:
+                return
+            task.state = "timed out"
+            task.finished = time.monotonic()
+            self.stats.timed_out += 1
+            self.active.pop(id(task), None)
+        # The thread cannot be killed; it is told to stop and ignored when it returns
+        task.cancel()
+        task.done.set()
+        if self.on_timeout:
+            self.on_timeout(task)
+        if self.on_finished:
+            self.on_finished(task)
+
+    def _finish(self, task, state):
+        with self.lock:
+            if task.state == "timed out":
+                return
+            task.state = state
+            task.finished = time.monotonic()
+            if state == "done":
+                self.stats.completed += 1
+            elif state == "failed":
+                self.stats.failed += 1
+            self.active.pop(id(task), None)
+        task.done.set()
+        if self.on_finished:
+            self.on_finished(task)
+
+    def schedule(self, name, delay, action):
+        """Run action after delay seconds unless cancel_delayed is called first"""
+        delayed = DelayedAction(name, delay, action)
+        with self.lock:
+            self.delayed = [d for d in self.delayed if d.pending]
+            self.delayed.append(delayed)
+
+        def countdown():
+            if delayed.cancel_event.wait(delay):
+                return
+            delayed.fired = True
+            self.submit(name, lambda text: action())
+
+        thread = threading.Thread(target=countdown, name=f"aalex-delayed-{name}", daemon=True)
+        thread.start()
+        return delayed
+
+    def pending_delayed(self):
+        """Delayed actions still counting down"""
+        with self.lock:
+            return [d for d in self.delayed if d.pending]
+
+    def cancel_delayed(self, name=None):
+        """Abort counting-down actions (all, or those called name); returns how many"""
+        count = 0
+        for delayed in self.pending_delayed():
+            if name is None or delayed.name == name:
+                delayed.cancel()
+                count += 1
+        with self.lock:
+            self.stats.delayed_cancelled += count
+        return count
+
+    def cancel_all(self):
+        """Cancel every delayed action and every queued or running command but the caller's own"""
+        count = self.cancel_delayed()
+        own = current_task()
+        with self.lock:
+            tasks = [task for task in self.active.values() if task is not own]
+        for task in tasks:
+            task.cancel()
+        return count + len(tasks)
+
+    def running(self):
+        with self.lock:
+            return list(self.active.values())
+
+    def report(self):
+        """Counters as one line"""
+        s = self.stats
+        return (f"{s.submitted} submitted, {s.completed} completed, {s.failed} failed, "
+                f"{s.timed_out} timed out, {s.rejected} rejected, {s.coalesced} coalesced, "
+                f"{s.retried} retried, {s.delayed_cancelled} delayed actions cancelled")
+
+    def shutdown(self, wait=False):
+        self.cancel_all()
+        self.pool.shutdown(wait=wait, cancel_futures=True)
@@ -11,15 +11,13 @@ import time
 import json
 import os
 from datetime import datetime
-import requests
-import webbrowser
-from PIL import Image, ImageTk
-import pyautogui
-import psutil
-import win32gui
-import win32con
-import win32api
-from aalex import AALEX
+from aalex_platform import lazy_module, get_backend
+from aalex_telemetry import shared_sampler
+from aalex_ui import UIDispatcher
+from aalex_journal import Journal
+from aalex_autosave import AutosaveWriter
+
+webbrowser = lazy_module("webbrowser")
 
 class AALEXGUI:
     def __init__(self):
@@ -36,11 +34,20 @@ class AALEXGUI:
         self.root.geometry("+10+10")
         
         # Initialize components
-        self.notes_data = []
-        self.code_snippets = []
+        # Notes and snippets are journaled one operation at a time; see aalex_journal
+        self.journal = Journal().load()
+        self.notes_data = self.journal.collection("notes")
+        self.code_snippets = self.journal.collection("code_snippets")
         self.social_tabs = {}
         self.chatgpt_api_key = ""
+        # Everything else found in aalex_data.json, written back unchanged with the settings
+        self.file_data = {}
         self.is_monitoring = False
+        self.telemetry = shared_sampler()
+        self.platform = get_backend()
+        self.ui = None
+        # Settings are written off the Tk thread, once a burst of changes settles
+        self.autosave = AutosaveWriter("aalex_data.json", on_written=self.on_autosave_written)
         
         # Load saved data
         self.load_data()
@@ -48,6 +55,9 @@ class AALEXGUI:
         # Create GUI
         self.create_gui()
         
+        # Background threads update widgets through this, never directly
+        self.ui = UIDispatcher(self.root)
+        
         # Start monitoring thread
         self.start_monitoring()
     
@@ -297,6 +307,9 @@ class AALEXGUI:
         self.auto_save_var = tk.BooleanVar(value=True)
         tk.Checkbutton(settings_interface_frame, text="Auto-save data", variable=self.auto_save_var,
                       fg='#ffffff', bg='#1a1a1a', selectcolor='#2a2a2a').pack(anchor='w', pady=2)
+        self.autosave_label = tk.Label(settings_interface_frame, text="No saves yet", fg='#888888',
+                                       bg='#1a1a1a', font=('Arial', 8))
+        self.autosave_label.pack(anchor='w', padx=(20, 0))
         
         # Always on top
         self.always_on_top_var = tk.BooleanVar(value=True)
@@ -337,24 +350,21 @@ class AALEXGUI:
             note = f"[{timestamp}] {note_text}"
             self.notes_data.append(note)
             self.note_entry.delete(0, tk.END)
-            self.refresh_notes()
-            self.save_data()
+            self.notes_listbox.insert(tk.END, note)
     
     def delete_note(self):
         """Delete selected note"""
         selection = self.notes_listbox.curselection()
         if selection:
             index = selection[0]
-            del self.notes_data[index]
-            self.refresh_notes()
-            self.save_data()
+            self.notes_data.delete_at(index)
+            self.notes_listbox.delete(index)
     
     def clear_notes(self):
         """Clear all notes"""
         if messagebox.askyesno("Confirm", "Clear all notes?"):
             self.notes_data.clear()
             self.refresh_notes()
-            self.save_data()
     
     def refresh_notes(self):
         """Refresh notes listbox"""
@@ -372,8 +382,7 @@ class AALEXGUI:
                 "code": code_text
             }
             self.code_snippets.append(snippet)
-            self.refresh_code_snippets()
-            self.save_data()
+            self.code_listbox.insert(tk.END, f"{len(self.code_snippets)}. {timestamp}")
     
     def copy_code(self):
         """Copy selected code to clipboard"""
@@ -388,9 +397,8 @@ class AALEXGUI:
         selection = self.code_listbox.curselection()
         if selection:
             index = selection[0]
-            del self.code_snippets[index]
+            self.code_snippets.delete_at(index)
             self.refresh_code_snippets()
-            self.save_data()
     
     def refresh_code_snippets(self):
         """Refresh code snippets listbox"""
@@ -402,46 +410,44 @@ class AALEXGUI:
         """Analyze current screen content"""
         try:
             # Take screenshot
-            screenshot = pyautogui.screenshot()
+            screenshot_file = f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+            saved = self.platform.screenshot(screenshot_file)
             
             # Get active window info
-            active_window = win32gui.GetForegroundWindow()
-            window_title = win32gui.GetWindowText(active_window)
+            window_title = self.platform.active_window_title()
             
-            # Get system info
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
+            # Get system info from the background sampler instead of blocking the UI for a second
+            sample = self.telemetry.latest()
+            if sample is None:
+                self.analysis_text.insert(tk.END, "System information is not available yet\n")
+                return
             
-            # Analyze running processes
-            processes = []
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent']):
-                try:
-                    if proc.info['cpu_percent'] > 1.0:
-                        processes.append(f"{proc.info['name']}: {proc.info['cpu_percent']:.1f}%")
-                except:
-                    pass
+            # Busiest processes from the tracker's last scan
+            processes = [f"{entry.name}: {entry.cpu:.1f}%" for entry in self.telemetry.processes.top(5, "cpu")]
+            memory_hogs = [f"{entry.name}: {entry.rss // (1024**2)} MB"
+                           for entry in self.telemetry.processes.top(5, "rss")]
             
             analysis = f"""
 SCREEN ANALYSIS - {datetime.now().strftime("%H:%M:%S")}
 {'='*50}
 Active Window: {window_title}
-CPU Usage: {cpu_percent}%
-Memory Usage: {memory.percent}%
-Available Memory: {memory.available // (1024**3)} GB
+CPU Usage: {sample.cpu:.1f}%
+Memory Usage: {sample.memory:.1f}%
+Available Memory: {int(sample.memory_available) // (1024**3)} GB
 
 Top CPU Processes:
-{chr(10).join(processes[:5])}
+{chr(10).join(processes)}
+
+Top Memory Processes:
+{chr(10).join(memory_hogs)}
 
-Screen Resolution: {screenshot.size}
-Screenshot saved: screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png
+Screen Resolution: {self.platform.screen_size() or 'unknown'}
+Screenshot saved: {screenshot_file if saved else 'not available on this system'}
 """
             
             self.analysis_text.insert(tk.END, analysis + "\n")
             self.analysis_text.see(tk.END)
             
-            # Save screenshot
-            screenshot.save(f"screenshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
-            
         except Exception as e:
             self.analysis_text.insert(tk.END, f"Analysis error: {str(e)}\n")
     
@@ -460,15 +466,13 @@ Screenshot saved: screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png
             while self.is_monitoring:
                 try:
                     # Get active window
-                    active_window = win32gui.GetForegroundWindow()
-                    window_title = win32gui.GetWindowText(active_window)
+                    window_title = self.platform.active_window_title()
                     
                     # Log activity
                     timestamp = datetime.now().strftime("%H:%M:%S")
                     activity = f"[{timestamp}] Using: {window_title}"
                     
-                    self.analysis_text.insert(tk.END, activity + "\n")
-                    self.analysis_text.see(tk.END)
+                    self.ui.post(self.log_activity, activity)
                     
                     time.sleep(5)  # Monitor every 5 seconds
                 except:
@@ -477,6 +481,11 @@ Screenshot saved: screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png
         thread = threading.Thread(target=monitor, daemon=True)
         thread.start()
     
+    def log_activity(self, line):
+        """Append a line to the analysis log (UI thread)"""
+        self.analysis_text.insert(tk.END, line + "\n")
+        self.analysis_text.see(tk.END)
+    
     def clear_analysis(self):
         """Clear analysis text"""
         self.analysis_text.delete("1.0", tk.END)
@@ -531,8 +540,8 @@ Screenshot saved: screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png
     def export_data(self):
         """Export all data to JSON"""
         data = {
-            "notes": self.notes_data,
-            "code_snippets": self.code_snippets,
+            "notes": list(self.notes_data),
+            "code_snippets": list(self.code_snippets),
             "chatgpt_api_key": self.chatgpt_api_key
         }
         
@@ -563,25 +572,50 @@ Screenshot saved: screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png
             if os.path.exists("aalex_data.json"):
                 with open("aalex_data.json", 'r') as f:
                     data = json.load(f)
-                    self.notes_data = data.get("notes", [])
-                    self.code_snippets = data.get("code_snippets", [])
                     self.chatgpt_api_key = data.get("chatgpt_api_key", "")
+                    self.file_data = dict(data)
+                if data.get("notes") or data.get("code_snippets"):
+                    self.import_legacy_data(data)
         except:
             pass
     
+    def import_legacy_data(self, data):
+        """Move notes and snippets saved by older versions into the journal"""
+        if len(self.notes_data) or len(self.code_snippets):
+            # The journal already has data; leave the old copy in aalex_data.json untouched
+            print("Notes found in both aalex_data.json and the journal; keeping the journal's")
+            return
+        try:
+            for note in data.get("notes", []):
+                self.notes_data.append(note)
+            for snippet in data.get("code_snippets", []):
+                self.code_snippets.append(snippet)
+            self.journal.flush()
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error moving notes to the journal: {e}")
+            return
+        print(f"Moved {len(self.notes_data)} notes and {len(self.code_snippets)} snippets to the journal")
+        # Drop them from aalex_data.json now they are safely journaled, so they are not imported again
+        self.file_data.pop("notes", None)
+        self.file_data.pop("code_snippets", None)
+        self.autosave.save(self.settings_data())
+    
     def save_data(self):
-        """Save data to file"""
+        """Queue settings for the background writer (notes and snippets are already in the journal)"""
         if self.auto_save_var.get():
-            try:
-                data = {
-                    "notes": self.notes_data,
-                    "code_snippets": self.code_snippets,
-                    "chatgpt_api_key": self.chatgpt_api_key
-                }
-                with open("aalex_data.json", 'w') as f:
-                    json.dump(data, f, indent=2)
-            except:
-                pass
+            self.autosave.save(self.settings_data())
+    
+    def settings_data(self):
+        """A fresh copy of what goes in aalex_data.json, keeping keys this version does not use"""
+        return dict(self.file_data, chatgpt_api_key=self.chatgpt_api_key)
+    
+    def on_autosave_written(self, seconds):
+        """Show the writer's counts in Settings (called on the writer thread)"""
+        if self.ui:
+            stats = self.autosave.stats
+            self.ui.post_latest("autosave", self.autosave_label.config,
+                                text=f"Saved in {seconds * 1000:.1f} ms - {stats.writes} writes, "
+                                     f"{stats.coalesced} changes coalesced")
     
     def start_monitoring(self):
         """Start initial monitoring"""
@@ -591,16 +625,26 @@ Screenshot saved: screenshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png
                     # Update status every 30 seconds
                     time.sleep(30)
                     if not self.is_monitoring:
-                        self.status_label.config(text="● ACTIVE")
+                        self.ui.post_latest("status", self.status_label.config, text="● ACTIVE")
                 except:
                     break
         
         thread = threading.Thread(target=update_status, daemon=True)
         thread.start()
     
+    def on_close(self):
+        """Write pending settings, flush the journal and close the window"""
+        self.autosave.close()
+        print(f"Autosave: {self.autosave.stats}")
+        self.journal.close()
+        self.root.destroy()
+    
     def run(self):
         """Run the GUI"""
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.mainloop()
+        self.autosave.close()
+        self.journal.close()
 
 def main():
     """Main function"""
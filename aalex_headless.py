@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+AALEX Headless - Drive the assistant from text instead of a microphone
+An interactive console, a batch mode that replays a JSONL file of transcripts
+through routing and handlers and reports per-command throughput and latency, and
+a dry-run test of every command against the do-nothing platform backend
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from aalex_platform import get_backend
+from aalex_speech import NullAudioDriver
+
+# What to say to exercise commands that need an argument (or must not start anything)
+TEST_PHRASES = {
+    "search": "search python tutorials",
+    "open": "open calculator",
+    "close": "close notepad",
+    "volume": "volume up",
+    "brightness": "brightness down",
+    "profile": "stop profile",
+    "profiling": "stop profiling",
+}
+# Commands that act on everything else the assistant is doing, so they run alone at the end
+EXCLUSIVE_TESTS = ("cancel",)
+
+
+class TranscriptResult:
+    def __init__(self, text, expected=None):
+        """Outcome of one transcript"""
+        self.text = text
+        self.expected = expected
+        self.command = None
+        self.state = "unmatched"
+        self.responses = []
+        self.latency = 0.0
+        self.error = None
+
+    @property
+    def mismatch(self):
+        return self.expected is not None and self.expected != self.command
+
+    def to_json(self):
+        record = {"text": self.text, "command": self.command, "state": self.state,
+                  "responses": self.responses, "latency_ms": round(self.latency * 1000, 3)}
+        if self.error:
+            record["error"] = self.error
+        if self.expected is not None:
+            record["expected"] = self.expected
+        return record
+
+
+def create_assistant(platform="null", quiet=True, trace=False):
+    """An AALEX with no microphone, a silent speech driver and (by default) no system side effects"""
+    from aalex import AALEX
+    with _silenced(quiet):
+        return AALEX(headless=True, speech_driver=NullAudioDriver(), platform=get_backend(platform),
+                     trace=trace)
+
+
+@contextlib.contextmanager
+def _silenced(enabled=True):
+    """Drop what the assistant prints (it logs every reply) so reports stay readable"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def run_transcript(aalex, text, expected=None, timeout=30):
+    """Route one transcript, run its handler and wait for it"""
+    result = TranscriptResult(text, expected)
+    aalex.response_sink.responses = []
+    started = time.perf_counter()
+    try:
+        with aalex.tracer.interaction():
+            task = aalex.process_command(text.lower())
+        if task is not None:
+            result.command = task.name
+            if not task.wait(timeout):
+                result.state = "timed out"
+            else:
+                result.state = task.state
+            if task.error:
+                result.error = str(task.error)
+            result.responses = list(task.responses)
+    except Exception as e:
+        result.state = "failed"
+        result.error = str(e)
+    result.latency = time.perf_counter() - started
+    result.responses = aalex.response_sink.responses + result.responses
+    aalex.response_sink.responses = None
+    return result
+
+
+def command_test_phrases(aalex):
+    """(phrase, command) for every command the assistant knows, including custom triggers"""
+    return [(TEST_PHRASES.get(name, name), name) for name in sorted(aalex.command_names())]
+
+
+def run_command_tests(aalex, tests=None, parallel=4, timeout=10, on_result=None):
+    """Dry-run every command and report each as it finishes
+
+    Meant for an assistant from create_assistant(), whose platform backend only
+    records what it is asked to do. A test passes if the phrase routed to its
+    command and the handler finished without error inside timeout seconds.
+    on_result(result) is called from a worker thread as each test finishes.
+    """
+    tests = list(tests if tests is not None else command_test_phrases(aalex))
+    shared = [test for test in tests if test[1] not in EXCLUSIVE_TESTS]
+    alone = [test for test in tests if test[1] in EXCLUSIVE_TESTS]
+    results = []
+
+    def finished(result):
+        results.append(result)
+        if on_result:
+            on_result(result)
+
+    parallel = max(1, min(parallel, aalex.executor.max_pending))
+    with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="aalex-test") as pool:
+        futures = [pool.submit(run_transcript, aalex, phrase, name, timeout) for phrase, name in shared]
+        for future in as_completed(futures):
+            finished(future.result())
+    for phrase, name in alone:
+        finished(run_transcript(aalex, phrase, name, timeout))
+    # Shutdown and restart leave a countdown behind
+    aalex.executor.cancel_delayed()
+    return results
+
+
+def test_line(result):
+    """One line of test output"""
+    passed = result.state == "done" and not result.mismatch
+    detail = result.error or (f"routed to {result.command}" if result.mismatch else
+                              (result.responses[0] if result.responses else ""))
+    return (f"{'✓' if passed else '✗'} {result.expected or result.text:<16} {result.state:<10} "
+            f"{result.latency * 1000:8.1f} ms  {detail}")
+
+
+def read_transcripts(path):
+    """(text, expected command) pairs from JSONL lines of {"text": ..., "command": ...} or plain strings"""
+    with (sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"line {number}: not JSON, skipped", file=sys.stderr)
+                continue
+            if isinstance(record, str):
+                yield record, None
+            elif isinstance(record, dict) and (record.get("text") or record.get("transcript")):
+                yield record.get("text") or record.get("transcript"), record.get("command")
+            else:
+                print(f"line {number}: no text, skipped", file=sys.stderr)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def batch_report(results, elapsed):
+    """Per-command counts and latency percentiles, plus overall throughput"""
+    by_command = {}
+    for result in results:
+        by_command.setdefault(result.command or "(unmatched)", []).append(result)
+
+    lines = [f"{len(results)} transcripts in {elapsed:.2f} s "
+             f"({len(results) / elapsed if elapsed else 0:.1f}/s)",
+             f"{'command':<16} {'count':>6} {'failed':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for command, group in sorted(by_command.items(), key=lambda item: -len(item[1])):
+        latencies = sorted(r.latency * 1000 for r in group)
+        failed = sum(1 for r in group if r.state not in ("done", "unmatched"))
+        lines.append(f"{command:<16} {len(group):>6} {failed:>7} {percentile(latencies, 0.5):>9.2f} "
+                     f"{percentile(latencies, 0.95):>9.2f} {latencies[-1]:>9.2f}")
+    mismatches = [r for r in results if r.mismatch]
+    if mismatches:
+        lines.append(f"{len(mismatches)} routed differently than expected:")
+        for r in mismatches[:20]:
+            lines.append(f"  {r.text!r}: expected {r.expected}, got {r.command}")
+    return "\n".join(lines)
+
+
+def run_batch(aalex, transcripts, parallel=1, timeout=30, output=None):
+    """Replay transcripts, optionally several at a time; returns (results in input order, seconds)"""
+    transcripts = list(transcripts)
+    started = time.perf_counter()
+    if parallel > 1:
+        # The executor refuses work beyond its queue limit
+        parallel = min(parallel, aalex.executor.max_pending)
+        with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="aalex-batch") as pool:
+            results = list(pool.map(lambda item: run_transcript(aalex, item[0], item[1], timeout),
+                                    transcripts))
+    else:
+        results = [run_transcript(aalex, text, expected, timeout) for text, expected in transcripts]
+    elapsed = time.perf_counter() - started
+
+    if output:
+        with (sys.stdout if output == "-" else open(output, 'w', encoding='utf-8')) as f:
+            for result in results:
+                f.write(json.dumps(result.to_json()) + "\n")
+    return results, elapsed
+
+
+def repl(aalex, timeout=30):
+    """Read commands from the console (or piped stdin) until EOF or "exit" """
+    interactive = sys.stdin.isatty()
+    if interactive:
+        print("AALEX headless console - type a command, 'exit' to quit")
+    while True:
+        try:
+            line = input("> " if interactive else "")
+        except (EOFError, KeyboardInterrupt):
+            break
+        line = line.strip()
+        if not line:
+            continue
+        if line.lower() in ("exit", "quit"):
+            break
+        # Replies are printed by the assistant itself as it speaks
+        result = run_transcript(aalex, line, timeout=timeout)
+        print(f"  [{result.command or 'no command'}, {result.state}, {result.latency * 1000:.1f} ms]")
+
+
+def main():
+    """Console or batch replay"""
+    parser = argparse.ArgumentParser(description="Drive AALEX from text")
+    parser.add_argument("transcripts", nargs="?",
+                        help="JSONL file of transcripts to replay ('-' for stdin); omit for the console")
+    parser.add_argument("--parallel", type=int, default=1, help="transcripts to run at once")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds to wait for each command")
+    parser.add_argument("--output", help="write one JSON result per transcript here ('-' for stdout)")
+    parser.add_argument("--trace", action="store_true",
+                        help="record per-stage spans to aalex_traces.jsonl and aalex_metrics.prom")
+    parser.add_argument("--platform", default="null",
+                        help="system backend: null (default, no side effects, actions succeed), "
+                             "unsupported (no side effects, actions fail), desktop, windows or linux")
+    parser.add_argument("--test-commands", action="store_true",
+                        help="dry-run every command (and custom trigger) and report pass/fail")
+    args = parser.parse_args()
+
+    aalex = create_assistant(args.platform, quiet=bool(args.transcripts or args.test_commands), trace=args.trace)
+    try:
+        if args.test_commands:
+            started = time.perf_counter()
+            with _silenced():
+                # Results are printed as they arrive, past the silenced replies
+                results = run_command_tests(aalex, parallel=max(args.parallel, 4), timeout=args.timeout,
+                                            on_result=lambda result: print(test_line(result), file=sys.stderr))
+            failed = [r for r in results if r.state != "done" or r.mismatch]
+            print(f"{len(results) - len(failed)}/{len(results)} commands passed in "
+                  f"{time.perf_counter() - started:.2f} s")
+            sys.exit(1 if failed else 0)
+        if not args.transcripts:
+            repl(aalex, args.timeout)
+            return
+        with _silenced():
+            results, elapsed = run_batch(aalex, read_transcripts(args.transcripts), args.parallel,
+                                         args.timeout, args.output if args.output != "-" else None)
+        if args.output == "-":
+            for result in results:
+                print(json.dumps(result.to_json()))
+        print(batch_report(results, elapsed), file=sys.stderr if args.output == "-" else sys.stdout)
+        sys.exit(1 if any(r.mismatch for r in results) else 0)
+    finally:
+        aalex.executor.shutdown()
+        aalex.speech.stop()
+        aalex.tracer.close()
+
+
+if __name__ == "__main__":
+    main()
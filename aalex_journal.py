@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+AALEX Journal - Append-only storage for notes and code snippets
+Every add, delete and clear is one JSON line appended to a log segment, with
+fsyncs batched on a background thread; compaction writes a snapshot with an
+atomic rename and drops the segments it covers. Loading reads the snapshot and
+replays the newer log, so saving costs the same however many notes there are
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+SNAPSHOT_VERSION = 1
+_SEGMENT = re.compile(r"^log\.(\d+)\.jsonl$")
+
+
+class Collection:
+    def __init__(self, journal, name):
+        """An ordered list of JSON values kept in a Journal (use journal.collection(name))"""
+        self.journal = journal
+        self.name = name
+        self._ids = []  # Display order
+        self._values = {}  # id -> value
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        values = self._values
+        return iter([values[i] for i in self._ids])
+
+    def __getitem__(self, index):
+        return self._values[self._ids[index]]
+
+    def append(self, value):
+        """Add a value at the end; returns its id"""
+        with self.journal.lock:
+            item_id = self.journal.next_id
+            self.journal.next_id += 1
+            self._apply({"op": "add", "id": item_id, "value": value})
+            self.journal.write({"op": "add", "c": self.name, "id": item_id, "value": value})
+        return item_id
+
+    def delete_at(self, index):
+        with self.journal.lock:
+            item_id = self._ids[index]
+            self._apply({"op": "delete", "id": item_id})
+            self.journal.write({"op": "delete", "c": self.name, "id": item_id})
+
+    def clear(self):
+        with self.journal.lock:
+            self._apply({"op": "clear"})
+            self.journal.write({"op": "clear", "c": self.name})
+
+    def _apply(self, record, replaying=False):
+        op = record["op"]
+        if op == "add":
+            self._ids.append(record["id"])
+            self._values[record["id"]] = record["value"]
+        elif op == "delete":
+            if self._values.pop(record["id"], None) is not None and not replaying:
+                self._ids.remove(record["id"])
+        elif op == "clear":
+            self._ids = []
+            self._values = {}
+
+    def _restore(self, items):
+        self._ids = [item_id for item_id, _ in items]
+        self._values = dict(items)
+
+
+class JournalStats:
+    def __init__(self):
+        self.appends = 0
+        self.fsyncs = 0
+        self.compactions = 0
+        self.compact_seconds = 0.0
+        self.replayed = 0
+
+    def __repr__(self):
+        return (f"appends={self.appends} fsyncs={self.fsyncs} compactions={self.compactions} "
+                f"last compaction={self.compact_seconds * 1000:.1f} ms replayed={self.replayed}")
+
+
+class Journal:
+    def __init__(self, directory="aalex_journal", fsync_interval=0.05, compact_bytes=1024 * 1024):
+        """Collections of JSON values stored as a snapshot plus an append-only log
+
+        Appends reach the OS at once and disk within fsync_interval seconds.
+        The log is compacted into a new snapshot in the background once it is
+        larger than compact_bytes and than the last snapshot.
+        """
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.compact_bytes = compact_bytes
+        self.collections = {}
+        self.next_id = 1
+        self.seq = 0  # Sequence number of the last logged operation
+        self.lock = threading.RLock()
+        self.stats = JournalStats()
+        self.log = None
+        self.log_bytes = 0
+        self.snapshot_bytes = 0
+        self.dirty = False
+        self.compacting = False
+        self.compact_lock = threading.Lock()  # One compaction at a time
+        self.closed = False
+        self.wake = threading.Event()
+        self.thread = None
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.directory, "snapshot.json")
+
+    def collection(self, name):
+        with self.lock:
+            if name not in self.collections:
+                self.collections[name] = Collection(self, name)
+            return self.collections[name]
+
+    def _segments(self):
+        """(first sequence number, path) of each log segment, oldest first"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        segments = [(int(m.group(1)), os.path.join(self.directory, name))
+                    for name, m in ((name, _SEGMENT.match(name)) for name in names) if m]
+        return sorted(segments)
+
+    def load(self):
+        """Read the latest snapshot, replay the log after it and start the background writer"""
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            snapshot_seq = 0
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+                if snapshot.get("version") == SNAPSHOT_VERSION:
+                    snapshot_seq = snapshot["seq"]
+                    self.next_id = snapshot["next_id"]
+                    for name, items in snapshot["collections"].items():
+                        self.collection(name)._restore([tuple(item) for item in items])
+                self.snapshot_bytes = os.path.getsize(self.snapshot_path)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Journal snapshot unreadable, replaying the log only: {e}")
+            self.seq = snapshot_seq
+
+            touched = set()
+            for _, path in self._segments():
+                with open(path, 'rb') as f:
+                    data = f.read()
+                end = data.rfind(b"\n") + 1
+                if end < len(data):
+                    # A write cut short by a crash; cut it off so later appends start on a clean line
+                    print(f"Journal dropping {len(data) - end} bytes of an unfinished write in {path}")
+                    with open(path, 'r+b') as f:
+                        f.truncate(end)
+                for line in data[:end].splitlines():
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        print(f"Journal skipping bad record in {path}: {line[:80]!r}")
+                        continue
+                    if record["seq"] <= snapshot_seq:
+                        continue
+                    collection = self.collection(record["c"])
+                    collection._apply(record, replaying=True)
+                    touched.add(collection)
+                    if record["op"] == "add":
+                        self.next_id = max(self.next_id, record["id"] + 1)
+                    self.seq = max(self.seq, record["seq"])
+                    self.stats.replayed += 1
+            for collection in touched:
+                # Deletes were only marked while replaying; drop them in one pass
+                collection._ids = [i for i in collection._ids if i in collection._values]
+
+            self._open_segment()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._background, daemon=True, name="aalex-journal")
+            self.thread.start()
+        return self
+
+    def _open_segment(self):
+        """Start a new log segment for operations after self.seq"""
+        if self.log:
+            self.log.flush()
+            os.fsync(self.log.fileno())
+            self.log.close()
+        path = os.path.join(self.directory, f"log.{self.seq + 1:012d}.jsonl")
+        self.log = open(path, 'ab')
+        self.log_bytes = 0
+
+    def write(self, record):
+        """Log one operation (callers hold self.lock and have already applied it)"""
+        self.seq += 1
+        record["seq"] = self.seq
+        line = (json.dumps(record, separators=(',', ':')) + "\n").encode('utf-8')
+        self.log.write(line)
+        self.log.flush()  # Safe from a crash of this process; fsync follows shortly
+        self.log_bytes += len(line)
+        self.stats.appends += 1
+        if not self.dirty:
+            self.dirty = True
+            self.wake.set()
+
+    def flush(self):
+        """fsync everything logged so far"""
+        with self.lock:
+            if self.dirty and self.log:
+                os.fsync(self.log.fileno())
+                self.dirty = False
+                self.stats.fsyncs += 1
+
+    def _background(self):
+        while not self.closed:
+            self.wake.wait()
+            self.wake.clear()
+            # Let a burst of appends share one fsync
+            time.sleep(self.fsync_interval)
+            try:
+                self.flush()
+                if self.log_bytes > max(self.compact_bytes, self.snapshot_bytes) and not self.compacting:
+                    self.compact()
+            except (OSError, ValueError) as e:
+                print(f"Journal write error: {e}")
+
+    def compact(self):
+        """Write a snapshot of everything logged so far and delete the log it replaces"""
+        with self.compact_lock:
+            self._compact()
+
+    def _compact(self):
+        started = time.perf_counter()
+        with self.lock:
+            if self.closed:
+                return
+            self.compacting = True
+            # New operations go to a fresh segment while the snapshot is written
+            seq = self.seq
+            state = {name: (list(c._ids), dict(c._values)) for name, c in self.collections.items()}
+            next_id = self.next_id
+            self._open_segment()
+            self.dirty = False
+        try:
+            snapshot = {"version": SNAPSHOT_VERSION, "seq": seq, "next_id": next_id,
+                        "collections": {name: [[i, values[i]] for i in ids] for name, (ids, values) in state.items()}}
+            temp = self.snapshot_path + ".tmp"
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.snapshot_path)
+            self.snapshot_bytes = os.path.getsize(self.snapshot_path)
+            # Segments that hold only operations up to seq are now covered by the snapshot
+            for first, path in self._segments():
+                if first <= seq:
+                    os.remove(path)
+            self.stats.compactions += 1
+            self.stats.compact_seconds = time.perf_counter() - started
+        finally:
+            self.compacting = False
+
+    def close(self):
+        """Flush and stop the background writer, waiting for a compaction in progress"""
+        with self.lock:
+            self.closed = True
+            self.wake.set()
+            if self.log:
+                self.flush()
+                self.log.close()
+                self.log = None
+        if self.thread:
+            self.thread.join()
+
+
+def main():
+    """Show that an append costs the same with 1,000 or 100,000 notes, and time load and compaction"""
+    import tempfile
+    print("AALEX Journal - notes store check")
+    print("=" * 50)
+    directory = tempfile.mkdtemp()
+    journal = Journal(directory).load()
+    notes = journal.collection("notes")
+    for target in (1000, 10000, 100000):
+        while len(notes) < target - 1000:
+            notes.append(f"note {len(notes)}")
+        started = time.perf_counter()
+        for _ in range(1000):
+            notes.append(f"[12:00] note number {len(notes)}")
+        per_append_us = (time.perf_counter() - started) / 1000 * 1e6
+        print(f"{len(notes):>7} notes: {per_append_us:.1f} us per append")
+    notes.delete_at(5)
+    journal.flush()
+
+    started = time.perf_counter()
+    journal.compact()
+    print(f"compaction: {(time.perf_counter() - started) * 1000:.1f} ms")
+    for _ in range(10):
+        notes.append("after the snapshot")
+    journal.close()
+
+    started = time.perf_counter()
+    reloaded = Journal(directory).load()
+    print(f"reload: {len(reloaded.collection('notes'))} notes in {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"({reloaded.stats.replayed} replayed from the log)")
+    print(journal.stats)
+    reloaded.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+AALEX Metrics - Always-on latency histograms for the performance dashboard
+Fixed-size log-bucketed histograms with one shard per recording thread, so the
+pipeline never takes a lock to record and memory does not grow with uptime
+"""
+
+import math
+import threading
+import time
+from array import array
+
+MIN_SECONDS = 0.0001  # Everything faster lands in the first bucket
+BUCKETS_PER_DOUBLING = 4  # Neighbouring buckets differ by 19%
+BUCKET_COUNT = 84  # 100 us up to about 200 s; slower values share the last bucket
+_SCALE = BUCKETS_PER_DOUBLING / math.log(2)
+_LOG_MIN = math.log(MIN_SECONDS)
+
+
+def bucket_index(seconds):
+    """Histogram bucket a duration falls in"""
+    if seconds < MIN_SECONDS:
+        return 0
+    return min(BUCKET_COUNT - 1, 1 + int((math.log(seconds) - _LOG_MIN) * _SCALE))
+
+
+def bucket_value(index):
+    """Representative duration of a bucket (the geometric middle of its range)"""
+    if index == 0:
+        return MIN_SECONDS / 2
+    return MIN_SECONDS * 2 ** ((index - 0.5) / BUCKETS_PER_DOUBLING)
+
+
+class ShardedCounters:
+    def __init__(self, width):
+        """width numbers, kept per recording thread and summed when read
+
+        Each thread only ever writes its own array, so recording needs no lock.
+        A thread that exits leaves its shard to the next new thread, so the
+        number of shards is bounded by the threads recording at the same time.
+        """
+        self.width = width
+        self._local = threading.local()
+        self._shards = []  # [thread, array] pairs
+        self._lock = threading.Lock()  # Only taken the first time a thread records
+
+    def shard(self):
+        """This thread's array"""
+        values = getattr(self._local, 'values', None)
+        if values is None:
+            values = self._adopt()
+        return values
+
+    def _adopt(self):
+        thread = threading.current_thread()
+        with self._lock:
+            for pair in self._shards:
+                if not pair[0].is_alive():
+                    pair[0] = thread
+                    values = pair[1]
+                    break
+            else:
+                values = array('d', bytes(8 * self.width))
+                self._shards.append([thread, values])
+        self._local.values = values
+        return values
+
+    def add(self, index, amount=1):
+        self.shard()[index] += amount
+
+    def totals(self):
+        """Sum of every shard (a moment's worth of concurrent updates may be missing)"""
+        totals = [0.0] * self.width
+        for _, values in list(self._shards):
+            for i, value in enumerate(values):
+                totals[i] += value
+        return totals
+
+
+class LogHistogram(ShardedCounters):
+    def __init__(self):
+        """Latency histogram in BUCKET_COUNT log-spaced buckets plus a running sum"""
+        super().__init__(BUCKET_COUNT + 1)
+
+    def record(self, seconds):
+        values = self.shard()
+        values[bucket_index(seconds)] += 1
+        values[BUCKET_COUNT] += seconds
+
+    def summary(self, quantiles=(0.5, 0.95, 0.99)):
+        """(count, mean seconds, [seconds at each quantile]) from one read of the shards"""
+        totals = self.totals()
+        counts = totals[:BUCKET_COUNT]
+        count = int(sum(counts))
+        if not count:
+            return 0, 0.0, [0.0] * len(quantiles)
+        values = []
+        for quantile in quantiles:
+            rank = quantile * count
+            seen = 0
+            for index, bucket in enumerate(counts):
+                seen += bucket
+                if seen >= rank and bucket:
+                    values.append(bucket_value(index))
+                    break
+            else:
+                values.append(bucket_value(BUCKET_COUNT - 1))
+        return count, totals[BUCKET_COUNT] / count, values
+
+
+class CommandStats:
+    __slots__ = ("latency", "outcomes")
+
+    # Slots of outcomes
+    FAILED, TIMED_OUT, CANCELLED = range(3)
+
+    def __init__(self):
+        """Latency from request to finish, and how many runs did not succeed"""
+        self.latency = LogHistogram()
+        self.outcomes = ShardedCounters(3)
+
+
+class PerformanceMetrics:
+    # Slots of the recognition counters
+    ATTEMPTS, HEARD = range(2)
+
+    def __init__(self):
+        """Per-command latency, recognition success and speech time since start"""
+        self.started = time.monotonic()
+        self.commands = {}  # name -> CommandStats; one per command name, so bounded
+        self.recognition = LogHistogram()
+        self.recognition_counts = ShardedCounters(2)
+        self.speech = LogHistogram()
+        self.speech_wait = LogHistogram()
+
+    def command(self, name):
+        stats = self.commands.get(name)
+        if stats is None:
+            # setdefault keeps whichever thread got there first
+            stats = self.commands.setdefault(name, CommandStats())
+        return stats
+
+    def record_command(self, name, seconds, state="done"):
+        """A finished CommandTask: seconds from submit to finish, state as the executor left it"""
+        stats = self.command(name)
+        stats.latency.record(seconds)
+        if state == "failed":
+            stats.outcomes.add(CommandStats.FAILED)
+        elif state == "timed out":
+            stats.outcomes.add(CommandStats.TIMED_OUT)
+        elif state == "cancelled":
+            stats.outcomes.add(CommandStats.CANCELLED)
+
+    def record_recognition(self, seconds, heard):
+        """One recognition attempt; seconds may be None when the time is not comparable"""
+        counts = self.recognition_counts.shard()
+        counts[self.ATTEMPTS] += 1
+        if heard:
+            counts[self.HEARD] += 1
+        if seconds is not None:
+            self.recognition.record(seconds)
+
+    def record_speech(self, seconds, waited):
+        """One finished utterance: time speaking and time queued before it"""
+        self.speech.record(seconds)
+        self.speech_wait.record(waited)
+
+    def snapshot(self):
+        """Everything the dashboard shows, as plain numbers"""
+        commands = []
+        for name, stats in sorted(list(self.commands.items())):
+            count, mean, (p50, p95, p99) = stats.latency.summary()
+            failed, timed_out, cancelled = stats.outcomes.totals()
+            commands.append({"command": name, "count": count, "failed": int(failed),
+                             "timed_out": int(timed_out), "cancelled": int(cancelled),
+                             "mean": mean, "p50": p50, "p95": p95, "p99": p99})
+        attempts, heard = self.recognition_counts.totals()
+        _, recognition_mean, (recognition_p50, recognition_p95) = self.recognition.summary((0.5, 0.95))
+        spoken, speech_mean, (speech_p50, speech_p95) = self.speech.summary((0.5, 0.95))
+        _, _, (wait_p50, wait_p95) = self.speech_wait.summary((0.5, 0.95))
+        return {"uptime": time.monotonic() - self.started, "commands": commands,
+                "recognition": {"attempts": int(attempts), "heard": int(heard),
+                                "rate": heard / attempts if attempts else 0.0, "mean": recognition_mean,
+                                "p50": recognition_p50, "p95": recognition_p95},
+                "speech": {"count": spoken, "mean": speech_mean, "p50": speech_p50, "p95": speech_p95,
+                           "wait_p50": wait_p50, "wait_p95": wait_p95}}
+
+
+def main():
+    """Time a record, check quantile error against exact values and show memory stays flat"""
+    import random
+    import tracemalloc
+    print("AALEX Metrics - histogram check")
+    print("=" * 50)
+    histogram = LogHistogram()
+    samples = [random.lognormvariate(math.log(0.05), 1.0) for _ in range(200000)]
+
+    started = time.perf_counter()
+    for seconds in samples:
+        histogram.record(seconds)
+    print(f"record: {(time.perf_counter() - started) / len(samples) * 1e9:.0f} ns")
+
+    started = time.perf_counter()
+    count, mean, estimates = histogram.summary()
+    print(f"summary of {count} values: {(time.perf_counter() - started) * 1e6:.0f} us")
+    ordered = sorted(samples)
+    for quantile, estimate in zip((0.5, 0.95, 0.99), estimates):
+        exact = ordered[int(quantile * (len(ordered) - 1))]
+        print(f"  p{int(quantile * 100):<3} {estimate * 1000:8.2f} ms (exact {exact * 1000:8.2f} ms, "
+              f"{(estimate - exact) / exact * 100:+.1f}%)")
+
+    metrics = PerformanceMetrics()
+    tracemalloc.start()
+    total = 0
+    for rounds in (1, 10):
+        for _ in range(rounds * 10000):
+            metrics.record_command("time", random.random() / 10)
+        threads = [threading.Thread(target=metrics.record_command, args=("joke", 0.01)) for _ in range(50)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        total += rounds * 10000 + len(threads)
+        current, _ = tracemalloc.get_traced_memory()
+        print(f"after {total} records: {current} bytes traced, "
+              f"{len(metrics.command('joke').latency._shards)} shard(s) for 50 short-lived threads")
+    tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+AALEX Platform - Lazy imports and per-OS system control backends
+Heavy and platform-specific modules load on first use, so the assistant starts
+quickly and imports on any OS; run this file for an import-time report
+"""
+
+import importlib
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+# Module name -> seconds spent importing it on first use
+IMPORT_TIMES = {}
+
+STARTUP_BUDGET_MS = 300
+COMMAND_WAIT_SECONDS = 2  # How long a custom command may take to fail before it counts as started
+
+
+class LazyModule:
+    def __init__(self, name):
+        """Stand-in for a module that is imported on first attribute access"""
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            started = time.perf_counter()
+            self._module = importlib.import_module(self._name)
+            IMPORT_TIMES[self._name] = time.perf_counter() - started
+        return self._module
+
+    def __getattr__(self, attribute):
+        return getattr(self._load(), attribute)
+
+    def __repr__(self):
+        state = "loaded" if self._module else "not loaded"
+        return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_module(name):
+    """A module proxy that defers the import until it is used"""
+    return LazyModule(name)
+
+
+def _run(*command):
+    """Run a system command, True if it succeeded"""
+    try:
+        return subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              timeout=10).returncode == 0
+    except (OSError, subprocess.SubprocessError):
+        return False
+
+
+class NullBackend:
+    """Does nothing and records what it was asked to do (headless runs and tests)
+
+    Every backend method returns True when the action was carried out. The
+    null backend pretends it was (succeed=True), so dry runs exercise the
+    handlers' success paths, or reports every action as unsupported.
+    """
+    name = "null"
+
+    def __init__(self, succeed=True):
+        self.actions = []
+        self.succeed = succeed
+
+    def _record(self, *action):
+        self.actions.append(action)
+        return self.succeed
+
+    def volume(self, direction, steps=5):
+        """direction is "up", "down" or "mute" """
+        return self._record("volume", direction, steps)
+
+    def brightness(self, direction, step=10):
+        return self._record("brightness", direction, step)
+
+    def screenshot(self, path):
+        return self._record("screenshot", path)
+
+    def shutdown(self):
+        return self._record("shutdown")
+
+    def restart(self):
+        return self._record("restart")
+
+    def sleep(self):
+        return self._record("sleep")
+
+    def active_window_title(self):
+        self._record("active_window_title")
+        return ""
+
+    def screen_size(self):
+        return None
+
+    def open_url(self, url):
+        return self._record("open_url", url)
+
+    def launch(self, catalog, entry):
+        """Start an application found in an AppCatalog"""
+        return self._record("launch", entry.name)
+
+    def terminate(self, tracker, name):
+        """End processes called name through a ProcessTracker, returns how many ended"""
+        return 1 if self._record("terminate", name) else 0
+
+    def run_command(self, command):
+        """Start a program for a custom command: an argument list, or on Windows a command line"""
+        return self._record("run_command", command)
+
+
+class DesktopBackend(NullBackend):
+    """Actions that work the same on every desktop OS (used as is on macOS)
+
+    Everything else is reported as unsupported.
+    """
+    name = "desktop"
+
+    def __init__(self):
+        super().__init__(succeed=False)
+
+    def open_url(self, url):
+        return lazy_module("webbrowser").open(url)
+
+    def launch(self, catalog, entry):
+        try:
+            catalog.launch(entry)
+        except OSError as e:
+            print(f"Could not open {entry.name}: {e}")
+            return False
+        return True
+
+    def terminate(self, tracker, name):
+        return tracker.terminate(name)
+
+    def run_command(self, command, wait=COMMAND_WAIT_SECONDS):
+        """Start the program detached; True unless it fails to start or exits with an error within wait seconds
+
+        GUI programs and long scripts keep running after this returns and are never killed.
+        """
+        if sys.platform == 'win32':
+            options = {"creationflags": subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP}
+        else:
+            options = {"start_new_session": True}
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                       stderr=subprocess.DEVNULL, **options)
+        except (OSError, ValueError):
+            return False
+        try:
+            return process.wait(timeout=wait) == 0
+        except subprocess.TimeoutExpired:
+            return True  # Still running
+
+
+class WindowsBackend(DesktopBackend):
+    name = "windows"
+
+    def __init__(self):
+        super().__init__()
+        self.pyautogui = lazy_module("pyautogui")
+        self.win32gui = lazy_module("win32gui")
+
+    def volume(self, direction, steps=5):
+        key = {"up": "volumeup", "down": "volumedown", "mute": "volumemute"}[direction]
+        for _ in range(1 if direction == "mute" else steps):
+            self.pyautogui.press(key)
+        return True
+
+    def brightness(self, direction, step=10):
+        delta = step if direction == "up" else -step
+        script = ("$m = Get-CimInstance -Namespace root/WMI -ClassName WmiMonitorBrightness; "
+                  f"$level = [Math]::Max(0, [Math]::Min(100, $m.CurrentBrightness + ({delta}))); "
+                  "Get-CimInstance -Namespace root/WMI -ClassName WmiMonitorBrightnessMethods | "
+                  "Invoke-CimMethod -MethodName WmiSetBrightness -Arguments @{Timeout=1; Brightness=$level}")
+        return _run("powershell", "-NoProfile", "-Command", script)
+
+    def screenshot(self, path):
+        self.pyautogui.screenshot().save(path)
+        return True
+
+    def shutdown(self):
+        return _run("shutdown", "/s", "/t", "0")
+
+    def restart(self):
+        return _run("shutdown", "/r", "/t", "0")
+
+    def sleep(self):
+        return _run("rundll32.exe", "powrprof.dll,SetSuspendState", "0,1,0")
+
+    def active_window_title(self):
+        return self.win32gui.GetWindowText(self.win32gui.GetForegroundWindow())
+
+    def screen_size(self):
+        return tuple(self.pyautogui.size())
+
+
+class LinuxBackend(DesktopBackend):
+    """Linux desktop with PulseAudio/PipeWire or ALSA, systemd and X11 tools where installed"""
+    name = "linux"
+
+    def volume(self, direction, steps=5):
+        if shutil.which("pactl"):
+            if direction == "mute":
+                return _run("pactl", "set-sink-mute", "@DEFAULT_SINK@", "toggle")
+            return _run("pactl", "set-sink-volume", "@DEFAULT_SINK@",
+                        f"{'+' if direction == 'up' else '-'}{steps * 2}%")
+        if shutil.which("amixer"):
+            if direction == "mute":
+                return _run("amixer", "-q", "set", "Master", "toggle")
+            return _run("amixer", "-q", "set", "Master", f"{steps * 2}%{'+' if direction == 'up' else '-'}")
+        return False
+
+    def brightness(self, direction, step=10):
+        if shutil.which("brightnessctl"):
+            return _run("brightnessctl", "-q", "set", f"{step}%{'+' if direction == 'up' else '-'}")
+        if shutil.which("xbacklight"):
+            return _run("xbacklight", "-inc" if direction == "up" else "-dec", str(step))
+        return False
+
+    def screenshot(self, path):
+        for command in (["gnome-screenshot", "-f", path], ["scrot", "-o", path], ["grim", path],
+                        ["import", "-window", "root", path]):
+            if shutil.which(command[0]) and _run(*command):
+                return True
+        if os.environ.get("DISPLAY"):
+            lazy_module("pyautogui").screenshot().save(path)
+            return True
+        return False
+
+    def shutdown(self):
+        return _run("systemctl", "poweroff")
+
+    def restart(self):
+        return _run("systemctl", "reboot")
+
+    def sleep(self):
+        return _run("systemctl", "suspend")
+
+    def active_window_title(self):
+        if shutil.which("xdotool"):
+            try:
+                return subprocess.run(["xdotool", "getactivewindow", "getwindowname"], capture_output=True,
+                                      text=True, timeout=2).stdout.strip()
+            except (OSError, subprocess.SubprocessError):
+                pass
+        return ""
+
+    def screen_size(self):
+        if shutil.which("xrandr"):
+            try:
+                output = subprocess.run(["xrandr", "--current"], capture_output=True, text=True,
+                                        timeout=2).stdout
+                match = re.search(r"current (\d+) x (\d+)", output)
+                if match:
+                    return int(match.group(1)), int(match.group(2))
+            except (OSError, subprocess.SubprocessError):
+                pass
+        return None
+
+
+class UnsupportedBackend(NullBackend):
+    """Null backend that reports every action as unsupported (tests the handlers' failure paths)"""
+    name = "unsupported"
+
+    def __init__(self):
+        super().__init__(succeed=False)
+
+
+BACKENDS = {"windows": WindowsBackend, "linux": LinuxBackend, "desktop": DesktopBackend, "null": NullBackend,
+            "unsupported": UnsupportedBackend}
+
+
+def get_backend(name=None):
+    """Backend for this OS, or the one named by name or the AALEX_PLATFORM variable"""
+    name = name or os.environ.get("AALEX_PLATFORM")
+    if not name:
+        if sys.platform == "win32":
+            name = "windows"
+        elif sys.platform.startswith("linux"):
+            name = "linux"
+        else:
+            # macOS and anything else: URLs, apps and programs, no system controls
+            name = "desktop"
+    return BACKENDS[name]()
+
+
+def import_time_report(module="aalex", budget_ms=STARTUP_BUDGET_MS, top=15):
+    """Import a module in a fresh interpreter and break the time down by top-level package
+
+    Returns (total ms, [(package, ms)] slowest first); total is None if the import failed.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    packages = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue
+        name = parts[2].strip()
+        packages[name.split(".")[0]] = packages.get(name.split(".")[0], 0) + self_us
+        if name == module:
+            total_us = cumulative_us
+    breakdown = sorted(((name, us / 1000) for name, us in packages.items()), key=lambda item: -item[1])
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "unknown error"
+        print(f"import {module} failed: {error}")
+        return None, breakdown
+
+    total_ms = total_us / 1000
+    status = "within" if total_ms <= budget_ms else "OVER"
+    print(f"import {module}: {total_ms:.1f} ms ({status} the {budget_ms} ms budget)")
+    for name, ms in breakdown[:top]:
+        print(f"  {name:<28} {ms:8.1f} ms")
+    return total_ms, breakdown
+
+
+def lazy_import_report():
+    """Modules loaded lazily so far in this process and what they cost"""
+    lines = [f"{name}: {seconds * 1000:.1f} ms" for name, seconds in
+             sorted(IMPORT_TIMES.items(), key=lambda item: -item[1])]
+    return "\n".join(lines) or "no lazy imports yet"
+
+
+def main():
+    """Print the import-time report for the assistant and the GUI"""
+    print("AALEX Platform - startup report")
+    print("=" * 50)
+    print(f"backend: {get_backend().name}")
+    failed = False
+    for module in sys.argv[1:] or ["aalex", "aalex_gui"]:
+        total_ms, _ = import_time_report(module)
+        failed = failed or total_ms is None or total_ms > STARTUP_BUDGET_MS
+        print()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+AALEX Preprocess - Shrink captured audio before it is sent for recognition
+Downmix to mono, polyphase resample to 16 kHz and FLAC-encode in-process,
+recording how many bytes each request sends and how long encoding took
+"""
+
+import io
+import math
+import time
+import numpy as np
+import speech_recognition as sr
+
+from aalex_vad import pcm_to_array
+
+TARGET_RATE = 16000
+_filters = {}
+
+
+def downmix(samples, channels):
+    """Average interleaved channels into mono"""
+    if channels <= 1:
+        return samples
+    return samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+
+
+def _polyphase_filter(up, down, half_width=10, beta=5.0):
+    """Kaiser-windowed sinc low-pass split into one row per phase"""
+    key = (up, down)
+    if key not in _filters:
+        factor = max(up, down)
+        length = 2 * half_width * factor + 1
+        n = np.arange(length) - (length - 1) / 2
+        taps = np.sinc(n / factor) * np.kaiser(length, beta) * up / factor
+        per_phase = math.ceil(length / up)
+        padded = np.zeros(per_phase * up)
+        padded[:length] = taps
+        # Row p holds taps p, p + up, p + 2 * up, ...
+        _filters[key] = (padded.reshape(per_phase, up).T.astype(np.float32), (length - 1) // 2)
+    return _filters[key]
+
+
+def resample(samples, rate, target=TARGET_RATE, block=16384):
+    """Rational-ratio polyphase resampling, vectorized over blocks of output samples"""
+    if rate == target or len(samples) == 0:
+        return samples
+    divisor = math.gcd(rate, target)
+    up, down = target // divisor, rate // divisor
+    phases, delay = _polyphase_filter(up, down)
+    per_phase = phases.shape[1]
+
+    # Pad so every output sample can read a full set of input taps
+    padded = np.concatenate((np.zeros(per_phase, dtype=np.float32), samples.astype(np.float32),
+                             np.zeros(per_phase, dtype=np.float32)))
+    count = len(samples) * up // down
+    out = np.empty(count, dtype=np.float32)
+    taps = np.arange(per_phase)
+    for start in range(0, count, block):
+        positions = np.arange(start, min(count, start + block)) * down + delay
+        phase = positions % up
+        base = positions // up + per_phase
+        window = padded[base[:, None] - taps[None, :]]
+        out[start:start + len(positions)] = np.einsum('ij,ij->i', window, phases[phase])
+    return out
+
+
+def encode_flac(frame_data, sample_rate):
+    """FLAC-encode 16-bit mono PCM in-process, or None if no encoder is installed"""
+    try:
+        import soundfile
+    except ImportError:
+        return None
+    buffer = io.BytesIO()
+    samples = np.frombuffer(frame_data, dtype='<i2')
+    soundfile.write(buffer, samples, sample_rate, format='FLAC', subtype='PCM_16')
+    return buffer.getvalue()
+
+
+class PayloadStats:
+    def __init__(self, original_bytes, original_rate):
+        """What one recognition request cost on the wire"""
+        self.original_bytes = original_bytes
+        self.original_rate = original_rate
+        self.prepared_bytes = 0
+        self.sent_bytes = 0
+        self.resample_seconds = 0.0
+        self.encode_seconds = 0.0
+        self.in_process = False
+
+    def __str__(self):
+        return (f"sent {self.sent_bytes / 1024:.1f} KB (raw {self.original_bytes / 1024:.1f} KB "
+                f"at {self.original_rate} Hz), resample {self.resample_seconds * 1000:.1f} ms, "
+                f"encode {self.encode_seconds * 1000:.1f} ms"
+                f"{'' if self.in_process else ' (external flac)'}")
+
+
+class PreparedAudioData(sr.AudioData):
+    """AudioData that hands recognizers a FLAC payload encoded in-process
+
+    Backends that ask for other formats still get the 16 kHz mono PCM.
+    """
+
+    def __init__(self, frame_data, sample_rate, sample_width, stats):
+        super().__init__(frame_data, sample_rate, sample_width)
+        self.stats = stats
+        self.flac = None
+
+    def get_flac_data(self, convert_rate=None, convert_width=None):
+        compatible = (convert_rate in (None, self.sample_rate)
+                      and convert_width in (None, self.sample_width))
+        started = time.perf_counter()
+        if compatible and self.flac is None:
+            self.flac = encode_flac(self.frame_data, self.sample_rate)
+        if compatible and self.flac is not None:
+            data = self.flac
+            self.stats.in_process = True
+        else:
+            data = super().get_flac_data(convert_rate, convert_width)
+        self.stats.encode_seconds += time.perf_counter() - started
+        self.stats.sent_bytes = len(data)
+        return data
+
+
+def prepare(audio, channels=1, target_rate=TARGET_RATE):
+    """Downmix and resample AudioData to 16-bit mono at target_rate"""
+    stats = PayloadStats(len(audio.frame_data), audio.sample_rate)
+    started = time.perf_counter()
+    samples = downmix(pcm_to_array(audio.frame_data, audio.sample_width), channels)
+    # Scale to 16-bit, since that is what every recognizer wants in the end
+    samples = samples * (2 ** (16 - 8 * audio.sample_width))
+    rate = audio.sample_rate
+    if rate > target_rate:
+        samples = resample(samples, rate, target_rate)
+        rate = target_rate
+    frame_data = np.clip(np.round(samples), -32768, 32767).astype('<i2').tobytes()
+    stats.resample_seconds = time.perf_counter() - started
+    stats.prepared_bytes = len(frame_data)
+    return PreparedAudioData(frame_data, rate, 2, stats)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+AALEX Processes - Incremental process table for top-N and name lookups
+Keeps psutil.Process handles across scans so CPU percentages are measured over
+the scan interval, diffs PIDs instead of rebuilding, and answers top-N queries
+from per-scan heaps
+"""
+
+import heapq
+import os
+import threading
+import time
+
+import psutil
+
+_GONE = (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess)
+MIN_PREFIX = 3  # Shortest partial name that may match a process
+
+
+def normalize_name(name):
+    """Lowercase process name without the .exe suffix"""
+    name = (name or "").lower()
+    return name[:-4] if name.endswith(".exe") else name
+
+
+class ProcessEntry:
+    __slots__ = ("pid", "name", "key", "handle", "cpu", "rss")
+
+    def __init__(self, pid, name, handle):
+        """One tracked process"""
+        self.pid = pid
+        self.name = name
+        self.key = normalize_name(name)
+        self.handle = handle
+        self.cpu = 0.0
+        self.rss = 0
+
+    def __repr__(self):
+        return f"ProcessEntry({self.pid}, {self.name!r}, cpu={self.cpu:.1f}%, rss={self.rss // 2**20} MB)"
+
+
+def heap_top(heap, n):
+    """The n smallest items of a heap in order, visiting O(n log n) nodes instead of all of it"""
+    if not heap or n <= 0:
+        return []
+    result = []
+    frontier = [(heap[0], 0)]
+    while frontier and len(result) < n:
+        item, index = heapq.heappop(frontier)
+        result.append(item)
+        for child in (2 * index + 1, 2 * index + 2):
+            if child < len(heap):
+                heapq.heappush(frontier, (heap[child], child))
+    return result
+
+
+class ProcessTracker:
+    def __init__(self):
+        """Process table updated in place by scan()"""
+        self.entries = {}  # pid -> ProcessEntry
+        self.by_name = {}  # normalized name -> set of pids
+        self.heaps = {"cpu": [], "rss": []}  # (-value, pid), rebuilt once per scan
+        self.lock = threading.Lock()
+        self.scan_lock = threading.Lock()  # One scan at a time; readers only wait on self.lock
+        self.scans = 0
+        self.scan_seconds = 0.0
+        self.added = 0
+        self.removed = 0
+
+    def scan(self):
+        """Diff the PID list against the table, then refresh CPU and memory of every process"""
+        with self.scan_lock:
+            return self._scan()
+
+    def _scan(self):
+        started = time.perf_counter()
+        current = set(psutil.pids())
+        with self.lock:
+            known = set(self.entries)
+        gone = known - current
+
+        new_entries = {}
+        for pid in current - known:
+            try:
+                handle = psutil.Process(pid)
+                entry = ProcessEntry(pid, handle.name(), handle)
+                # The first cpu_percent call only sets the baseline for the next scan
+                handle.cpu_percent(interval=None)
+                new_entries[pid] = entry
+            except _GONE:
+                pass
+
+        with self.lock:
+            existing = [entry for pid, entry in self.entries.items() if pid not in gone]
+        for entry in existing:
+            try:
+                # is_running also catches a PID reused by a new process
+                if not entry.handle.is_running():
+                    gone.add(entry.pid)
+                    continue
+                with entry.handle.oneshot():
+                    entry.cpu = entry.handle.cpu_percent(interval=None)
+                    entry.rss = entry.handle.memory_info().rss
+            except _GONE:
+                gone.add(entry.pid)
+        for entry in new_entries.values():
+            try:
+                entry.rss = entry.handle.memory_info().rss
+            except _GONE:
+                pass
+
+        with self.lock:
+            for pid in gone:
+                entry = self.entries.pop(pid, None)
+                if entry:
+                    pids = self.by_name.get(entry.key)
+                    if pids:
+                        pids.discard(pid)
+                        if not pids:
+                            del self.by_name[entry.key]
+            for pid, entry in new_entries.items():
+                self.entries[pid] = entry
+                self.by_name.setdefault(entry.key, set()).add(pid)
+
+            cpu = [(-entry.cpu, pid) for pid, entry in self.entries.items()]
+            rss = [(-entry.rss, pid) for pid, entry in self.entries.items()]
+            heapq.heapify(cpu)
+            heapq.heapify(rss)
+            self.heaps = {"cpu": cpu, "rss": rss}
+
+            self.added += len(new_entries)
+            self.removed += len(gone)
+            self.scans += 1
+        self.scan_seconds = time.perf_counter() - started
+        return len(new_entries), len(gone)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def top(self, n=5, by="cpu"):
+        """Busiest n processes by "cpu" or "rss" as of the last scan"""
+        with self.lock:
+            heap = self.heaps[by]
+            return [self.entries[pid] for _, pid in heap_top(heap, n) if pid in self.entries]
+
+    def find(self, name):
+        """Processes with exactly this name, else those of the one name starting with it
+
+        A prefix only counts when it is at least MIN_PREFIX characters long and
+        every process it matches has the same name, so "close system" never
+        reaches systemd and systemd-logind at once.
+        """
+        key = normalize_name(name.strip())
+        if not key:
+            return []
+        with self.lock:
+            pids = set(self.by_name.get(key, ()))
+            if not pids:
+                names = self._prefixed(key)
+                if len(names) == 1:
+                    pids = set(self.by_name[names[0]])
+            return [self.entries[pid] for pid in sorted(pids) if pid in self.entries]
+
+    def candidates(self, name):
+        """Running process names that start with name, for asking which one was meant"""
+        key = normalize_name(name.strip())
+        with self.lock:
+            return self._prefixed(key) if key else []
+
+    def _prefixed(self, key):
+        if len(key) < MIN_PREFIX:
+            return []
+        return sorted(other for other, pids in self.by_name.items() if pids and other.startswith(key))
+
+    def terminate(self, name, timeout=3):
+        """Ask matching processes to exit; returns how many ended
+
+        Processes with exactly this name are killed if they do not exit within
+        timeout. A prefix match is only asked to exit, never killed.
+        """
+        matches = self.find(name)
+        if not matches:
+            # Started since the last scan
+            self.scan()
+            matches = self.find(name)
+        exact = all(entry.key == normalize_name(name.strip()) for entry in matches)
+        own = os.getpid()
+        handles = [entry.handle for entry in matches if entry.pid != own]
+        for handle in handles:
+            try:
+                handle.terminate()
+            except _GONE:
+                pass
+        gone, alive = psutil.wait_procs(handles, timeout=timeout)
+        if exact:
+            for handle in alive:
+                try:
+                    handle.kill()
+                except _GONE:
+                    pass
+            if alive:
+                gone += psutil.wait_procs(alive, timeout=timeout)[0]
+        return len(gone)
+
+
+def main():
+    """Time full and incremental scans and print the busiest processes"""
+    print("AALEX Processes - tracker check")
+    print("=" * 50)
+    tracker = ProcessTracker()
+    tracker.scan()
+    print(f"first scan: {len(tracker)} processes in {tracker.scan_seconds * 1000:.1f} ms")
+    time.sleep(1)
+    added, removed = tracker.scan()
+    print(f"rescan: +{added} -{removed} in {tracker.scan_seconds * 1000:.1f} ms")
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        tracker.top(5, "cpu")
+    print(f"top 5 query: {(time.perf_counter() - started) * 1000:.1f} us")
+    for entry in tracker.top(5, "cpu"):
+        print(f"  {entry}")
+    print("by memory:")
+    for entry in tracker.top(5, "rss"):
+        print(f"  {entry}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+AALEX Profiling - On-demand CPU and memory profiles of real commands
+Profiles the next N commands, or every command in a time window, with cProfile
+and tracemalloc, and writes .pstats files and allocation reports to a directory.
+While no session is running the only cost is one attribute check per command
+"""
+
+import io
+import os
+import threading
+import time
+import tracemalloc
+
+from aalex_platform import lazy_module
+
+# pstats pulls in dataclasses and inspect; load them when a session first needs them
+cProfile = lazy_module("cProfile")
+pstats = lazy_module("pstats")
+
+PROFILE_DIR = "aalex_profiles"
+MAX_SECONDS = 300  # Longest a session waits for its commands
+
+
+class ProfileSession:
+    def __init__(self, profiler, calls, seconds):
+        """One profiling run; calls and seconds are limits, either may be None"""
+        self.profiler = profiler
+        self.calls = calls
+        self.seconds = seconds
+        self.claimed = 0
+        self.in_flight = 0
+        self.skipped = 0  # Calls that could not be profiled (another profiler was active)
+        self.profiles = []
+        self.commands = []
+        self.closed = False
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.timer = None
+        self.baseline = None
+        self.started_tracemalloc = False
+
+    def claim(self, name):
+        """Count a command against the session, False if the session is already full"""
+        with self.lock:
+            if self.closed or (self.calls is not None and self.claimed >= self.calls):
+                return False
+            self.claimed += 1
+            self.in_flight += 1
+            self.commands.append(name)
+            return True
+
+    def release(self, profile=None):
+        """A claimed command finished (or never ran)"""
+        with self.lock:
+            if profile is not None and not self.closed:
+                self.profiles.append(profile)
+            self.in_flight -= 1
+            finished = (self.calls is not None and self.claimed >= self.calls and self.in_flight <= 0)
+        if finished:
+            self.profiler.finish(self)
+
+    def wrap(self, function):
+        """function run under its own cProfile on whichever thread calls it"""
+        def profiled(text=""):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+ allows one active profiler per process
+                profile = None
+                self.skipped += 1
+            try:
+                return function(text)
+            finally:
+                if profile is not None:
+                    profile.disable()
+                self.release(profile)
+        return profiled
+
+
+class Profiler:
+    def __init__(self, directory=PROFILE_DIR, top=25, on_finished=None):
+        """Start and stop profiling sessions; on_finished(paths) is called with the files written"""
+        self.directory = directory
+        self.top = top
+        self.on_finished = on_finished
+        self.session = None
+        self.active = False  # Checked on every command, so it stays a plain attribute
+        self.last_report = None
+        self.sessions = 0
+        self.lock = threading.Lock()
+
+    def start(self, calls=None, seconds=None):
+        """Profile the next calls commands, or all commands for seconds; returns False if already running"""
+        if calls is None and seconds is None:
+            calls = 5
+        with self.lock:
+            if self.session is not None:
+                return False
+            session = ProfileSession(self, calls, seconds)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                session.started_tracemalloc = True
+            session.baseline = tracemalloc.take_snapshot()
+            session.timer = threading.Timer(seconds if seconds is not None else MAX_SECONDS,
+                                            self.finish, (session,))
+            session.timer.daemon = True
+            session.timer.start()
+            self.session = session
+            self.active = True
+        print(f"Profiling {'the next %d commands' % calls if calls is not None else 'for %g s' % seconds}")
+        return True
+
+    def claim(self, name):
+        """The session that should profile this command, or None"""
+        session = self.session
+        if session is not None and session.claim(name):
+            return session
+        return None
+
+    def stop(self):
+        """End the running session now and write what it has; returns the files written"""
+        session = self.session
+        return self.finish(session) if session else []
+
+    def finish(self, session):
+        with self.lock:
+            if session.closed or self.session is not session:
+                return []
+            session.closed = True
+            self.session = None
+            self.active = False
+        session.timer.cancel()
+        try:
+            paths = self.write(session)
+        finally:
+            if session.started_tracemalloc:
+                tracemalloc.stop()
+        self.last_report = paths[-1] if paths else None
+        if self.on_finished:
+            self.on_finished(paths)
+        return paths
+
+    def write(self, session):
+        """Save the merged CPU profile and the allocation report, returns their paths"""
+        snapshot = tracemalloc.take_snapshot()
+        os.makedirs(self.directory, exist_ok=True)
+        self.sessions += 1
+        stem = os.path.join(self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.sessions}")
+        paths = []
+        elapsed = time.monotonic() - session.started
+        lines = [f"AALEX profile: {len(session.commands)} command(s) in {elapsed:.1f} s",
+                 f"commands: {', '.join(session.commands) or 'none'}"]
+        if session.skipped:
+            lines.append(f"{session.skipped} command(s) ran unprofiled because another profiler was active")
+
+        if session.profiles:
+            stats = pstats.Stats(session.profiles[0])
+            for profile in session.profiles[1:]:
+                stats.add(profile)
+            stats.dump_stats(stem + ".pstats")
+            paths.append(stem + ".pstats")
+            text = io.StringIO()
+            pstats.Stats(stem + ".pstats", stream=text).sort_stats("cumulative").print_stats(self.top)
+            lines += ["", f"Top {self.top} functions by cumulative time:", text.getvalue().strip()]
+
+        # Leave out the profiler's own bookkeeping
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        snapshot = snapshot.filter_traces(filters)
+        growth = snapshot.compare_to(session.baseline.filter_traces(filters), "lineno")
+        lines += ["", f"Top {self.top} allocation sites by growth during the session:"]
+        lines += [str(stat) for stat in growth[:self.top]]
+        current = snapshot.statistics("lineno")
+        lines += ["", f"Top {self.top} allocation sites overall:"]
+        lines += [str(stat) for stat in current[:self.top]]
+
+        with open(stem + ".txt", 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        paths.append(stem + ".txt")
+        print(f"Profile written to {stem}.txt")
+        return paths
+
+
+def main():
+    """Profile a few busy commands and show the reports written"""
+    import tempfile
+    print("AALEX Profiling - session check")
+    print("=" * 50)
+    directory = tempfile.mkdtemp()
+    profiler = Profiler(directory, top=5)
+
+    def busy(text=""):
+        data = [str(i) * 10 for i in range(20000)]
+        return sorted(data, key=len)
+
+    started = time.perf_counter()
+    for _ in range(100000):
+        if profiler.active:
+            pass
+    print(f"idle check: {(time.perf_counter() - started) / 100000 * 1e9:.0f} ns per command")
+
+    profiler.start(calls=3)
+    threads = []
+    for name in ("first", "second", "third"):
+        session = profiler.claim(name)
+        threads.append(threading.Thread(target=session.wrap(busy)))
+        threads[-1].start()
+    for thread in threads:
+        thread.join()
+    print(f"still active after 3 calls: {profiler.active}")
+    for name in sorted(os.listdir(directory)):
+        print(f"  {os.path.join(directory, name)}")
+    with open(profiler.last_report) as f:
+        print("\n".join(f.read().splitlines()[:12]))
+
+
+if __name__ == "__main__":
+    main()
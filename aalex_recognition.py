@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+AALEX Recognition - Pluggable speech recognizer backends
+Runs several backends at once, returns the first confident transcript and keeps
+per-backend latency and success counters so the fastest one can be preferred
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from aalex_platform import lazy_module
+
+# Only needed once a real recognizer raises, so fake backends run without it
+sr = lazy_module("speech_recognition")
+
+
+class RecognitionResult:
+    def __init__(self, text, confidence, backend, latency=0.0):
+        """A transcript from one backend"""
+        self.text = text
+        self.confidence = confidence
+        self.backend = backend
+        self.latency = latency
+
+    def __repr__(self):
+        return f"RecognitionResult({self.text!r}, {self.confidence:.2f}, {self.backend})"
+
+
+class BackendStats:
+    def __init__(self):
+        """Running counters for one backend"""
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.cancelled = 0
+        self.total_latency = 0.0
+        self.average_latency = None  # Exponential moving average, seconds
+
+    def record(self, latency, success):
+        self.calls += 1
+        if success:
+            self.successes += 1
+        else:
+            self.failures += 1
+        self.total_latency += latency
+        if self.average_latency is None:
+            self.average_latency = latency
+        else:
+            self.average_latency += 0.2 * (latency - self.average_latency)
+
+    @property
+    def success_rate(self):
+        return self.successes / self.calls if self.calls else 0.0
+
+
+class Backend:
+    """Base class: recognize(audio) returns a RecognitionResult or None"""
+    name = "backend"
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(Backend):
+    name = "google"
+
+    def __init__(self, recognizer, language="en-US"):
+        self.recognizer = recognizer
+        self.language = language
+
+    def recognize(self, audio):
+        response = self.recognizer.recognize_google(audio, language=self.language, show_all=True)
+        alternatives = response.get("alternative") if isinstance(response, dict) else None
+        if not alternatives:
+            return None
+        best = alternatives[0]
+        # Google only scores the top alternative, and not always
+        return RecognitionResult(best["transcript"], best.get("confidence", 0.8), self.name)
+
+
+class SphinxBackend(Backend):
+    name = "sphinx"
+
+    def __init__(self, recognizer, confidence=0.6):
+        """Offline CMU Sphinx (pocketsphinx), which reports no usable confidence"""
+        self.recognizer = recognizer
+        self.confidence = confidence
+
+    def recognize(self, audio):
+        text = self.recognizer.recognize_sphinx(audio)
+        return RecognitionResult(text, self.confidence, self.name) if text else None
+
+
+class VoskBackend(Backend):
+    name = "vosk"
+
+    def __init__(self, recognizer, confidence=0.7):
+        """Offline Vosk, needs a model in the 'model' folder"""
+        self.recognizer = recognizer
+        self.confidence = confidence
+
+    def recognize(self, audio):
+        text = json.loads(self.recognizer.recognize_vosk(audio)).get("text", "")
+        return RecognitionResult(text, self.confidence, self.name) if text else None
+
+
+class FakeBackend(Backend):
+    def __init__(self, transcripts, confidence=0.9, latency=0.0, name="fake"):
+        """Deterministic backend for tests
+
+        transcripts is a list returned in order (cycling), or a callable of audio.
+        """
+        self.transcripts = transcripts
+        self.confidence = confidence
+        self.latency = latency
+        self.name = name
+        self.calls = 0
+
+    def recognize(self, audio):
+        if self.latency:
+            time.sleep(self.latency)
+        if callable(self.transcripts):
+            text = self.transcripts(audio)
+        else:
+            text = self.transcripts[self.calls % len(self.transcripts)]
+        self.calls += 1
+        return RecognitionResult(text, self.confidence, self.name) if text else None
+
+
+class VoskStreamingBackend:
+    name = "vosk-stream"
+
+    def __init__(self, model_path="model"):
+        """Vosk recognition that yields partial transcripts while audio is still arriving"""
+        import vosk
+        self.vosk = vosk
+        self.model = vosk.Model(model_path)
+
+    def start(self, sample_rate, sample_width=2):
+        """Begin an utterance (Vosk expects 16-bit mono PCM)"""
+        return VoskStreamingSession(self.vosk.KaldiRecognizer(self.model, sample_rate))
+
+
+class VoskStreamingSession:
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def feed(self, frame_data):
+        """Add audio, returns the current partial transcript"""
+        if self.recognizer.AcceptWaveform(frame_data):
+            return json.loads(self.recognizer.Result()).get("text", "")
+        return json.loads(self.recognizer.PartialResult()).get("partial", "")
+
+    def finish(self):
+        """Final transcript for everything fed so far"""
+        return json.loads(self.recognizer.FinalResult()).get("text", "")
+
+
+class ReplayStreamingBackend:
+    name = "replay"
+
+    def __init__(self, script, final=None):
+        """Replay recorded partial results for tests
+
+        script is a list of (seconds of audio, partial transcript); final is
+        the finished transcript (defaults to the last partial).
+        """
+        self.script = sorted(script)
+        self.final = final if final is not None else (self.script[-1][1] if self.script else "")
+
+    def start(self, sample_rate, sample_width=2):
+        return ReplayStreamingSession(self, sample_rate * sample_width)
+
+
+class ReplayStreamingSession:
+    def __init__(self, backend, bytes_per_second):
+        self.backend = backend
+        self.bytes_per_second = bytes_per_second
+        self.fed = 0
+
+    def feed(self, frame_data):
+        self.fed += len(frame_data)
+        seconds = self.fed / self.bytes_per_second
+        partial = ""
+        for offset, text in self.backend.script:
+            if offset > seconds:
+                break
+            partial = text
+        return partial
+
+    def finish(self):
+        return self.backend.final
+
+
+def default_streaming_backend(model_path="model"):
+    """Vosk streaming recognition if vosk and a model are installed, else None"""
+    if not os.path.isdir(model_path):
+        return None
+    try:
+        return VoskStreamingBackend(model_path)
+    except ImportError:
+        return None
+
+
+def default_backends(recognizer):
+    """Google plus whichever offline recognizers are installed"""
+    backends = [GoogleBackend(recognizer)]
+    try:
+        import pocketsphinx  # noqa: F401
+        backends.append(SphinxBackend(recognizer))
+    except ImportError:
+        pass
+    return backends
+
+
+class RecognizerPool:
+    def __init__(self, backends, threshold=0.7, strategy="race", max_workers=None):
+        """Run recognition on several backends
+
+        strategy "race" runs every backend at once and returns the first result
+        at or above threshold; "fastest" tries backends one at a time, quickest
+        (by measured latency) first.
+        """
+        self.backends = list(backends)
+        self.threshold = threshold
+        self.strategy = strategy
+        self.stats = {backend.name: BackendStats() for backend in self.backends}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or max(2, len(self.backends)),
+                                           thread_name_prefix="aalex-recognizer")
+
+    def _run(self, backend, audio, cancelled):
+        started = time.perf_counter()
+        result = None
+        try:
+            result = backend.recognize(audio)
+        except sr.UnknownValueError:
+            pass
+        except Exception as e:
+            if not cancelled.is_set():
+                print(f"Recognizer {backend.name} failed: {e}")
+        latency = time.perf_counter() - started
+        with self.lock:
+            stats = self.stats[backend.name]
+            if cancelled.is_set() and result is None:
+                stats.cancelled += 1
+            else:
+                stats.record(latency, result is not None)
+        if result:
+            result.latency = latency
+        return result
+
+    def ranked(self):
+        """Backends ordered fastest first; untried backends go first so they get measured"""
+        def key(backend):
+            average = self.stats[backend.name].average_latency
+            return -1 if average is None else average
+        return sorted(self.backends, key=key)
+
+    def recognize(self, audio, timeout=10):
+        """Return the best RecognitionResult, or None"""
+        if self.strategy == "fastest":
+            best = None
+            never = threading.Event()
+            for backend in self.ranked():
+                result = self._run(backend, audio, never)
+                if result and result.confidence >= self.threshold:
+                    return result
+                if result and (best is None or result.confidence > best.confidence):
+                    best = result
+            return best
+
+        cancelled = threading.Event()
+        pending = {self.executor.submit(self._run, backend, audio, cancelled)
+                   for backend in self.backends}
+        deadline = time.monotonic() + timeout
+        best = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                result = future.result()
+                if result and (best is None or result.confidence > best.confidence):
+                    best = result
+            if best and best.confidence >= self.threshold:
+                break
+
+        # Stop waiting on the slower backends; queued ones never start
+        cancelled.set()
+        for future in pending:
+            future.cancel()
+        return best
+
+    def report(self):
+        """One line per backend with its counters"""
+        lines = []
+        for backend in self.ranked():
+            stats = self.stats[backend.name]
+            average = f"{stats.average_latency * 1000:.0f} ms" if stats.average_latency is not None else "n/a"
+            lines.append(f"{backend.name}: {stats.calls} calls, {stats.success_rate:.0%} success, "
+                         f"avg {average}, {stats.cancelled} cancelled")
+        return "\n".join(lines)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+AALEX Router - Compiled command router for voice command dispatch
+Matches command phrases against an utterance in a single pass over a token trie
+"""
+
+import re
+import time
+import random
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def inflections(token):
+    """Plural and verb forms of a command word ("joke" -> "jokes", "restart" -> "restarting")
+
+    The old substring scan matched these for free; the trie needs them spelled out.
+    """
+    if len(token) < 3 or not token.isalpha():
+        return set()
+    stem = token[:-1] if token.endswith("e") else token
+    forms = {token + "es" if token.endswith(("s", "x", "ch", "sh")) else token + "s",
+             stem + "ing", stem + "ed"}
+    if token.endswith("y") and token[-2] not in "aeiou":
+        forms.add(token[:-1] + "ies")
+    forms.discard(token)
+    return forms
+
+
+class _TrieNode:
+    __slots__ = ("children", "command", "alias")
+
+    def __init__(self):
+        self.children = {}
+        self.command = None
+        self.alias = False  # command was reached through an inflected form
+
+
+class RouteMatch:
+    def __init__(self, name, function, start, end, priority):
+        """A command phrase found in an utterance"""
+        self.name = name
+        self.function = function
+        self.start = start
+        self.end = end
+        self.priority = priority
+
+    @property
+    def length(self):
+        return self.end - self.start
+
+    def __repr__(self):
+        return f"RouteMatch({self.name!r}, tokens {self.start}-{self.end})"
+
+
+class CommandRouter:
+    def __init__(self, commands=None, priorities=None):
+        """Build the router from a command table of phrase -> function"""
+        self.root = _TrieNode()
+        self.entries = {}
+        self.aliases = {}  # name -> token paths of its inflected forms
+        self.compiled = {}  # name -> (name, function, priority, order) as stored in the trie
+        self._order = 0
+        for name, function in (commands or {}).items():
+            self.add(name, function, (priorities or {}).get(name, 0))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def add(self, name, function, priority=0):
+        """Add or replace a command phrase without rebuilding the trie
+
+        Inflected forms of the last word ("jokes", "restarting") route to the
+        same command unless another command owns that exact phrase.
+        """
+        tokens = tuple(tokenize(name))
+        if not tokens:
+            return
+        if name in self.entries:
+            self.remove(name)
+
+        # Several names can normalize to the same phrase; the newest one wins
+        self._order += 1
+        command = (name, function, priority, self._order)
+        node = self._node(tokens)
+        node.command = command
+        node.alias = False
+        self.entries[name] = tokens
+        self.compiled[name] = command
+
+        self.aliases[name] = [tokens[:-1] + (form,) for form in inflections(tokens[-1])]
+        for alias in self.aliases[name]:
+            node = self._node(alias)
+            if node.command is None or node.alias:
+                node.command = command
+                node.alias = True
+
+    def _node(self, tokens):
+        node = self.root
+        for token in tokens:
+            node = node.children.setdefault(token, _TrieNode())
+        return node
+
+    def remove(self, name):
+        """Remove a command phrase and prune empty trie branches"""
+        tokens = self.entries.pop(name, None)
+        if tokens is None:
+            return False
+        del self.compiled[name]
+        for alias in self.aliases.pop(name, ()):
+            self._unlink(alias, name)
+        self._unlink(tokens, name)
+        return True
+
+    def _unlink(self, tokens, name):
+        path = [self.root]
+        for token in tokens:
+            node = path[-1].children.get(token)
+            if node is None:
+                return
+            path.append(node)
+        node = path[-1]
+        if node.command and node.command[0] == name:
+            node.command = None
+            node.alias = False
+            # Hand the phrase back to a command it is an inflected form of, the newest first
+            owners = [self.compiled[other] for other, aliases in self.aliases.items() if tokens in aliases]
+            if owners:
+                node.command = max(owners, key=lambda command: command[3])
+                node.alias = True
+
+        for depth in range(len(tokens), 0, -1):
+            node = path[depth]
+            if node.children or node.command:
+                break
+            del path[depth - 1].children[tokens[depth - 1]]
+
+    def matches(self, text):
+        """Return every command phrase found in the text, in utterance order"""
+        tokens = tokenize(text) if isinstance(text, str) else text
+        found = []
+        for start in range(len(tokens)):
+            node = self.root
+            for end in range(start, len(tokens)):
+                node = node.children.get(tokens[end])
+                if node is None:
+                    break
+                if node.command:
+                    name, function, priority, _ = node.command
+                    found.append(RouteMatch(name, function, start, end + 1, priority))
+        return found
+
+    def route(self, text):
+        """Pick the best command for the text or None
+
+        Higher priority wins, then the longest phrase, then the phrase that
+        appears first in the utterance.
+        """
+        tokens = tokenize(text) if isinstance(text, str) else text
+        best = None
+        best_key = None
+        for start in range(len(tokens)):
+            node = self.root
+            for end in range(start, len(tokens)):
+                node = node.children.get(tokens[end])
+                if node is None:
+                    break
+                if node.command:
+                    name, function, priority, order = node.command
+                    key = (priority, end + 1 - start, -start, -order)
+                    if best_key is None or key > best_key:
+                        best_key = key
+                        best = RouteMatch(name, function, start, end + 1, priority)
+        return best
+
+
+class EarlyIntentDetector:
+    def __init__(self, router, stable_count=2, exclude=(), requires=None, normalize=None):
+        """Decide from partial transcripts when a command is safe to dispatch early
+
+        A command fires once the same partial hypothesis has been seen
+        stable_count times in a row and every phrase in it points to one
+        command. Commands in exclude (those that take the rest of the utterance
+        as an argument, like "search") always wait for the final transcript.
+        requires maps a command to the argument words it needs; it waits until
+        one of them has been heard ("volume" alone waits for "up" or "down").
+        A phrase that ends the partial and starts a longer phrase also waits
+        ("lights" may still become "lights off").
+        """
+        self.router = router
+        self.stable_count = stable_count
+        self.exclude = set(exclude)
+        self.requires = {name: set(words) for name, words in (requires or {}).items()}
+        self.normalize = normalize
+        self.last_text = None
+        self.repeats = 0
+
+    def update(self, partial):
+        """Feed the latest partial transcript, returns (RouteMatch, text) or None"""
+        text = self.normalize(partial) if self.normalize else partial
+        tokens = tokenize(text)
+        if not tokens:
+            return None
+        if tokens == self.last_text:
+            self.repeats += 1
+        else:
+            self.last_text = tokens
+            self.repeats = 1
+        if self.repeats < self.stable_count:
+            return None
+
+        matches = self.router.matches(tokens)
+        if not matches or len({match.name for match in matches}) > 1:
+            return None
+        match = self.router.route(tokens)
+        if match.name in self.exclude:
+            return None
+        if match.name in self.requires and not self.requires[match.name].intersection(tokens):
+            return None
+        if match.end == len(tokens):
+            node = self.router.root
+            for token in tokens[match.start:match.end]:
+                node = node.children[token]
+            if node.children:
+                return None
+        return match, text
+
+
+def _linear_route(commands, text):
+    """Reference implementation of the old substring scan"""
+    for command, function in commands.items():
+        if command in text:
+            return command
+    return None
+
+
+def benchmark(sizes=(0, 100, 1000, 5000), repeat=2000):
+    """Time dispatch as the number of custom commands grows"""
+    words = ["alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel",
+             "india", "juliet", "kilo", "lima", "mike", "november", "oscar", "papa"]
+    builtin = ["time", "date", "weather", "search", "open", "close", "volume", "brightness",
+               "screenshot", "shutdown", "restart", "sleep", "system", "battery", "joke",
+               "quote", "help", "control", "settings"]
+    utterances = [
+        "what time is it",
+        "turn the volume up a little",
+        "search for control systems engineering",
+        "please tell me a joke about the weather",
+        "this phrase matches nothing at all",
+    ]
+    rng = random.Random(42)
+
+    print(f"{'commands':>10} {'trie us/call':>14} {'linear us/call':>16}")
+    for size in sizes:
+        commands = {name: None for name in builtin}
+        for i in range(size):
+            phrase = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+            commands[f"{phrase} {i}"] = None
+        router = CommandRouter(commands)
+
+        start = time.perf_counter()
+        for i in range(repeat):
+            router.route(utterances[i % len(utterances)])
+        trie_us = (time.perf_counter() - start) / repeat * 1e6
+
+        start = time.perf_counter()
+        for i in range(repeat):
+            _linear_route(commands, utterances[i % len(utterances)])
+        linear_us = (time.perf_counter() - start) / repeat * 1e6
+
+        print(f"{len(commands):>10} {trie_us:>14.2f} {linear_us:>16.2f}")
+
+
+def main():
+    """Run the dispatch micro-benchmark"""
+    print("AALEX Router - dispatch benchmark")
+    print("=" * 50)
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
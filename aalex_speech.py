@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+AALEX Speech - Asynchronous speech output for the voice assistant
+A single worker thread owns the TTS engine and speaks queued utterances by priority,
+so the listen loop never blocks on speech and can interrupt it when the user talks
+"""
+
+import hashlib
+import itertools
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import wave
+from collections import OrderedDict
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+_CONTROL = -1  # Engine property changes jump ahead of queued speech
+
+
+class SpeechRequest:
+    def __init__(self, text, priority, cached=False, play=True, tag=None):
+        """A queued utterance that callers can wait on or cancel
+
+        tag is any caller data handed back to the worker's on_finished hook.
+        """
+        self.text = text
+        self.priority = priority
+        self.cached = cached
+        self.play = play
+        self.tag = tag
+        self.cancelled = False
+        self.done = threading.Event()
+        self.queued_at = time.monotonic()
+        self.started_at = None
+        self.finished_at = None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def wait(self, timeout=None):
+        """Block until the utterance has been spoken or cancelled"""
+        return self.done.wait(timeout)
+
+
+def wav_duration(path):
+    """Length of a WAV file in seconds, or None if it is not a readable WAV"""
+    try:
+        with wave.open(path, 'rb') as wav:
+            return wav.getnframes() / wav.getframerate()
+    except Exception:
+        return None
+
+
+class PhraseCache:
+    def __init__(self, directory="aalex_tts_cache", max_bytes=50 * 1024 * 1024):
+        """Rendered audio for fixed phrases, on disk with LRU eviction under a size cap"""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (path, size), least recently used first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # Files rendered by an earlier run are reused, oldest access first
+        files = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and os.path.getsize(path):
+                files.append((os.path.getmtime(path), name[:40], path))
+        for _, key, path in sorted(files):
+            self._add(key, path)
+        self._evict()
+
+    @staticmethod
+    def key(text, voice, rate, volume):
+        """Cache key for a phrase spoken with particular voice settings"""
+        return hashlib.sha1(f"{text}|{voice}|{rate}|{volume}".encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key + ".wav")
+
+    def get(self, key):
+        """Path of the rendered phrase, or None"""
+        entry = self.entries.get(key)
+        if entry is None or not os.path.exists(entry[0]) or not entry[1]:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        os.utime(entry[0])
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, path):
+        """Register a freshly rendered file and evict old ones if over the cap
+
+        Returns False (and keeps nothing) if the render left no audio.
+        """
+        if not os.path.exists(path) or not os.path.getsize(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return False
+        self._add(key, path)
+        self._evict()
+        return True
+
+    def clear(self):
+        """Drop every rendered phrase (voice settings changed)"""
+        for path, _ in self.entries.values():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def _add(self, key, path):
+        if key in self.entries:
+            self.total_bytes -= self.entries.pop(key)[1]
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        self.entries[key] = (path, size)
+        self.total_bytes += size
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            _, (path, size) = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class Pyttsx3Driver:
+    def __init__(self, configure=None):
+        """pyttsx3 output, the engine is created on the speech thread"""
+        self.configure = configure
+        self.engine = None
+        self.external_loop = False
+        self.player = None  # Command line that plays a WAV file, None if there is none
+
+    def open(self):
+        import pyttsx3
+        self.engine = pyttsx3.init()
+        if self.configure:
+            self.configure(self.engine)
+        try:
+            # An external loop lets us poll for cancellation while speaking
+            self.engine.startLoop(False)
+            self.external_loop = True
+        except Exception:
+            self.external_loop = False
+        if sys.platform == 'darwin':
+            self.player = ["afplay"] if shutil.which("afplay") else None
+        elif sys.platform != 'win32':
+            self.player = ["aplay", "-q"] if shutil.which("aplay") else None
+
+    def set_property(self, name, value):
+        self.engine.setProperty(name, value)
+
+    def get_property(self, name):
+        return self.engine.getProperty(name)
+
+    def say(self, text, cancelled):
+        self.engine.say(text)
+        self._wait(cancelled)
+
+    def _wait(self, cancelled=None):
+        if not self.external_loop:
+            self.engine.runAndWait()
+            return
+        self.engine.iterate()
+        while self.engine.isBusy():
+            if cancelled and cancelled():
+                self.engine.stop()
+                break
+            self.engine.iterate()
+            time.sleep(0.01)
+
+    def render(self, text, path):
+        """Synthesize text into an audio file without playing it"""
+        self.engine.save_to_file(text, path)
+        self._wait()
+
+    def play(self, path, text, cancelled):
+        """Play a rendered phrase, stopping early if cancelled; False if it could not be played"""
+        duration = wav_duration(path) or 30
+        if sys.platform == 'win32':
+            import winsound
+            try:
+                winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+            except RuntimeError:
+                return False
+            deadline = time.monotonic() + duration
+            while time.monotonic() < deadline:
+                if cancelled():
+                    winsound.PlaySound(None, winsound.SND_PURGE)
+                    return True
+                time.sleep(0.01)
+            return True
+        if not self.player:
+            return False
+        try:
+            process = subprocess.Popen(self.player + [path], stderr=subprocess.DEVNULL)
+        except OSError:
+            return False
+        while process.poll() is None:
+            if cancelled():
+                process.terminate()
+                return True
+            time.sleep(0.01)
+        return process.returncode == 0
+
+    def close(self):
+        if self.external_loop:
+            self.engine.endLoop()
+
+
+class NullAudioDriver:
+    def __init__(self, words_per_minute=0):
+        """Silent driver that records what would have been spoken (for tests)
+
+        With words_per_minute set, speaking takes as long as it would aloud.
+        """
+        self.words_per_minute = words_per_minute
+        self.properties = {'rate': 180, 'volume': 0.9, 'voice': None}
+        self.spoken = []
+        self.interrupted = []
+        self.rendered = []
+        self.played = []
+
+    def open(self):
+        pass
+
+    def set_property(self, name, value):
+        self.properties[name] = value
+
+    def get_property(self, name):
+        return self.properties.get(name)
+
+    def say(self, text, cancelled):
+        if self.words_per_minute:
+            deadline = time.monotonic() + len(text.split()) * 60 / self.words_per_minute
+            while time.monotonic() < deadline:
+                if cancelled():
+                    self.interrupted.append(text)
+                    return
+                time.sleep(0.01)
+        self.spoken.append(text)
+
+    def render(self, text, path):
+        # A silent WAV sized like the spoken phrase
+        with wave.open(path, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(8000)
+            wav.writeframes(b"\x00\x00" * 800 * len(text.split()))
+        self.rendered.append(text)
+
+    def play(self, path, text, cancelled):
+        self.played.append(text)
+        self.say(text, cancelled)
+        return True
+
+    def close(self):
+        pass
+
+
+class SpeechWorker:
+    def __init__(self, driver, cache=None, on_finished=None):
+        """Speak queued utterances on a dedicated thread
+
+        on_finished(request) runs on the speech thread after each utterance.
+        """
+        self.driver = driver
+        self.cache = cache
+        self.on_finished = on_finished
+        self.queue = queue.PriorityQueue()
+        self.counter = itertools.count()
+        self.current = None
+        self.thread = None
+        self.ready = threading.Event()
+
+    def start(self):
+        """Start the speech thread and wait for the engine to come up"""
+        if self.thread:
+            return
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.ready.wait(10)
+
+    def stop(self):
+        """Finish what is queued, then stop the speech thread"""
+        if self.thread:
+            self.queue.put((PRIORITY_LOW + 1, next(self.counter), None))
+            self.thread.join(timeout=10)
+            self.thread = None
+
+    def say(self, text, priority=PRIORITY_NORMAL, cached=False, tag=None):
+        """Queue text and return immediately with a SpeechRequest
+
+        cached=True marks a fixed phrase that is rendered once and replayed from the phrase cache.
+        """
+        request = SpeechRequest(text, priority, cached=cached, tag=tag)
+        self.queue.put((priority, next(self.counter), request))
+        return request
+
+    def preload(self, phrases):
+        """Render fixed phrases into the cache in the background"""
+        if not self.cache:
+            return
+        for text in phrases:
+            request = SpeechRequest(text, PRIORITY_LOW, cached=True, play=False)
+            self.queue.put((PRIORITY_LOW, next(self.counter), request))
+
+    def set_property(self, name, value):
+        """Change an engine property on the speech thread"""
+        self.queue.put((_CONTROL, next(self.counter), (name, value)))
+
+    @property
+    def is_speaking(self):
+        return self.current is not None
+
+    def interrupt(self, clear_queue=True):
+        """Cut off the current utterance (barge-in) and optionally drop the queue"""
+        current = self.current
+        if current:
+            current.cancel()
+        if clear_queue:
+            kept = []
+            while True:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                request = item[2]
+                if isinstance(request, SpeechRequest) and request.play:
+                    request.cancel()
+                    request.done.set()
+                else:
+                    kept.append(item)
+            for item in kept:
+                self.queue.put(item)
+
+    def _run(self):
+        try:
+            self.driver.open()
+        except Exception as e:
+            # Keep the queue moving (and speak() callers from waiting forever) without a voice
+            print(f"Speech engine unavailable, replies will only be printed: {e}")
+            self.driver = NullAudioDriver()
+            self.cache = None
+        finally:
+            self.ready.set()
+
+        while True:
+            priority, _, item = self.queue.get()
+            if item is None:
+                break
+            if priority == _CONTROL:
+                self._set_property(*item)
+                continue
+            if item.cancelled:
+                item.done.set()
+                continue
+
+            self.current = item if item.play else None
+            item.started_at = time.monotonic()
+            try:
+                if item.cached and self.cache:
+                    self._say_cached(item)
+                else:
+                    self.driver.say(item.text, lambda: item.cancelled)
+            except Exception as e:
+                print(f"Speech error: {e}")
+            finally:
+                self.current = None
+                item.finished_at = time.monotonic()
+                item.done.set()
+            if self.on_finished and item.play:
+                try:
+                    self.on_finished(item)
+                except Exception as e:
+                    print(f"Speech hook error: {e}")
+
+        self.driver.close()
+
+    def _set_property(self, name, value):
+        try:
+            changed = self.driver.get_property(name) != value
+            self.driver.set_property(name, value)
+        except Exception as e:
+            print(f"Speech setting error: {e}")
+            return
+        # Rendered phrases no longer match the voice
+        if changed and self.cache and name in ('rate', 'volume', 'voice'):
+            self.cache.clear()
+
+    def _say_cached(self, request):
+        voice = self.driver.get_property('voice')
+        voice = getattr(voice, 'id', voice)
+        key = self.cache.key(request.text, voice, self.driver.get_property('rate'),
+                             self.driver.get_property('volume'))
+        path = self.cache.get(key)
+        if path is None:
+            path = self.cache.path_for(key)
+            try:
+                self.driver.render(request.text, path)
+            except Exception as e:
+                print(f"Speech render error: {e}")
+            if not self.cache.put(key, path):
+                path = None
+        if not request.play:
+            return
+        # Say it directly when there is no rendered file or no way to play one
+        if path is None or not self.driver.play(path, request.text, lambda: request.cancelled):
+            self.driver.say(request.text, lambda: request.cancelled)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+AALEX Telemetry - Background system sampler shared by the assistant and the GUI
+Polls CPU, memory, disk, battery and per-process CPU on a daemon thread into a
+fixed-size ring buffer, so callers read current values without blocking
+"""
+
+import threading
+import time
+from array import array
+
+import psutil
+
+from aalex_processes import ProcessTracker
+
+FIELDS = ("cpu", "memory", "memory_available", "disk", "battery", "plugged")
+MISSING = -1.0  # Stored for values the machine does not report (no battery)
+
+
+class TelemetrySample:
+    def __init__(self, timestamp, values):
+        """One row of the ring buffer"""
+        self.timestamp = timestamp
+        for name, value in zip(FIELDS, values):
+            setattr(self, name, None if value == MISSING else value)
+
+    def __repr__(self):
+        return f"TelemetrySample(cpu={self.cpu}%, memory={self.memory}%, disk={self.disk}%)"
+
+
+class TelemetryRing:
+    def __init__(self, capacity=600):
+        """Fixed-size ring of samples, one preallocated double array per field"""
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.columns = {name: array('d', bytes(8 * capacity)) for name in FIELDS}
+        self.count = 0  # Samples ever written; the next one goes to count % capacity
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp, values):
+        with self.lock:
+            slot = self.count % self.capacity
+            self.times[slot] = timestamp
+            for name in FIELDS:
+                self.columns[name][slot] = values.get(name, MISSING)
+            self.count += 1
+
+    def latest(self):
+        """Newest TelemetrySample, or None before the first one"""
+        with self.lock:
+            if not self.count:
+                return None
+            slot = (self.count - 1) % self.capacity
+            return TelemetrySample(self.times[slot], [self.columns[name][slot] for name in FIELDS])
+
+    def series(self, field, seconds=None):
+        """(timestamps, values) for one field, oldest first, optionally only the last seconds"""
+        with self.lock:
+            size = min(self.count, self.capacity)
+            start = self.count - size
+            slots = [(start + i) % self.capacity for i in range(size)]
+            times = [self.times[slot] for slot in slots]
+            values = [self.columns[field][slot] for slot in slots]
+        if seconds is not None and times:
+            cutoff = times[-1] - seconds
+            first = next((i for i, t in enumerate(times) if t >= cutoff), len(times))
+            times, values = times[first:], values[first:]
+        return times, values
+
+    def window(self, field, seconds):
+        """(mean, max) of a field over the last seconds, or (None, None)"""
+        _, values = self.series(field, seconds)
+        values = [v for v in values if v != MISSING]
+        if not values:
+            return None, None
+        return sum(values) / len(values), max(values)
+
+
+class TelemetrySampler:
+    def __init__(self, interval=1.0, capacity=600, process_interval=5.0, top_count=10, disk_path=None):
+        """Sample system state every interval seconds on a daemon thread
+
+        Per-process CPU is costlier and is refreshed every process_interval seconds.
+        """
+        self.interval = interval
+        self.process_interval = process_interval
+        self.top_count = top_count
+        self.disk_path = disk_path or ('C:\\' if psutil.WINDOWS else '/')
+        self.ring = TelemetryRing(capacity)
+        self.processes = ProcessTracker()
+        self.ready = threading.Event()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.sample_seconds = 0.0  # Time spent in the last sample
+
+    def start(self):
+        if self.thread:
+            return self
+        self.thread = threading.Thread(target=self._run, name="aalex-telemetry", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=self.interval + 1)
+            self.thread = None
+
+    def _run(self):
+        # cpu_percent(None) measures since the previous call, so the first call only primes it
+        psutil.cpu_percent(interval=None)
+        self.processes.scan()
+        next_process = time.monotonic() + self.process_interval
+        while not self.stop_event.wait(self.interval):
+            try:
+                started = time.perf_counter()
+                self._sample()
+                if time.monotonic() >= next_process:
+                    self.processes.scan()
+                    next_process = time.monotonic() + self.process_interval
+                self.sample_seconds = time.perf_counter() - started
+                self.ready.set()
+            except Exception as e:
+                print(f"Telemetry error: {e}")
+
+    def _sample(self):
+        memory = psutil.virtual_memory()
+        values = {
+            "cpu": psutil.cpu_percent(interval=None),
+            "memory": memory.percent,
+            "memory_available": memory.available,
+            "disk": psutil.disk_usage(self.disk_path).percent,
+        }
+        battery = psutil.sensors_battery() if hasattr(psutil, 'sensors_battery') else None
+        if battery:
+            values["battery"] = battery.percent
+            values["plugged"] = 1.0 if battery.power_plugged else 0.0
+        self.ring.append(time.time(), values)
+
+    @property
+    def top_processes(self):
+        """[(cpu percent, name, pid)] of the busiest processes, busiest first"""
+        return [(entry.cpu, entry.name, entry.pid) for entry in self.processes.top(self.top_count, "cpu")]
+
+    def latest(self, timeout=None):
+        """Newest sample, waiting up to timeout for the first one"""
+        if timeout and not self.ready.is_set():
+            self.ready.wait(timeout)
+        return self.ring.latest()
+
+    def window(self, field, seconds=60):
+        """(mean, max) of a field over the last seconds"""
+        return self.ring.window(field, seconds)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_sampler(**options):
+    """The process-wide sampler, started on first use"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = TelemetrySampler(**options).start()
+        return _shared
+
+
+def main():
+    """Print a few samples and how long reading them takes"""
+    print("AALEX Telemetry - sampler check")
+    print("=" * 50)
+    sampler = shared_sampler(interval=0.5, process_interval=1.0)
+    sampler.latest(timeout=5)
+    for _ in range(4):
+        started = time.perf_counter()
+        sample = sampler.latest()
+        read_us = (time.perf_counter() - started) * 1e6
+        print(f"{sample}  read in {read_us:.1f} us, sampled in {sampler.sample_seconds * 1000:.1f} ms")
+        time.sleep(1)
+    mean, peak = sampler.window("cpu", 10)
+    print(f"CPU over 10 s: mean {mean:.1f}%, max {peak:.1f}%")
+    print("Top processes:", ", ".join(f"{name} {cpu:.1f}%" for cpu, name, _ in sampler.top_processes[:5]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+AALEX Tracing - Per-stage latency spans for the voice pipeline
+Each interaction gets a correlation id; spans for capture, recognition, routing,
+handlers and speech are written to a rotating JSONL file and summarized in a
+Prometheus text snapshot. When tracing is off a span costs one attribute check
+"""
+
+import contextvars
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+
+# Upper bounds (seconds) of the Prometheus histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_interaction = contextvars.ContextVar("aalex_interaction", default=None)
+
+
+def current_interaction():
+    """Correlation id of the interaction this code is running for, or None"""
+    return _interaction.get()
+
+
+class _NullSpan:
+    """Shared do-nothing span handed out while tracing is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attributes", "start")
+
+    def __init__(self, tracer, name, attributes):
+        """One timed stage"""
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.start = 0.0
+
+    def set(self, **attributes):
+        """Attach details learned while the stage runs (backend, command, ...)"""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, time.monotonic(), **self.attributes)
+        return False
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def add(self, seconds):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.total += seconds
+        self.count += 1
+
+
+class Tracer:
+    def __init__(self, enabled=False, path="aalex_traces.jsonl", max_bytes=5 * 1024 * 1024, backups=3,
+                 metrics_path="aalex_metrics.prom", metrics_interval=10.0):
+        """Record pipeline spans
+
+        The JSONL log rotates at max_bytes keeping backups old files; the
+        Prometheus snapshot is rewritten at most every metrics_interval seconds.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self.histograms = {}  # stage -> _Histogram
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.prefix = f"{os.getpid():x}-{int(time.time()):x}"
+        self.logger = None
+        self.last_snapshot = 0.0
+        self.enabled = False
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        """Start writing spans"""
+        if self.logger is None:
+            logger = logging.getLogger(f"aalex.trace.{id(self)}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            handler = logging.handlers.RotatingFileHandler(self.path, maxBytes=self.max_bytes,
+                                                           backupCount=self.backups, encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            self.logger = logger
+        self.enabled = True
+
+    def disable(self):
+        """Stop writing spans and flush the metrics snapshot"""
+        if self.enabled:
+            self.enabled = False
+            self.write_snapshot()
+
+    def close(self):
+        self.disable()
+        if self.logger:
+            for handler in list(self.logger.handlers):
+                handler.close()
+                self.logger.removeHandler(handler)
+            self.logger = None
+
+    def new_id(self):
+        return f"{self.prefix}-{next(self.ids)}"
+
+    def interaction(self):
+        """Context manager that gives the code inside (and commands it starts) one correlation id"""
+        return _Interaction(self)
+
+    def span(self, name, **attributes):
+        """Time a stage: with tracer.span("recognize"): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attributes)
+
+    def record(self, name, start, end, interaction=None, **attributes):
+        """Write a finished span measured elsewhere (monotonic start and end)"""
+        if not self.enabled:
+            return
+        seconds = end - start
+        event = {"ts": round(time.time(), 6), "id": interaction or _interaction.get(), "span": name,
+                 "start": round(start, 6), "ms": round(seconds * 1000, 3)}
+        if attributes:
+            event.update(attributes)
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = _Histogram()
+            histogram.add(seconds)
+        try:
+            self.logger.info(json.dumps(event, default=str))
+        except Exception as e:
+            print(f"Trace write error: {e}")
+
+    def maybe_snapshot(self):
+        if self.enabled and time.monotonic() - self.last_snapshot >= self.metrics_interval:
+            self.write_snapshot()
+
+    def prometheus_text(self):
+        """Stage latency histograms in the Prometheus text exposition format"""
+        lines = ["# HELP aalex_stage_seconds Time spent in each voice pipeline stage",
+                 "# TYPE aalex_stage_seconds histogram"]
+        with self.lock:
+            stages = {name: (list(h.counts), h.total, h.count) for name, h in self.histograms.items()}
+        for name, (counts, total, count) in sorted(stages.items()):
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f'aalex_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'aalex_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {count}')
+            lines.append(f'aalex_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'aalex_stage_seconds_count{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self):
+        """Replace the snapshot file atomically, so a scraper never reads half of it"""
+        self.last_snapshot = time.monotonic()
+        if not self.histograms:
+            return
+        temp = self.metrics_path + ".tmp"
+        try:
+            with open(temp, 'w') as f:
+                f.write(self.prometheus_text())
+            os.replace(temp, self.metrics_path)
+        except OSError as e:
+            print(f"Metrics snapshot error: {e}")
+
+
+class _Interaction:
+    def __init__(self, tracer):
+        self.tracer = tracer
+        self.token = None
+        self.id = None
+
+    def __enter__(self):
+        self.id = self.tracer.new_id() if self.tracer.enabled else None
+        self.token = _interaction.set(self.id)
+        return self
+
+    def __exit__(self, *exc):
+        _interaction.reset(self.token)
+        self.tracer.maybe_snapshot()
+        return False
+
+
+def main():
+    """Measure what a span costs with tracing off and on"""
+    import tempfile
+    print("AALEX Tracing - span overhead")
+    print("=" * 50)
+    directory = tempfile.mkdtemp()
+    tracer = Tracer(path=os.path.join(directory, "trace.jsonl"),
+                    metrics_path=os.path.join(directory, "metrics.prom"))
+    repeat = 100000
+    for label in ("disabled", "enabled"):
+        if label == "enabled":
+            tracer.enable()
+            repeat = 10000
+        with tracer.interaction():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                with tracer.span("stage"):
+                    pass
+            per_span_us = (time.perf_counter() - started) / repeat * 1e6
+        print(f"{label:>9}: {per_span_us:.2f} us per span")
+    tracer.close()
+    print(f"trace and metrics written to {directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+AALEX UI - One thread owns Tk, everyone else posts to it
+Worker threads queue calls with a UIDispatcher; the Tk thread runs them in
+batches from an after() timer, so the voice loop never touches a widget and
+never waits on the UI
+"""
+
+import queue
+import threading
+import time
+import tkinter as tk
+from concurrent.futures import Future
+
+FRAME_MS = 16  # Drain at about 60 frames a second while there is work
+IDLE_MS = 50  # and more lazily when there is none
+BUDGET_MS = 8  # Longest a frame spends running posted calls
+
+
+class DispatcherStats:
+    def __init__(self):
+        self.posted = 0
+        self.coalesced = 0  # post_latest calls that replaced one not yet run
+        self.run = 0
+        self.failed = 0
+        self.frames = 0
+        self.largest_batch = 0
+
+    def __repr__(self):
+        return (f"posted={self.posted} coalesced={self.coalesced} run={self.run} failed={self.failed} "
+                f"frames={self.frames} largest batch={self.largest_batch}")
+
+
+class UIDispatcher:
+    def __init__(self, root, frame_ms=FRAME_MS, idle_ms=IDLE_MS, budget_ms=BUDGET_MS):
+        """Run posted calls on the thread that owns root
+
+        Create it on that thread; the drain timer starts straight away.
+        """
+        self.root = root
+        self.frame_ms = frame_ms
+        self.idle_ms = idle_ms
+        self.budget = budget_ms / 1000
+        self.thread = threading.current_thread()
+        self.calls = queue.SimpleQueue()
+        self.latest = {}  # key -> (function, args, kwargs) waiting for the next frame
+        self.latest_lock = threading.Lock()
+        self.stats = DispatcherStats()
+        self.running = True
+        self.timer = root.after(self.frame_ms, self._drain)
+
+    def on_ui_thread(self):
+        return threading.current_thread() is self.thread
+
+    def post(self, function, *args, **kwargs):
+        """Run function(*args, **kwargs) on the UI thread soon; never blocks"""
+        self.stats.posted += 1
+        self.calls.put((function, args, kwargs))
+
+    def post_latest(self, key, function, *args, **kwargs):
+        """Like post, but a later call with the same key replaces this one if it has not run yet
+
+        For updates where only the newest value matters (a status line, a meter).
+        """
+        with self.latest_lock:
+            self.stats.posted += 1
+            if key in self.latest:
+                self.stats.coalesced += 1
+                self.latest[key] = (function, args, kwargs)
+                return
+            self.latest[key] = (function, args, kwargs)
+        self.calls.put((self._run_latest, (key,), {}))
+
+    def _run_latest(self, key):
+        with self.latest_lock:
+            function, args, kwargs = self.latest.pop(key)
+        function(*args, **kwargs)
+
+    def call(self, function, *args, timeout=None, **kwargs):
+        """Run function on the UI thread and return its result (runs directly if already there)"""
+        if self.on_ui_thread():
+            return function(*args, **kwargs)
+        future = Future()
+
+        def run():
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(function(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+
+        self.post(run)
+        return future.result(timeout)
+
+    def _drain(self):
+        if not self.running:
+            return
+        deadline = time.perf_counter() + self.budget
+        count = 0
+        # Everything posted so far, unless the frame's budget runs out first
+        while time.perf_counter() < deadline:
+            try:
+                function, args, kwargs = self.calls.get_nowait()
+            except queue.Empty:
+                break
+            count += 1
+            try:
+                function(*args, **kwargs)
+            except Exception as e:
+                self.stats.failed += 1
+                print(f"UI call {getattr(function, '__name__', function)} failed: {e}")
+        self.stats.run += count
+        if count:
+            self.stats.frames += 1
+            self.stats.largest_batch = max(self.stats.largest_batch, count)
+        try:
+            busy = count or not self.calls.empty()
+            self.timer = self.root.after(self.frame_ms if busy else self.idle_ms, self._drain)
+        except tk.TclError:
+            self.running = False  # Window destroyed
+
+    def stop(self):
+        self.running = False
+        try:
+            self.root.after_cancel(self.timer)
+        except tk.TclError:
+            pass
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_ui(timeout=10):
+    """The dispatcher of a hidden Tk root running on its own thread, started on first use
+
+    Windows opened from the voice loop (the control pad) are Toplevels of this
+    root and are built on its thread, via post or call.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is not None and _shared.running:
+            return _shared
+        ready = threading.Event()
+        holder = {}
+
+        def run():
+            try:
+                root = tk.Tk()
+                root.withdraw()
+                holder["dispatcher"] = UIDispatcher(root)
+            except tk.TclError as e:
+                holder["error"] = e  # No display
+                return
+            finally:
+                ready.set()
+            root.mainloop()
+
+        threading.Thread(target=run, daemon=True, name="aalex-ui").start()
+        if not ready.wait(timeout):
+            raise RuntimeError("The UI thread did not start")
+        if "error" in holder:
+            raise holder["error"]
+        _shared = holder["dispatcher"]
+        return _shared
+
+
+def main():
+    """Flood the dispatcher from worker threads and report how the calls were batched"""
+    print("AALEX UI - dispatcher check")
+    print("=" * 50)
+    try:
+        ui = shared_ui()
+    except (tk.TclError, RuntimeError) as e:
+        print(f"no display: {e}")
+        return
+    label = ui.call(tk.Label, ui.root)
+    updates = []
+
+    def worker(number):
+        for i in range(1000):
+            ui.post(updates.append, i)
+            ui.post_latest("status", label.config, text=f"worker {number} update {i}")
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    posting_ms = (time.perf_counter() - started) * 1000
+    ui.call(lambda: None, timeout=10)
+    print(f"posted 8000 calls from 4 threads in {posting_ms:.1f} ms, all run after "
+          f"{(time.perf_counter() - started) * 1000:.1f} ms")
+    print(f"{len(updates)} appends ran; status now {ui.call(label.cget, 'text')!r}")
+    print(ui.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+AALEX VAD - Frame-level voice activity detection for endpointing
+Energy, zero-crossing rate and spectral flatness per 20 ms frame, vectorized with NumPy
+"""
+
+import numpy as np
+
+
+def pcm_to_array(frame_data, sample_width, dtype=np.float32):
+    """PCM bytes as a float array in the sample's own units (what audioop.rms used to measure)"""
+    if sample_width == 1:
+        return np.frombuffer(frame_data, dtype=np.uint8).astype(dtype) - 128
+    if sample_width == 2:
+        return np.frombuffer(frame_data, dtype='<i2').astype(dtype)
+    if sample_width == 3:
+        raw = np.frombuffer(frame_data, dtype=np.uint8)[:len(frame_data) // 3 * 3].reshape(-1, 3).astype(np.int32)
+        values = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        return ((values ^ 0x800000) - 0x800000).astype(dtype)  # Sign-extend 24 bits
+    return np.frombuffer(frame_data, dtype='<i4').astype(dtype)
+
+
+def array_to_pcm(samples, sample_width):
+    """The inverse of pcm_to_array, clipping to the sample range"""
+    limit = 2 ** (8 * sample_width - 1)
+    values = np.clip(np.rint(samples), -limit, limit - 1)
+    if sample_width == 1:
+        return (values + 128).astype(np.uint8).tobytes()
+    if sample_width == 2:
+        return values.astype('<i2').tobytes()
+    if sample_width == 3:
+        return values.astype('<i4').view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    return values.astype('<i4').tobytes()
+
+
+def pcm_rms(frame_data, sample_width):
+    """Root mean square of a PCM frame, as an int like audioop.rms"""
+    samples = pcm_to_array(frame_data, sample_width, np.float64)
+    if not len(samples):
+        return 0
+    return int(np.sqrt(np.mean(samples * samples)))
+
+
+def downmix(frame_data, sample_width, channels):
+    """Interleaved multi-channel PCM averaged down to mono"""
+    samples = pcm_to_array(frame_data, sample_width, np.float64)
+    samples = samples[:len(samples) // channels * channels].reshape(-1, channels)
+    return array_to_pcm(samples.mean(axis=1), sample_width)
+
+
+class VoiceActivityDetector:
+    def __init__(self, frame_ms=20, hangover_ms=300, energy_ratio=2.0, flatness_max=0.5,
+                 zcr_min=0.01, padding_ms=100, min_voiced_fraction=0.3):
+        """Decide which frames hold speech and where an utterance ends
+
+        A frame is speech when it is louder than energy_ratio x the noise floor,
+        tonal enough (spectral flatness below flatness_max, so not hiss) and not
+        a low hum or thump (zero-crossing rate above zcr_min). The utterance ends
+        hangover_ms after the last speech frame.
+        """
+        self.frame_ms = frame_ms
+        self.hangover_ms = hangover_ms
+        self.energy_ratio = energy_ratio
+        self.flatness_max = flatness_max
+        self.zcr_min = zcr_min
+        self.padding_ms = padding_ms
+        self.min_voiced_fraction = min_voiced_fraction
+
+        # Audio seconds before and after trimming, to see what endpointing saves
+        self.seconds_in = 0.0
+        self.seconds_out = 0.0
+
+    @property
+    def hangover(self):
+        """End-of-speech delay in seconds"""
+        return self.hangover_ms / 1000
+
+    def features(self, samples, sample_rate):
+        """Per-frame RMS, zero-crossing rate and spectral flatness"""
+        frame_length = max(1, int(sample_rate * self.frame_ms / 1000))
+        count = len(samples) // frame_length
+        if count == 0:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty, empty
+        frames = samples[:count * frame_length].reshape(count, frame_length)
+
+        rms = np.sqrt(np.mean(frames ** 2, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        power = np.abs(np.fft.rfft(frames, axis=1)) ** 2 + 1e-10
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return rms, zcr, flatness
+
+    def voiced(self, samples, sample_rate, noise_floor):
+        """Boolean speech decision for each frame"""
+        rms, zcr, flatness = self.features(samples, sample_rate)
+        return ((rms > noise_floor * self.energy_ratio)
+                & (flatness < self.flatness_max)
+                & (zcr > self.zcr_min))
+
+    def is_speech(self, frame_data, sample_rate, sample_width, noise_floor):
+        """Whether a capture chunk holds speech"""
+        voiced = self.voiced(pcm_to_array(frame_data, sample_width), sample_rate, noise_floor)
+        return bool(len(voiced)) and voiced.mean() >= self.min_voiced_fraction
+
+    def trim(self, frame_data, sample_rate, sample_width, noise_floor):
+        """Cut leading and trailing silence, keeping padding_ms around the speech"""
+        voiced = self.voiced(pcm_to_array(frame_data, sample_width), sample_rate, noise_floor)
+        frame_bytes = int(sample_rate * self.frame_ms / 1000) * sample_width
+        self.seconds_in += len(frame_data) / (sample_rate * sample_width)
+
+        positions = np.flatnonzero(voiced)
+        if len(positions) == 0:
+            trimmed = frame_data
+        else:
+            padding = int(self.padding_ms / self.frame_ms)
+            first = max(0, positions[0] - padding)
+            last = min(len(voiced), positions[-1] + 1 + padding)
+            end = len(frame_data) if last == len(voiced) else last * frame_bytes
+            trimmed = frame_data[first * frame_bytes:end]
+
+        self.seconds_out += len(trimmed) / (sample_rate * sample_width)
+        return trimmed
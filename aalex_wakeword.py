@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+AALEX Wake Word - Offline keyword spotting in front of the cloud recognizer
+MFCC features matched against enrolled samples with subsequence DTW (NumPy only)
+"""
+
+import os
+import glob
+import time
+import wave
+import numpy as np
+
+FEATURE_RATE = 16000
+FRAME_LENGTH = 400   # 25 ms
+FRAME_HOP = 160      # 10 ms
+FFT_SIZE = 512
+MEL_BANDS = 26
+CEPSTRA = 13
+
+
+def pcm_to_float(frame_data, sample_width):
+    """Convert little-endian PCM bytes to a float array in [-1, 1]"""
+    if sample_width == 1:
+        return (np.frombuffer(frame_data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    if sample_width == 2:
+        return np.frombuffer(frame_data, dtype='<i2').astype(np.float32) / 32768
+    if sample_width == 3:
+        raw = np.frombuffer(frame_data, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8)
+                | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+        return ints.astype(np.float32) / 8388608
+    return np.frombuffer(frame_data, dtype='<i4').astype(np.float32) / 2147483648
+
+
+def read_wav(path):
+    """Read a WAV file as mono float samples and its sample rate"""
+    with wave.open(path, 'rb') as wav:
+        rate = wav.getframerate()
+        width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        samples = pcm_to_float(wav.readframes(wav.getnframes()), width)
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def _mel_filterbank():
+    def hz_to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def mel_to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    mels = np.linspace(hz_to_mel(0), hz_to_mel(FEATURE_RATE / 2), MEL_BANDS + 2)
+    bins = np.floor((FFT_SIZE + 1) * mel_to_hz(mels) / FEATURE_RATE).astype(int)
+    bank = np.zeros((MEL_BANDS, FFT_SIZE // 2 + 1), dtype=np.float32)
+    for m in range(1, MEL_BANDS + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            bank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            bank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return bank
+
+
+def _dct_matrix():
+    n = np.arange(MEL_BANDS)
+    k = np.arange(CEPSTRA)[:, None]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * MEL_BANDS)) * np.sqrt(2 / MEL_BANDS)).astype(np.float32)
+
+
+MEL_BANK = _mel_filterbank()
+DCT = _dct_matrix()
+WINDOW = np.hamming(FRAME_LENGTH).astype(np.float32)
+
+
+def mfcc(samples, sample_rate):
+    """Compute MFCC frames (frames x coefficients) for mono samples
+
+    c0 (overall loudness) is dropped and no utterance-level mean is removed,
+    so a template compares the same way against a short clip or a long one.
+    """
+    if sample_rate != FEATURE_RATE and len(samples):
+        # Linear interpolation is plenty for 8 kHz-wide features
+        positions = np.arange(0, len(samples), sample_rate / FEATURE_RATE)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    if len(samples) < FRAME_LENGTH:
+        samples = np.pad(samples, (0, FRAME_LENGTH - len(samples)))
+
+    emphasized = np.append(samples[0], samples[1:] - 0.97 * samples[:-1])
+    count = 1 + (len(emphasized) - FRAME_LENGTH) // FRAME_HOP
+    index = np.arange(FRAME_LENGTH)[None, :] + FRAME_HOP * np.arange(count)[:, None]
+    frames = emphasized[index] * WINDOW
+
+    power = np.abs(np.fft.rfft(frames, FFT_SIZE)) ** 2 / FFT_SIZE
+    energies = np.log(power @ MEL_BANK.T + 1e-10)
+    return (energies @ DCT.T)[:, 1:]
+
+
+def subsequence_dtw(template, query):
+    """Best match of template anywhere inside query
+
+    Returns (normalized distance, end frame in query). Each template frame
+    consumes 0-2 query frames, but never 0 twice in a row, so the template
+    can stretch to twice its length or shrink to half, and cannot collapse
+    onto one query frame.
+    """
+    if len(query) == 0:
+        return np.inf, 0
+    # Pairwise Euclidean distances, template frames x query frames
+    cost = np.sqrt(((template[:, None, :] - query[None, :, :]) ** 2).sum(axis=2))
+    advanced = cost[0].copy()  # Paths whose last step consumed a query frame; free start anywhere
+    held = np.full(len(query), np.inf)  # Paths whose last step stayed on the same query frame
+    for i in range(1, len(template)):
+        best = np.minimum(advanced, held)
+        # Best path ending one or two query frames earlier
+        previous = np.full(len(query), np.inf)
+        previous[1:] = best[:-1]
+        previous[2:] = np.minimum(previous[2:], best[:-2])
+        advanced, held = cost[i] + previous, cost[i] + advanced
+    acc = np.minimum(advanced, held)
+    end = int(np.argmin(acc))
+    return float(acc[end] / len(template)), end
+
+
+class WakeWordSpotter:
+    def __init__(self, threshold=None, margin=1.25):
+        """Template-matching keyword spotter for the wake words"""
+        self.templates = []  # (label, mfcc frames)
+        self.threshold = threshold
+        self.margin = margin
+        self.last_latency = 0.0
+
+    def enroll(self, samples, sample_rate, label):
+        """Add one recorded sample of a wake word"""
+        self.templates.append((label, mfcc(samples, sample_rate)))
+
+    def enroll_directory(self, directory):
+        """Enroll every <label>_*.wav file in a directory, returns the count"""
+        paths = sorted(glob.glob(os.path.join(directory, "*.wav")))
+        for path in paths:
+            label = os.path.basename(path).rsplit("_", 1)[0].rsplit(".", 1)[0]
+            samples, rate = read_wav(path)
+            self.enroll(samples, rate, label)
+        if self.threshold is None:
+            self.calibrate()
+        return len(paths)
+
+    def calibrate(self):
+        """Derive the acceptance threshold from distances between same-label templates
+
+        Raises ValueError if no finite threshold comes out, rather than accept everything.
+        """
+        distances = []
+        pairs = 0
+        for i, (label_a, a) in enumerate(self.templates):
+            for label_b, b in self.templates[i + 1:]:
+                if label_a == label_b:
+                    pairs += 1
+                    # The shorter sample as the template always fits inside the longer one
+                    template, query = (a, b) if len(a) <= len(b) else (b, a)
+                    distance = subsequence_dtw(template, query)[0]
+                    if np.isfinite(distance):
+                        distances.append(distance)
+        # With a single template per label fall back to a conservative constant
+        threshold = (max(distances) * self.margin) if distances else 25.0
+        if not np.isfinite(threshold) or (pairs and not distances):
+            raise ValueError(f"Wake word samples gave no usable threshold ({threshold})")
+        self.threshold = threshold
+        return self.threshold
+
+    def detect(self, samples, sample_rate):
+        """Look for a wake word in the samples
+
+        Returns (label, distance, end time in seconds) or None.
+        """
+        started = time.perf_counter()
+        query = mfcc(samples, sample_rate)
+        best = None
+        for label, template in self.templates:
+            distance, end = subsequence_dtw(template, query)
+            if distance <= self.threshold and (best is None or distance < best[1]):
+                best = (label, distance, (end + 1) * FRAME_HOP / FEATURE_RATE
+                        + (FRAME_LENGTH - FRAME_HOP) / FEATURE_RATE)
+        self.last_latency = time.perf_counter() - started
+        return best
+
+    def detect_pcm(self, frame_data, sample_rate, sample_width):
+        """detect() for raw PCM bytes"""
+        return self.detect(pcm_to_float(frame_data, sample_width), sample_rate)
+
+    def evaluate(self, corpus_dir):
+        """Measure accuracy on corpus_dir/positive/*.wav and corpus_dir/negative/*.wav"""
+        report = {"positives": 0, "detected": 0, "negatives": 0, "false_accepts": 0,
+                  "negative_seconds": 0.0, "latencies": []}
+        for kind in ("positive", "negative"):
+            for path in sorted(glob.glob(os.path.join(corpus_dir, kind, "*.wav"))):
+                samples, rate = read_wav(path)
+                hit = self.detect(samples, rate)
+                report["latencies"].append(self.last_latency)
+                if kind == "positive":
+                    report["positives"] += 1
+                    report["detected"] += bool(hit)
+                else:
+                    report["negatives"] += 1
+                    report["false_accepts"] += bool(hit)
+                    report["negative_seconds"] += len(samples) / rate
+
+        latencies = np.array(report.pop("latencies") or [0.0]) * 1000
+        hours = report["negative_seconds"] / 3600
+        report["detection_rate"] = report["detected"] / report["positives"] if report["positives"] else 0.0
+        report["false_accept_rate"] = report["false_accepts"] / report["negatives"] if report["negatives"] else 0.0
+        report["false_accepts_per_hour"] = report["false_accepts"] / hours if hours else 0.0
+        report["latency_ms_mean"] = float(latencies.mean())
+        report["latency_ms_p95"] = float(np.percentile(latencies, 95))
+        return report
+
+
+def main():
+    """Evaluate the spotter on a recorded WAV corpus"""
+    import sys
+    if len(sys.argv) < 3:
+        print("Usage: python aalex_wakeword.py <enrollment dir> <corpus dir>")
+        print("  enrollment dir: aalex_1.wav, jarvis_1.wav, ...")
+        print("  corpus dir: positive/*.wav and negative/*.wav")
+        return
+
+    spotter = WakeWordSpotter()
+    count = spotter.enroll_directory(sys.argv[1])
+    print(f"Enrolled {count} samples, threshold {spotter.threshold:.2f}")
+
+    report = spotter.evaluate(sys.argv[2])
+    print(f"Detection rate: {report['detection_rate']:.1%} ({report['detected']}/{report['positives']})")
+    print(f"False accepts: {report['false_accepts']}/{report['negatives']} "
+          f"({report['false_accept_rate']:.1%}, {report['false_accepts_per_hour']:.1f} per hour)")
+    print(f"Detection latency: mean {report['latency_ms_mean']:.1f} ms, p95 {report['latency_ms_p95']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()